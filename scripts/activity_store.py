@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils import ensure_dir, load_config
+
+DEFAULT_STORE_PATH = os.path.join("data", "activities.sqlite")
+BATCH_SIZE = 5000
+COLUMNS = ("id", "start_date_local", "date", "year", "type", "distance", "moving_time", "elevation_gain", "details")
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS activities (
+        id INTEGER PRIMARY KEY,
+        start_date_local TEXT,
+        date TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        distance REAL NOT NULL,
+        moving_time REAL NOT NULL,
+        elevation_gain REAL NOT NULL,
+        details TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS activities_date ON activities (date)",
+    "CREATE INDEX IF NOT EXISTS activities_type_date ON activities (type, date)",
+)
+GROUPINGS = {
+    "day": "date",
+    "month": "substr(date, 1, 7)",
+    "year": "CAST(year AS TEXT)",
+    "type": "type",
+}
+
+
+def store_path(config: Dict) -> Optional[str]:
+    """SQLite store path from config; None while the store is disabled."""
+    store_cfg = config.get("store", {}) or {}
+    if not store_cfg.get("enabled", False):
+        return None
+    return str(store_cfg.get("path") or DEFAULT_STORE_PATH)
+
+
+def readable_store(config: Dict) -> Optional[str]:
+    """Store path if it is enabled and has been written."""
+    path = store_path(config)
+    return path if path and os.path.exists(path) else None
+
+
+def _connect(path: str):
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    return conn
+
+
+def _row(item: Dict) -> Tuple:
+    details = item.get("details")
+    return (
+        int(item["id"]),
+        item.get("start_date_local"),
+        item["date"],
+        int(item["year"]),
+        item["type"],
+        float(item.get("distance", 0.0)),
+        float(item.get("moving_time", 0.0)),
+        float(item.get("elevation_gain", 0.0)),
+        json.dumps(details, sort_keys=True) if details is not None else None,
+    )
+
+
+def _item(row: Sequence, columns: Sequence[str] = COLUMNS) -> Dict:
+    item = dict(zip(columns, row))
+    if "details" in item:
+        if item["details"] is None:
+            del item["details"]
+        else:
+            item["details"] = json.loads(item["details"])
+    return item
+
+
+def write_store(path: str, items: List[Dict]) -> Dict[str, int]:
+    """Make the store hold exactly `items`.
+
+    Only new or changed rows are written and vanished ids deleted, in
+    transactions of BATCH_SIZE rows. The database is local state carried
+    by the state pack, so it is not recorded for commits.
+    """
+    ensure_dir(os.path.dirname(path) or ".")
+    conn = _connect(path)
+    try:
+        existing = {row[0]: row for row in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM activities")}
+        rows = [_row(item) for item in items]
+        changed = [row for row in rows if existing.get(row[0]) != row]
+        removed = [(activity_id,) for activity_id in set(existing) - {row[0] for row in rows}]
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        for start in range(0, len(changed), BATCH_SIZE):
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO activities ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                    changed[start : start + BATCH_SIZE],
+                )
+        for start in range(0, len(removed), BATCH_SIZE):
+            with conn:
+                conn.executemany("DELETE FROM activities WHERE id = ?", removed[start : start + BATCH_SIZE])
+    finally:
+        conn.close()
+    return {"written": len(changed), "deleted": len(removed)}
+
+
+def update_store(config: Dict, items: List[Dict]) -> Optional[Dict[str, int]]:
+    """Mirror freshly normalized items into the store when it is enabled."""
+    path = store_path(config)
+    return write_store(path, items) if path else None
+
+
+def _where(
+    start: Optional[str], end: Optional[str], types: Optional[Iterable[str]]
+) -> Tuple[str, List]:
+    clauses: List[str] = []
+    params: List = []
+    types = sorted(set(types or []))
+    if types:
+        clauses.append(f"type IN ({', '.join('?' for _ in types)})")
+        params.extend(types)
+    if start:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end:
+        clauses.append("date <= ?")
+        params.append(end)
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def date_span(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """First and last activity date, read from the date index."""
+    conn = _connect(path)
+    try:
+        first, last = conn.execute("SELECT MIN(date), MAX(date) FROM activities").fetchone()
+    finally:
+        conn.close()
+    return first, last
+
+
+def read_items(
+    path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    types: Optional[Iterable[str]] = None,
+    columns: Sequence[str] = COLUMNS,
+) -> List[Dict]:
+    """Normalized items in [start, end] (inclusive ISO dates) of the given
+    types, ordered like activities_normalized.json; `columns` limits what
+    is read."""
+    where, params = _where(start, end, types)
+    conn = _connect(path)
+    try:
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM activities{where} ORDER BY date, id", params)
+        return [_item(row, columns) for row in rows]
+    finally:
+        conn.close()
+
+
+def totals(
+    path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    types: Optional[Iterable[str]] = None,
+    group_by: Optional[str] = None,
+) -> List[Dict]:
+    """Counts and sums over a range, optionally grouped by day, month, year
+    or type."""
+    where, params = _where(start, end, types)
+    key = GROUPINGS[group_by] if group_by else "NULL"
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT {key} AS grp, COUNT(*), SUM(distance), SUM(moving_time), SUM(elevation_gain),
+                   MIN(date), MAX(date)
+            FROM activities{where}
+            GROUP BY grp ORDER BY grp
+            """,
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    results = []
+    for grp, count, distance, moving_time, elevation_gain, first, last in rows:
+        if not count:
+            continue
+        result = {group_by: grp} if group_by else {}
+        result.update(
+            {
+                "count": count,
+                "distance": round(distance or 0.0, 1),
+                "moving_time": round(moving_time or 0.0),
+                "elevation_gain": round(elevation_gain or 0.0, 1),
+                "first_date": first,
+                "last_date": last,
+            }
+        )
+        results.append(result)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the SQLite activity store")
+    parser.add_argument("--from", dest="start", default=None, help="First date (YYYY-MM-DD, inclusive).")
+    parser.add_argument("--to", dest="end", default=None, help="Last date (YYYY-MM-DD, inclusive).")
+    parser.add_argument("--type", dest="types", action="append", default=None, help="Activity type; repeatable.")
+    parser.add_argument("--group-by", choices=sorted(GROUPINGS), default=None)
+    parser.add_argument("--list", action="store_true", help="List matching activities instead of totals.")
+    args = parser.parse_args()
+
+    path = readable_store(load_config())
+    if not path:
+        parser.error("no activity store: set store.enabled in config.yaml and run normalize")
+    if args.list:
+        payload = read_items(path, args.start, args.end, args.types)
+    else:
+        payload = totals(path, args.start, args.end, args.types, args.group_by)
+    print(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,9 @@
+import argparse
+import json
+import os
 import re
-from typing import Dict, List, Sequence
+from collections import Counter
+from typing import Collection, Dict, Iterable, List, Sequence, Tuple
 
 DEFAULT_FEATURED_TYPES = ["Run", "Ride", "WeightTraining"]
 
@@ -39,6 +43,14 @@ TYPE_ACCENT_COLORS = {
     "OtherSports": "#f5c2ff",
 }
 
+# Plural card titles in the summary; site/app.js reads them from
+# type_meta in site/data.json.
+SUMMARY_TITLES = {
+    "ride": "Rides",
+    "run": "Runs",
+    "weight training": "Weight Trainings",
+}
+
 FALLBACK_VAPORWAVE_COLORS = [
     "#f15bb5",
     "#fee440",
@@ -104,8 +116,14 @@ KNOWN_TYPE_GROUPS_BY_SLUG = {
 }
 
 
+_SLUG_STRIP = re.compile(r"[^a-z0-9]")
+RUN_TOKENS = ("run",)
+RIDE_TOKENS = ("ride", "bike", "cycle")
+STRENGTH_TOKENS = ("weight", "strength")
+
+
 def _slug(value: str) -> str:
-    return re.sub(r"[^a-z0-9]", "", (value or "").lower())
+    return _SLUG_STRIP.sub("", (value or "").lower())
 
 
 def featured_types_from_config(config_activities: Dict) -> List[str]:
@@ -115,38 +133,121 @@ def featured_types_from_config(config_activities: Dict) -> List[str]:
     return list(DEFAULT_FEATURED_TYPES)
 
 
-def normalize_activity_type(
+def _match_type(
     activity_type: str,
-    featured_types: Sequence[str],
+    featured_types: Collection[str],
     group_other_types: bool,
     other_bucket: str,
     group_aliases: Dict[str, str],
-) -> str:
+) -> Tuple[str, str]:
+    """Group for one type and the name of the rule that chose it."""
     value = str(activity_type or "").strip() or other_bucket
     if value in featured_types:
-        return value
+        return value, "featured"
 
     alias = group_aliases.get(value)
     if alias:
-        return alias
+        return alias, "group_alias"
 
     if not group_other_types:
-        return value
+        return value, "ungrouped"
 
     slug = _slug(value)
 
-    if "run" in slug and "row" not in slug:
-        return "Run"
-    if any(token in slug for token in ("ride", "bike", "cycle")):
-        return "Ride"
-    if any(token in slug for token in ("weight", "strength")):
-        return "WeightTraining"
+    if any(token in slug for token in RUN_TOKENS) and "row" not in slug:
+        return "Run", "run_token"
+    if any(token in slug for token in RIDE_TOKENS):
+        return "Ride", "ride_token"
+    if any(token in slug for token in STRENGTH_TOKENS):
+        return "WeightTraining", "strength_token"
 
     known_group = KNOWN_TYPE_GROUPS_BY_SLUG.get(slug)
     if known_group:
-        return known_group
+        return known_group, "known_type"
+
+    return other_bucket, "other_bucket"
+
+
+def normalize_activity_type(
+    activity_type: str,
+    featured_types: Sequence[str],
+    group_other_types: bool,
+    other_bucket: str,
+    group_aliases: Dict[str, str],
+) -> str:
+    return _match_type(activity_type, featured_types, group_other_types, other_bucket, group_aliases)[0]
+
 
-    return other_bucket
+class TypeClassifier:
+    """Type aliasing and grouping compiled for one `activities` config.
+
+    Histories only contain a few dozen distinct Strava types, so every
+    result is memoized by input type and the rules run once per type.
+    """
+
+    def __init__(
+        self,
+        type_aliases: Dict[str, str],
+        featured_types: Sequence[str],
+        group_other_types: bool,
+        other_bucket: str,
+        group_aliases: Dict[str, str],
+    ) -> None:
+        self.type_aliases = dict(type_aliases or {})
+        self.featured_types = list(featured_types)
+        self.group_other_types = bool(group_other_types)
+        self.other_bucket = other_bucket
+        self.group_aliases = dict(group_aliases or {})
+        self._featured_set = frozenset(self.featured_types)
+        self._groups: Dict[str, Tuple[str, str]] = {}
+        self._classified: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, config_activities: Dict) -> "TypeClassifier":
+        return cls(
+            type_aliases=config_activities.get("type_aliases", {}) or {},
+            featured_types=featured_types_from_config(config_activities),
+            group_other_types=bool(config_activities.get("group_other_types", True)),
+            other_bucket=str(config_activities.get("other_bucket", "OtherSports")),
+            group_aliases=config_activities.get("group_aliases", {}) or {},
+        )
+
+    def _group_match(self, activity_type: str) -> Tuple[str, str]:
+        match = self._groups.get(activity_type)
+        if match is None:
+            match = _match_type(
+                activity_type,
+                self._featured_set,
+                self.group_other_types,
+                self.other_bucket,
+                self.group_aliases,
+            )
+            self._groups[activity_type] = match
+        return match
+
+    def group(self, activity_type: str) -> str:
+        """Group for an already aliased type (e.g. a persisted item)."""
+        return self._group_match(activity_type)[0]
+
+    def classify(self, raw_type: str) -> str:
+        """Group for a raw Strava type: `type_aliases`, then grouping."""
+        result = self._classified.get(raw_type)
+        if result is None:
+            result = self.group(self.type_aliases.get(raw_type, raw_type))
+            self._classified[raw_type] = result
+        return result
+
+    def group_many(self, activity_types: Iterable[str]) -> List[str]:
+        return [self.group(activity_type) for activity_type in activity_types]
+
+    def classify_many(self, raw_types: Iterable[str]) -> List[str]:
+        return [self.classify(raw_type) for raw_type in raw_types]
+
+    def explain(self, raw_type: str) -> Dict[str, str]:
+        """How a raw type is classified: its alias, group and the rule used."""
+        aliased = self.type_aliases.get(raw_type, raw_type)
+        group, rule = self._group_match(aliased)
+        return {"type": raw_type, "alias": aliased, "group": group, "rule": rule}
 
 
 def type_label(activity_type: str) -> str:
@@ -169,6 +270,11 @@ def type_accent(activity_type: str) -> str:
     return TYPE_ACCENT_COLORS.get(activity_type, _fallback_color(activity_type))
 
 
+def type_summary_title(activity_type: str) -> str:
+    label = type_label(activity_type)
+    return SUMMARY_TITLES.get(label.strip().lower(), label)
+
+
 def ordered_types(type_counts: Dict[str, int], featured_types: Sequence[str]) -> List[str]:
     counts = {str(k): int(v) for k, v in (type_counts or {}).items() if int(v) > 0}
     featured_present = [activity_type for activity_type in featured_types if counts.get(activity_type, 0) > 0]
@@ -187,5 +293,33 @@ def build_type_meta(types: Sequence[str]) -> Dict[str, Dict[str, str]]:
         meta[activity_type] = {
             "label": type_label(activity_type),
             "accent": type_accent(activity_type),
+            "summary_title": type_summary_title(activity_type),
         }
     return meta
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Explain how activity types are grouped")
+    parser.add_argument(
+        "types",
+        nargs="*",
+        help="Raw Strava types (default: every type in activities/raw, with counts).",
+    )
+    args = parser.parse_args()
+
+    from utils import load_config, read_json
+
+    classifier = TypeClassifier.from_config(load_config().get("activities", {}) or {})
+    counts: Counter = Counter(args.types)
+    raw_dir = os.path.join("activities", "raw")
+    if not args.types and os.path.exists(raw_dir):
+        for filename in sorted(os.listdir(raw_dir)):
+            if filename.endswith(".json"):
+                counts[read_json(os.path.join(raw_dir, filename)).get("type") or "Unknown"] += 1
+    explained = [dict(classifier.explain(raw_type), count=count) for raw_type, count in sorted(counts.items())]
+    print(json.dumps(explained, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
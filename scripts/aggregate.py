@@ -1,21 +1,43 @@
 import argparse
 import os
 from collections import defaultdict
+from typing import Dict, Iterator
 
-from utils import ensure_dir, load_config, read_json, utc_now, write_json
+from activity_store import date_span, read_items, readable_store
+from utils import ensure_dir, iter_json_array, load_config, write_json
 
 IN_PATH = "data/activities_normalized.json"
 OUT_PATH = "data/daily_aggregates.json"
+STORE_COLUMNS = ("id", "date", "year", "type", "distance", "moving_time", "elevation_gain", "details")
 
 
-def aggregate():
-    config = load_config()
+def _add_details(entry: Dict, item: Dict) -> None:
+    """Sum hydrated calories and collect heart rate, weighted by moving
+    time; days without hydrated activities keep only the summary fields."""
+    details = item.get("details") or {}
+    if details.get("calories") is not None:
+        entry["calories"] = entry.get("calories", 0.0) + float(details["calories"])
+    moving_time = float(item.get("moving_time", 0.0))
+    if details.get("average_heartrate") is not None and moving_time > 0:
+        entry["_heartrate_beats"] = entry.get("_heartrate_beats", 0.0) + float(details["average_heartrate"]) * moving_time
+        entry["_heartrate_time"] = entry.get("_heartrate_time", 0.0) + moving_time
+    if details.get("max_heartrate") is not None:
+        entry["max_heartrate"] = max(float(entry.get("max_heartrate", 0.0)), float(details["max_heartrate"]))
+
+
+def _finish_heartrate(entry: Dict) -> None:
+    beats = entry.pop("_heartrate_beats", None)
+    seconds = entry.pop("_heartrate_time", None)
+    if beats is not None and seconds:
+        entry["average_heartrate"] = round(beats / seconds, 1)
+
+
+def aggregate_items(items, config):
+    """Year -> type -> date entries for the given normalized items."""
     activities_cfg = config.get("activities", {}) or {}
     include_all_types = bool(activities_cfg.get("include_all_types", True))
     featured_types = set(activities_cfg.get("types", []) or [])
 
-    items = read_json(IN_PATH) if os.path.exists(IN_PATH) else []
-
     data = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
 
     for item in items:
@@ -41,18 +63,40 @@ def aggregate():
         entry["moving_time"] += float(item.get("moving_time", 0.0))
         entry["elevation_gain"] += float(item.get("elevation_gain", 0.0))
         entry["activity_ids"].append(item.get("id"))
+        _add_details(entry, item)
         data[year][activity_type][date] = entry
 
     for year_data in data.values():
         for type_data in year_data.values():
             for entry in type_data.values():
                 entry["activity_ids"] = sorted(entry["activity_ids"])
+                _finish_heartrate(entry)
+    return data
 
-    output = {
-        "generated_at": utc_now().isoformat(),
-        "years": data,
-    }
-    return output
+
+def _store_items(store: str, config: Dict) -> Iterator[Dict]:
+    """Rows aggregate_items uses, read one year at a time over the date
+    index; when only featured types are aggregated, the rest are skipped
+    in SQL through the (type, date) index."""
+    activities_cfg = config.get("activities", {}) or {}
+    types = None
+    if not bool(activities_cfg.get("include_all_types", True)):
+        types = list(activities_cfg.get("types", []) or []) or None
+    first, last = date_span(store)
+    if not first or not last:
+        return
+    for year in range(int(first[:4]), int(last[:4]) + 1):
+        yield from read_items(store, f"{year:04d}-01-01", f"{year:04d}-12-31", types, STORE_COLUMNS)
+
+
+def aggregate():
+    config = load_config()
+    store = readable_store(config)
+    if store:
+        items = _store_items(store, config)
+    else:
+        items = iter_json_array(IN_PATH) if os.path.exists(IN_PATH) else []
+    return {"years": aggregate_items(items, config)}
 
 
 def main() -> int:
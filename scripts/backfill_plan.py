@@ -0,0 +1,175 @@
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from utils import load_config, read_json, utc_now
+
+STATE_PATH = os.path.join("data", "backfill_state.json")
+NORMALIZED_PATH = os.path.join("data", "activities_normalized.json")
+
+STRAVA_MAX_PER_PAGE = 200
+WINDOW_SECONDS = 900
+# GitHub Actions cancels jobs after 360 minutes; stop early enough to save
+# the cursor and regenerate the site.
+DEFAULT_MAX_RUN_MINUTES = 330
+# Reads a run needs outside the backfill: token refresh, athlete check and
+# the recent-activity pages.
+RESERVED_READS = 4
+# Used when there is no synced history yet to measure activity density.
+DEFAULT_ACTIVITIES_PER_DAY = 1.0
+DEFAULT_RUNS_PER_DAY = 1
+# Oldest possible activity when the history has no start boundary.
+STRAVA_LAUNCH_TS = int(datetime(2009, 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def _rate_value(config: Dict, key: str, default: int) -> int:
+    return int((config.get("rate_limits", {}) or {}).get(key, default))
+
+
+def max_run_seconds(config: Dict) -> float:
+    return float((config.get("sync", {}) or {}).get("max_run_minutes", DEFAULT_MAX_RUN_MINUTES)) * 60
+
+
+def page_budget(
+    config: Dict,
+    read_15_used: int = 0,
+    read_day_used: int = 0,
+    overall_15_used: int = 0,
+    overall_day_used: int = 0,
+    seconds_left: Optional[float] = None,
+    reserved: int = 0,
+) -> int:
+    """Backfill pages one run can fetch without hitting a daily limit or
+    outliving the job.
+
+    The run can use what is left of the current 15-minute window plus one
+    full window per 15 minutes of remaining run time, capped by what is
+    left of the daily read and overall budgets. The minimum request
+    interval also caps how many requests fit in a window.
+    """
+    buffer = _rate_value(config, "safety_buffer", 2)
+    min_interval = float((config.get("rate_limits", {}) or {}).get("min_interval_seconds", 10))
+    paced = int(WINDOW_SECONDS // min_interval) if min_interval > 0 else None
+    read_15 = _rate_value(config, "read_15_min", 100) - buffer
+    overall_15 = _rate_value(config, "overall_15_min", 200) - buffer
+    if paced is not None:
+        read_15 = min(read_15, paced)
+        overall_15 = min(overall_15, paced)
+    seconds_left = max_run_seconds(config) if seconds_left is None else seconds_left
+    full_windows = max(0, int(seconds_left // WINDOW_SECONDS))
+
+    window_reads = max(0, read_15 - read_15_used) + full_windows * read_15
+    window_overall = max(0, overall_15 - overall_15_used) + full_windows * overall_15
+    daily_reads = _rate_value(config, "read_daily", 1000) - buffer - read_day_used
+    daily_overall = _rate_value(config, "overall_daily", 2000) - buffer - overall_day_used
+    return max(0, min(window_reads, window_overall, daily_reads, daily_overall) - reserved)
+
+
+def _activities_per_day(items: List[Dict]) -> float:
+    dates = sorted(item["date"] for item in items if item.get("date"))
+    if len(dates) < 2:
+        return DEFAULT_ACTIVITIES_PER_DAY
+    span = (datetime.fromisoformat(dates[-1]) - datetime.fromisoformat(dates[0])).days + 1
+    return len(dates) / max(span, 1)
+
+
+def plan_backfill(
+    config: Dict,
+    state: Dict,
+    after: int,
+    oldest_ts: Optional[int],
+    items: List[Dict],
+    now: Optional[int] = None,
+) -> Dict:
+    """Estimate remaining pages, reads and scheduled runs for the backfill.
+
+    `oldest_ts` is the start of the oldest activity after the history
+    boundary (from a one-activity probe); the span between it and the
+    cursor is converted to activities with the density of the history
+    synced so far.
+    """
+    now = int(time.time()) if now is None else now
+    sync_cfg = config.get("sync", {}) or {}
+    per_page = int(sync_cfg.get("per_page", STRAVA_MAX_PER_PAGE))
+    runs_per_day = int(sync_cfg.get("runs_per_day", DEFAULT_RUNS_PER_DAY))
+    budget = page_budget(config, reserved=RESERVED_READS)
+
+    cursor = state.get("next_before") if state.get("after") == after else None
+    cursor = int(cursor) if cursor is not None else now
+    completed = bool(state.get("completed")) and state.get("after") == after
+    density = _activities_per_day(items)
+
+    if completed or oldest_ts is None or oldest_ts >= cursor:
+        remaining_activities = 0
+    else:
+        remaining_activities = int(math.ceil(density * (cursor - oldest_ts) / 86400))
+
+    def pages_for(page_size: int) -> int:
+        # The final empty page confirms the backfill reached the boundary.
+        return 0 if completed else int(math.ceil(remaining_activities / page_size)) + 1
+
+    def runs_for(pages: int) -> Optional[int]:
+        if not pages:
+            return 0
+        return int(math.ceil(pages / budget)) if budget else None
+
+    pages = pages_for(per_page)
+    runs = runs_for(pages)
+    plan = {
+        "completed": completed,
+        "cursor_utc": datetime.fromtimestamp(cursor, tz=timezone.utc).isoformat(),
+        "oldest_activity_utc": (
+            datetime.fromtimestamp(oldest_ts, tz=timezone.utc).isoformat() if oldest_ts is not None else None
+        ),
+        "activities_per_day": round(density, 3),
+        "remaining_activities": remaining_activities,
+        "per_page": per_page,
+        "remaining_pages": pages,
+        "remaining_reads": pages,
+        "pages_per_run": budget,
+        "windows_per_run": int(max_run_seconds(config) // WINDOW_SECONDS) + 1,
+        "remaining_runs": runs,
+    }
+    if runs:
+        finish = utc_now() + timedelta(days=(runs - 1) / max(runs_per_day, 1))
+        plan["estimated_completion_utc"] = finish.date().isoformat()
+    if per_page < STRAVA_MAX_PER_PAGE and not completed:
+        plan["runs_at_max_per_page"] = runs_for(pages_for(STRAVA_MAX_PER_PAGE))
+    return plan
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Estimate the remaining Strava history backfill")
+    parser.add_argument(
+        "--no-probe",
+        action="store_true",
+        help="Skip the one-read probe for the oldest activity and assume history reaches the start boundary.",
+    )
+    args = parser.parse_args()
+
+    # Imported here so the planner shares the sync module's request path.
+    from sync_strava import activity_start_ts, build_limiter, fetch_page, get_access_token, start_after_ts
+
+    config = load_config()
+    state = read_json(STATE_PATH) if os.path.exists(STATE_PATH) else {}
+    items = read_json(NORMALIZED_PATH) if os.path.exists(NORMALIZED_PATH) else []
+    after = start_after_ts(config)
+
+    oldest_ts: Optional[int] = after or STRAVA_LAUNCH_TS
+    if not args.no_probe and not state.get("completed"):
+        limiter = build_limiter(config)
+        token = get_access_token(config, limiter)
+        # With only `after`, Strava lists activities oldest first.
+        oldest = fetch_page(token, 1, 1, after, None, limiter)
+        oldest_ts = activity_start_ts(oldest[0]) if oldest else None
+
+    print(json.dumps(plan_backfill(config, state, after, oldest_ts, items), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
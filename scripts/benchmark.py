@@ -0,0 +1,331 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+import aggregate as aggregate_module
+import generate_heatmaps
+import normalize as normalize_module
+from training_load import training_load, write_training_load
+from utils import ensure_dir, read_json, utc_now, write_json
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+STATIC_FILES = ("config.yaml", "README.md", os.path.join("site", "index.html"))
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = ("1k", "10k", "100k")
+DEFAULT_SEED = 42
+DEFAULT_REPEATS = 3
+MAX_YEARS = 20
+# A stage regresses when its median time is this much slower than the
+# baseline and the difference is large enough not to be timer noise.
+TIME_TOLERANCE = 0.25
+MIN_TIME_DELTA_SECONDS = 0.1
+# Keep non-featured types apart instead of folding them into a few smart
+# groups, so per-type work scales with the synthetic type mix.
+BENCH_CONFIG = {"activities": {"group_other_types": False}}
+OUTPUT_PATHS = ("data", "heatmaps", "site")
+# Outputs depend on the weekday layout of the generated years, so allow a
+# little drift before flagging growth.
+SIZE_TOLERANCE = 0.02
+
+# (Strava type, relative frequency, typical distance in m, speed in m/s,
+# elevation gain per km). Speed 0 means a stationary activity timed only.
+ACTIVITY_PROFILES = (
+    ("Run", 30, 8_000, 2.9, 12),
+    ("TrailRun", 5, 14_000, 2.3, 45),
+    ("VirtualRun", 2, 6_000, 2.8, 0),
+    ("Ride", 18, 40_000, 7.5, 10),
+    ("VirtualRide", 6, 30_000, 8.5, 8),
+    ("GravelRide", 3, 55_000, 6.5, 14),
+    ("MountainBikeRide", 2, 25_000, 4.5, 35),
+    ("EBikeRide", 1, 20_000, 6.0, 12),
+    ("Walk", 10, 4_000, 1.4, 6),
+    ("Hike", 4, 12_000, 1.1, 60),
+    ("Swim", 5, 2_000, 0.8, 0),
+    ("WeightTraining", 8, 0, 0, 0),
+    ("Yoga", 4, 0, 0, 0),
+    ("Workout", 3, 0, 0, 0),
+    ("Rowing", 2, 8_000, 3.2, 0),
+    ("AlpineSki", 1, 25_000, 6.0, 0),
+    ("NordicSki", 1, 15_000, 3.5, 15),
+    ("Kayaking", 1, 10_000, 1.8, 0),
+    ("RockClimbing", 1, 0, 0, 0),
+    ("StandUpPaddling", 1, 6_000, 1.5, 0),
+    ("Elliptical", 1, 0, 0, 0),
+    ("IceSkate", 1, 8_000, 4.0, 0),
+    ("Golf", 1, 7_000, 1.0, 20),
+    ("Soccer", 1, 0, 0, 0),
+)
+# Start hours weighted towards mornings and evenings.
+HOUR_WEIGHTS = (0, 0, 0, 0, 1, 3, 8, 9, 6, 4, 3, 3, 5, 3, 2, 3, 4, 7, 9, 6, 3, 2, 1, 0)
+
+
+def synthetic_history(count: int, seed: int = DEFAULT_SEED, end_year: Optional[int] = None) -> List[Dict]:
+    """Seeded list of Strava-like summary activities ending on Dec 31 of
+    `end_year` (default: last year), spread over up to MAX_YEARS years."""
+    rng = random.Random(seed)
+    end_year = end_year or utc_now().year - 1
+    years = min(MAX_YEARS, max(2, math.ceil(count / 1_000)))
+    start = datetime(end_year - years + 1, 1, 1)
+    span_days = (datetime(end_year, 12, 31) - start).days + 1
+
+    profiles = list(ACTIVITY_PROFILES)
+    type_weights = [profile[1] for profile in profiles]
+    hours = list(range(24))
+    activities = []
+    for index in range(count):
+        activity_type, _, distance, speed, climb = rng.choices(profiles, weights=type_weights)[0]
+        started = start + timedelta(
+            days=rng.randrange(span_days),
+            hours=rng.choices(hours, weights=HOUR_WEIGHTS)[0],
+            minutes=rng.randrange(60),
+            seconds=rng.randrange(60),
+        )
+        if speed:
+            meters = max(200.0, rng.lognormvariate(math.log(distance), 0.45))
+            moving_time = meters / (speed * rng.uniform(0.85, 1.15))
+        else:
+            meters = 0.0
+            moving_time = rng.uniform(1_200, 5_400)
+        activities.append(
+            {
+                "id": 10_000_000_000 + index,
+                "name": f"{activity_type} {index}",
+                "type": activity_type,
+                "sport_type": activity_type,
+                "start_date": started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "start_date_local": started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "distance": round(meters, 1),
+                "moving_time": int(moving_time),
+                "elapsed_time": int(moving_time * rng.uniform(1.0, 1.3)),
+                "total_elevation_gain": round(meters / 1_000 * climb * rng.uniform(0.5, 1.5), 1),
+            }
+        )
+    return activities
+
+
+def _copy_static(workdir: str) -> None:
+    for rel in STATIC_FILES:
+        target = os.path.join(workdir, rel)
+        ensure_dir(os.path.dirname(target) or workdir)
+        shutil.copyfile(os.path.join(REPO_ROOT, rel), target)
+    with open(os.path.join(workdir, "config.local.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(BENCH_CONFIG, f)
+
+
+def _reset_outputs(workdir: str) -> None:
+    """Remove everything a previous repeat wrote, and the in-process
+    memos of generate, so each repeat starts cold."""
+    for rel in OUTPUT_PATHS:
+        shutil.rmtree(os.path.join(workdir, rel), ignore_errors=True)
+    _copy_static(workdir)
+    for fn in vars(generate_heatmaps).values():
+        if hasattr(fn, "cache_clear"):
+            fn.cache_clear()
+
+
+def _prepare_workdir(workdir: str, activities: List[Dict]) -> None:
+    _copy_static(workdir)
+    raw_dir = os.path.join(workdir, normalize_module.RAW_DIR)
+    ensure_dir(raw_dir)
+    for activity in activities:
+        with open(os.path.join(raw_dir, f"{activity['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump(activity, f)
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _tree_size(path: str, suffix: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            if filename.endswith(suffix):
+                total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+
+def _timed_wrapper(fn: Callable, totals: Dict[str, float], key: str) -> Callable:
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            totals[key] = totals.get(key, 0.0) + time.perf_counter() - started
+
+    return wrapper
+
+
+def _run_stages() -> Dict[str, float]:
+    """Run normalize through generate in the current directory, timing each
+    stage; SVG rendering and site data are also timed inside generate()."""
+    seconds: Dict[str, float] = {}
+
+    def stage(name: str, fn: Callable) -> None:
+        started = time.perf_counter()
+        fn()
+        seconds[name] = time.perf_counter() - started
+
+    ensure_dir("data")
+    stage("normalize", lambda: write_json(normalize_module.OUT_PATH, normalize_module.normalize()))
+    stage("aggregate", lambda: write_json(aggregate_module.OUT_PATH, aggregate_module.aggregate()))
+    stage("training_load", lambda: write_training_load(training_load()))
+
+    inner: Dict[str, float] = {}
+    originals = {name: getattr(generate_heatmaps, name) for name in ("_svg_for_year", "_write_site_data")}
+    try:
+        for name, fn in originals.items():
+            setattr(generate_heatmaps, name, _timed_wrapper(fn, inner, name.lstrip("_")))
+        stage("generate", generate_heatmaps.generate)
+    finally:
+        for name, fn in originals.items():
+            setattr(generate_heatmaps, name, fn)
+    seconds.update(inner)
+    return seconds
+
+
+def run_benchmark(label: str, count: int, seed: int, repeats: int = DEFAULT_REPEATS, keep: bool = False) -> Dict:
+    """Run every stage `repeats` times on one synthetic history and report
+    the median time of each."""
+    activities = synthetic_history(count, seed)
+    workdir = tempfile.mkdtemp(prefix=f"git-sweaty-bench-{label}-")
+    cwd = os.getcwd()
+    try:
+        _prepare_workdir(workdir, activities)
+        del activities
+        os.chdir(workdir)
+        runs: List[Dict[str, float]] = []
+        for _ in range(max(1, repeats)):
+            _reset_outputs(workdir)
+            runs.append(_run_stages())
+        seconds = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+        aggregates = read_json(aggregate_module.OUT_PATH).get("years", {})
+        result = {
+            "activities": count,
+            "years": len(aggregates),
+            "types": len({activity_type for year in aggregates.values() for activity_type in year}),
+            "seconds": {name: round(value, 4) for name, value in seconds.items()},
+            "bytes": {
+                "normalized_json": _file_size(normalize_module.OUT_PATH),
+                "aggregates_json": _file_size(aggregate_module.OUT_PATH),
+                "svg": _tree_size("heatmaps", ".svg"),
+                "site_data_json": _file_size(generate_heatmaps.SITE_DATA_PATH),
+                "site_shards": _tree_size(generate_heatmaps.SITE_SHARDS_DIR, ".json"),
+            },
+        }
+    finally:
+        os.chdir(cwd)
+        if keep:
+            print(f"Kept {label} working directory: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for label, result in results.items():
+        previous = baseline.get(label)
+        if not previous:
+            continue
+        for name, value in result["seconds"].items():
+            before = previous.get("seconds", {}).get(name)
+            if before is None:
+                continue
+            if value > before * (1 + TIME_TOLERANCE) and value - before > MIN_TIME_DELTA_SECONDS:
+                regressions.append(f"{label} {name}: {before:.3f}s -> {value:.3f}s")
+        for name, value in result["bytes"].items():
+            before = previous.get("bytes", {}).get(name)
+            if before and value > before * (1 + SIZE_TOLERANCE):
+                regressions.append(f"{label} {name}: {before} -> {value} bytes")
+    return regressions
+
+
+def _print_result(label: str, result: Dict) -> None:
+    stages = ", ".join(f"{name} {value:.3f}s" for name, value in result["seconds"].items())
+    sizes = ", ".join(f"{name} {value / 1024:.0f} KiB" for name, value in result["bytes"].items())
+    print(f"{label}: {result['activities']} activities, {result['years']} years, {result['types']} types")
+    print(f"  {stages}")
+    print(f"  {sizes}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic activity histories")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(DEFAULT_SIZES),
+        help=f"Comma-separated history sizes from {', '.join(SIZES)} (default: %(default)s).",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--repeats", type=int, default=DEFAULT_REPEATS, help="Runs per size; the median time is reported."
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--output", default=None, help="Also write results JSON to this path.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary working directories.")
+    args = parser.parse_args()
+
+    labels = [label.strip().lower() for label in args.sizes.split(",") if label.strip()]
+    unknown = [label for label in labels if label not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results: Dict[str, Dict] = {}
+    for label in labels:
+        results[label] = run_benchmark(label, SIZES[label], args.seed, repeats=args.repeats, keep=args.keep)
+        _print_result(label, results[label])
+
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.output:
+        write_json(args.output, payload)
+
+    baseline_path = os.path.abspath(args.baseline)
+    if args.update_baseline:
+        stored = read_json(baseline_path) if os.path.exists(baseline_path) else {"results": {}}
+        stored.update({key: value for key, value in payload.items() if key != "results"})
+        stored.setdefault("results", {}).update(results)
+        ensure_dir(os.path.dirname(baseline_path))
+        write_json(baseline_path, stored)
+        print(f"Updated {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print("No baseline to compare against (run with --update-baseline)")
+        return 0
+    baseline = read_json(baseline_path)
+    if baseline.get("seed") != args.seed:
+        print(f"Baseline was recorded with seed {baseline.get('seed')}; skipping comparison")
+        return 0
+    regressions = compare(results, baseline.get("results", {}))
+    if regressions:
+        print("Regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
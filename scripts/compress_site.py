@@ -0,0 +1,144 @@
+import argparse
+import gzip
+import io
+import os
+from typing import Dict, List
+
+from utils import load_config, read_json, remove_path, sha256_file, write_bytes, write_json
+
+# brotli is optional (only .gz siblings are written without it) and is
+# imported on first use.
+brotli = None
+
+SITE_DIR = "site"
+MANIFEST_PATH = os.path.join(SITE_DIR, "asset-manifest.json")
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".json", ".svg", ".css")
+MIN_SIZE_BYTES = 512
+
+
+def _gzip_bytes(data: bytes) -> bytes:
+    # Fixed mtime and no embedded filename keep the output byte-for-byte stable.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename="", mode="wb", compresslevel=9, fileobj=buffer, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def _site_assets() -> List[str]:
+    assets: List[str] = []
+    for root, _, filenames in os.walk(SITE_DIR):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            rel = os.path.relpath(path, SITE_DIR).replace(os.sep, "/")
+            if rel == os.path.basename(MANIFEST_PATH):
+                continue
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            assets.append(rel)
+    return sorted(assets)
+
+
+def _load_manifest() -> Dict:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    try:
+        payload = read_json(MANIFEST_PATH)
+    except Exception:
+        return {}
+    files = payload.get("files") if isinstance(payload, dict) else None
+    return files if isinstance(files, dict) else {}
+
+
+def _load_brotli() -> bool:
+    global brotli
+    if brotli is None:
+        try:
+            import brotli as module
+        except ImportError:
+            return False
+        brotli = module
+    return True
+
+
+def compress_site() -> Dict[str, int]:
+    """Write deterministic .gz/.br siblings for changed site assets.
+
+    Returns counts of compressed, unchanged and removed assets.
+    """
+    have_brotli = _load_brotli()
+    previous = _load_manifest()
+    files: Dict[str, Dict] = {}
+    compressed = 0
+    unchanged = 0
+
+    for rel in _site_assets():
+        path = os.path.join(SITE_DIR, rel)
+        digest = sha256_file(path)
+        size = os.path.getsize(path)
+        entry = {"sha256": digest, "size": size, "encodings": []}
+        if size < MIN_SIZE_BYTES:
+            files[rel] = entry
+            continue
+
+        encodings = ["gzip"] + (["br"] if have_brotli else [])
+        entry["encodings"] = encodings
+        siblings = [f"{path}.gz"] + ([f"{path}.br"] if have_brotli else [])
+        prior = previous.get(rel) or {}
+        if (
+            prior.get("sha256") == digest
+            and prior.get("encodings") == encodings
+            and all(os.path.exists(sibling) for sibling in siblings)
+        ):
+            files[rel] = prior
+            unchanged += 1
+            continue
+
+        with open(path, "rb") as f:
+            data = f.read()
+        gz = _gzip_bytes(data)
+        write_bytes(f"{path}.gz", gz)
+        entry["gzip_size"] = len(gz)
+        if have_brotli:
+            br = brotli.compress(data, quality=11)
+            write_bytes(f"{path}.br", br)
+            entry["br_size"] = len(br)
+        files[rel] = entry
+        compressed += 1
+
+    removed = 0
+    for root, _, filenames in os.walk(SITE_DIR):
+        for filename in filenames:
+            if not filename.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, filename)
+            source_rel = os.path.relpath(path[:-3], SITE_DIR).replace(os.sep, "/")
+            encoding = "gzip" if filename.endswith(".gz") else "br"
+            if encoding not in (files.get(source_rel) or {}).get("encodings", []):
+                remove_path(path)
+                removed += 1
+
+    write_json(MANIFEST_PATH, {"files": files})
+    return {"compressed": compressed, "unchanged": unchanged, "removed": removed}
+
+
+def precompress_enabled(config: Dict) -> bool:
+    return bool((config.get("site", {}) or {}).get("precompress", True))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Precompress site assets (.gz/.br) and write a hash manifest")
+    args = parser.parse_args()
+
+    if not precompress_enabled(load_config()):
+        print("Site precompression disabled (site.precompress: false)")
+        return 0
+    result = compress_site()
+    print(
+        f"Precompressed {result['compressed']} assets "
+        f"({result['unchanged']} unchanged, {result['removed']} stale removed)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
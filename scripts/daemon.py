@@ -0,0 +1,280 @@
+import argparse
+import hashlib
+import json
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from activity_store import update_store
+from aggregate import OUT_PATH as AGG_PATH
+from aggregate import aggregate_items
+from compress_site import compress_site, precompress_enabled
+from generate_heatmaps import generate as generate_heatmaps
+from normalize import DELETED_PATH, OUT_PATH as NORMALIZED_PATH, RAW_DIR
+from hydrate import DETAILS_PATH, load_details
+from normalize import finalize_items, keep_details, normalize_raw_activity, type_settings
+from render_preview import render_preview
+from route_heatmap import update_route_tiles
+from sync_strava import RateLimiter, build_limiter, sync_events, sync_strava
+from training_load import training_load, write_training_load
+from utils import CONFIG_LOCAL_PATH, CONFIG_PATH, ensure_dir, load_config, read_json, utc_now, write_json
+from webhook import CLAIMED_PATH, QUEUE_PATH, serve, webhook_config
+
+DEFAULT_INTERVAL_MINUTES = 60
+DEFAULT_EVENT_POLL_SECONDS = 15
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _events_waiting() -> bool:
+    if os.path.exists(CLAIMED_PATH):
+        return True
+    try:
+        return os.path.getsize(QUEUE_PATH) > 0
+    except OSError:
+        return False
+
+
+class Daemon:
+    """Keeps config, limiter, normalized items and aggregates warm between
+    cycles and only rewrites artifacts whose content changed."""
+
+    def __init__(self, interval_minutes: float, event_poll_seconds: float) -> None:
+        self.interval_seconds = interval_minutes * 60
+        self.event_poll_seconds = event_poll_seconds
+        self.stop = threading.Event()
+        self.config: Dict = {}
+        self.config_stamp: Tuple = ()
+        self.limiter: Optional[RateLimiter] = None
+        self.settings: Dict = {}
+        self.items: Dict[str, Dict] = {}
+        self.raw_seen: Dict[str, int] = {}
+        self.deleted_stamp: Optional[int] = None
+        self.deleted_ids: Set[str] = set()
+        self.details_stamp: Optional[int] = None
+        self.details: Dict[str, Dict] = {}
+        self.years: Dict = {}
+        self.flushed: Dict[str, str] = {}
+
+    def _reload_config(self) -> bool:
+        stamp = (_mtime(CONFIG_PATH), _mtime(CONFIG_LOCAL_PATH))
+        if stamp == self.config_stamp:
+            return False
+        previous_limits = self.config.get("rate_limits")
+        self.config = load_config()
+        self.config_stamp = stamp
+        self.settings = type_settings(self.config)
+        if self.limiter is None or self.config.get("rate_limits") != previous_limits:
+            self.limiter = build_limiter(self.config)
+        return True
+
+    def _load_state(self) -> None:
+        items = read_json(NORMALIZED_PATH) if os.path.exists(NORMALIZED_PATH) else []
+        self.items = {str(item["id"]): item for item in items or [] if item.get("id") is not None}
+        self.years = aggregate_items(self._normalized(), self.config)
+        self.flushed[NORMALIZED_PATH] = _digest(self._normalized())
+        self.flushed[AGG_PATH] = _digest(self.years)
+
+    def _forget_state(self) -> None:
+        """Drop everything held for the previous athlete after sync reset
+        the persisted data, so the next scan starts from the new raw files."""
+        self.items = {}
+        self.raw_seen = {}
+        self.deleted_stamp = None
+        self.deleted_ids = set()
+        self.details_stamp = None
+        self.details = {}
+        self.years = {}
+        self.flushed = {}
+
+    def _normalized(self) -> List[Dict]:
+        return finalize_items(self.items, self.settings, self.deleted_ids, self.details)
+
+    def _apply_raw_changes(self) -> Set[Tuple[str, str]]:
+        """Normalize only raw files that are new or modified; returns the
+        (year, date) keys whose aggregates need rebuilding."""
+        touched: Set[Tuple[str, str]] = set()
+
+        def touch(item: Optional[Dict]) -> None:
+            if item and item.get("date"):
+                touched.add((str(item.get("year")), item["date"]))
+
+        stamp = _mtime(DELETED_PATH)
+        if stamp != self.deleted_stamp:
+            self.deleted_stamp = stamp
+            deleted = read_json(DELETED_PATH) if stamp is not None else []
+            self.deleted_ids = {str(activity_id) for activity_id in deleted or []}
+            for activity_id in self.deleted_ids:
+                touch(self.items.pop(activity_id, None))
+
+        stamp = _mtime(DETAILS_PATH)
+        if stamp != self.details_stamp:
+            self.details_stamp = stamp
+            self.details = load_details()
+            for activity_id, fields in self.details.items():
+                item = self.items.get(activity_id)
+                if item and item.get("details") != fields:
+                    touch(item)
+
+        if not os.path.exists(RAW_DIR):
+            return touched
+        for entry in os.scandir(RAW_DIR):
+            if not entry.name.endswith(".json"):
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if self.raw_seen.get(entry.name) == mtime:
+                continue
+            self.raw_seen[entry.name] = mtime
+            normalized = normalize_raw_activity(read_json(entry.path), self.settings)
+            if not normalized or str(normalized["id"]) in self.deleted_ids:
+                continue
+            activity_id = str(normalized["id"])
+            previous = self.items.get(activity_id)
+            keep_details(normalized, previous)
+            if previous == normalized:
+                continue
+            touch(previous)
+            touch(normalized)
+            self.items[activity_id] = normalized
+        return touched
+
+    def _patch_aggregates(self, touched: Set[Tuple[str, str]]) -> None:
+        dates = {date for _, date in touched}
+        for year, date in touched:
+            for entries in (self.years.get(year) or {}).values():
+                entries.pop(date, None)
+        patch = aggregate_items(
+            [item for item in self._normalized() if item.get("date") in dates],
+            self.config,
+        )
+        for year, types in patch.items():
+            for activity_type, entries in types.items():
+                self.years.setdefault(year, {}).setdefault(activity_type, {}).update(entries)
+        for year in list(self.years):
+            for activity_type in list(self.years[year]):
+                if not self.years[year][activity_type]:
+                    del self.years[year][activity_type]
+            if not self.years[year]:
+                del self.years[year]
+
+    def _flush(self, path: str, payload, content) -> bool:
+        digest = _digest(content)
+        if self.flushed.get(path) == digest:
+            return False
+        ensure_dir(os.path.dirname(path))
+        write_json(path, payload)
+        self.flushed[path] = digest
+        return True
+
+    def cycle(self, from_events: bool) -> Dict:
+        config_changed = self._reload_config()
+        if config_changed and self.items:
+            # Type grouping or filters may have changed: rebuild from memory.
+            self.years = aggregate_items(self._normalized(), self.config)
+        first_cycle = not self.flushed
+        if first_cycle:
+            self._load_state()
+
+        if from_events:
+            sync_summary = sync_events(False, config=self.config, limiter=self.limiter)
+        else:
+            prune_deleted = bool(self.config.get("sync", {}).get("prune_deleted", False))
+            sync_summary = sync_strava(False, prune_deleted, config=self.config, limiter=self.limiter)
+            if sync_summary.get("athlete_reset"):
+                # New credentials from a reloaded config: the files were
+                # wiped, so the in-memory history must not be flushed back.
+                self._forget_state()
+                first_cycle = True
+
+        touched = self._apply_raw_changes()
+        if touched:
+            self._patch_aggregates(touched)
+
+        items = self._normalized()
+        normalized_changed = self._flush(NORMALIZED_PATH, items, items)
+        if normalized_changed or config_changed:
+            update_store(self.config, items)
+        aggregates_changed = self._flush(
+            AGG_PATH,
+            {"years": self.years},
+            self.years,
+        ) or config_changed or first_cycle
+
+        routes = update_route_tiles() if normalized_changed else None
+        if aggregates_changed:
+            write_training_load(training_load())
+        if aggregates_changed or (routes and routes.get("rendered")):
+            generate_heatmaps()
+            render_preview()
+            if precompress_enabled(self.config):
+                compress_site()
+        return {
+            "mode": "events" if from_events else "poll",
+            "sync": sync_summary,
+            "changed_dates": len(touched),
+            "normalized_written": normalized_changed,
+            "artifacts_regenerated": bool(aggregates_changed),
+        }
+
+    def run(self, once: bool = False) -> None:
+        next_poll = 0.0
+        while not self.stop.is_set():
+            now = time.time()
+            due = now >= next_poll
+            if due or _events_waiting():
+                try:
+                    summary = self.cycle(from_events=not due)
+                    print(f"[{utc_now().isoformat()}] {json.dumps(summary, default=str)}", flush=True)
+                except Exception as exc:
+                    print(f"[{utc_now().isoformat()}] cycle failed: {exc}", flush=True)
+                if due:
+                    next_poll = now + self.interval_seconds
+                if once:
+                    return
+            self.stop.wait(self.event_poll_seconds)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run sync and site generation as a long-lived process")
+    parser.add_argument("--interval-minutes", type=float, default=None, help="Polling sync interval.")
+    parser.add_argument("--event-poll-seconds", type=float, default=None, help="How often to check for queued events.")
+    parser.add_argument("--serve-webhook", action="store_true", help="Also run the webhook receiver in-process.")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit.")
+    args = parser.parse_args()
+
+    config = load_config()
+    daemon_cfg = config.get("daemon", {}) or {}
+    daemon = Daemon(
+        interval_minutes=args.interval_minutes or float(daemon_cfg.get("interval_minutes", DEFAULT_INTERVAL_MINUTES)),
+        event_poll_seconds=args.event_poll_seconds or float(
+            daemon_cfg.get("event_poll_seconds", DEFAULT_EVENT_POLL_SECONDS)
+        ),
+    )
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop.set())
+    signal.signal(signal.SIGINT, lambda *_: daemon.stop.set())
+
+    if args.serve_webhook:
+        cfg = webhook_config(config)
+        threading.Thread(
+            target=serve,
+            args=(cfg["host"], cfg["port"], cfg["verify_token"], cfg["subscription_id"]),
+            daemon=True,
+        ).start()
+
+    daemon.run(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
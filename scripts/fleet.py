@@ -0,0 +1,291 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from sync_strava import RateLimiter, RateLimitExceeded
+from utils import CONFIG_LOCAL_PATH, _deep_merge, ensure_dir, load_config
+
+ADDRESS_ENV = "GIT_SWEATY_FLEET_ADDRESS"
+AUTHKEY_ENV = "GIT_SWEATY_FLEET_AUTHKEY"
+ATHLETE_ENV = "GIT_SWEATY_FLEET_ATHLETE"
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIPELINE_SCRIPT = os.path.join(REPO_ROOT, "scripts", "run_pipeline.py")
+SITE_STATIC_FILES = ("index.html", "app.js")
+DEFAULT_OUTPUT_DIR = "fleet"
+WAIT_POLL_SECONDS = 5.0
+# An athlete that asked for a request this recently still competes for the
+# budget even while its previous request is in flight.
+CONTENTION_SECONDS = 60.0
+
+
+class FleetScheduler:
+    """One application-level Strava budget shared by every athlete.
+
+    Requests are granted in the parent process; athletes syncing recent
+    activity go before athletes backfilling, and while other athletes are
+    competing no athlete may use more than its share of the current
+    15-minute window.
+    """
+
+    def __init__(self, rate_cfg: Dict, athletes: List[str]) -> None:
+        self._cond = threading.Condition()
+        self._window = RateLimiter(
+            overall_15_limit=int(rate_cfg.get("overall_15_min", 200)),
+            overall_day_limit=int(rate_cfg.get("overall_daily", 2000)),
+            read_15_limit=int(rate_cfg.get("read_15_min", 100)),
+            read_day_limit=int(rate_cfg.get("read_daily", 1000)),
+            safety_buffer=int(rate_cfg.get("safety_buffer", 2)),
+            min_interval_seconds=float(rate_cfg.get("min_interval_seconds", 10)),
+        )
+        self._active = set(athletes)
+        self._waiting: Dict[str, str] = {}
+        self._phase: Dict[str, str] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._window_used: Dict[str, int] = {}
+        self._window_start = self._window.window_start
+        self._last_grant: Dict[str, float] = {}
+        self._granted: Dict[str, int] = {name: 0 for name in athletes}
+
+    def _delay(self, athlete: str, kind: str, phase: str) -> float:
+        window = self._window
+        window._reset_if_needed()
+        if window.window_start != self._window_start:
+            self._window_start = window.window_start
+            self._window_used = {}
+        now = time.time()
+
+        if window.overall_day >= window.overall_day_limit - window.safety_buffer:
+            raise RateLimitExceeded("Overall daily limit reached; try again after UTC midnight.")
+        if kind == "read" and window.read_day >= window.read_day_limit - window.safety_buffer:
+            raise RateLimitExceeded("Read daily limit reached; try again after UTC midnight.")
+
+        last = self._last_grant.get(athlete)
+        if last is not None and now - last < window.min_interval_seconds:
+            return window.min_interval_seconds - (now - last)
+
+        window_left = 900 - (now - window.window_start)
+        if window.overall_15 >= window.overall_15_limit - window.safety_buffer:
+            return window_left
+        if kind == "read" and window.read_15 >= window.read_15_limit - window.safety_buffer:
+            return window_left
+
+        competing = [
+            name
+            for name in self._active
+            if name != athlete
+            and (name in self._waiting or now - self._last_seen.get(name, 0.0) < CONTENTION_SECONDS)
+        ]
+        if phase == "backfill" and any(self._phase.get(name) == "recent" for name in competing):
+            return WAIT_POLL_SECONDS
+        limit = window.read_15_limit if kind == "read" else window.overall_15_limit
+        share = max(1, (limit - window.safety_buffer) // (len(competing) + 1))
+        if competing and self._window_used.get(athlete, 0) >= share:
+            return WAIT_POLL_SECONDS
+        return 0.0
+
+    def acquire(self, athlete: str, kind: str, phase: str) -> None:
+        with self._cond:
+            self._waiting[athlete] = phase
+            self._phase[athlete] = phase
+            self._last_seen[athlete] = time.time()
+            try:
+                while True:
+                    delay = self._delay(athlete, kind, phase)
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=min(delay, WAIT_POLL_SECONDS))
+                self._window.record_request(kind)
+                self._window_used[athlete] = self._window_used.get(athlete, 0) + 1
+                self._granted[athlete] = self._granted.get(athlete, 0) + 1
+                self._last_grant[athlete] = self._last_seen[athlete] = time.time()
+            finally:
+                self._waiting.pop(athlete, None)
+                self._cond.notify_all()
+
+    def apply_headers(self, headers: Dict[str, str]) -> None:
+        # Strava reports application-wide usage, so any athlete's response
+        # updates the shared counters.
+        with self._cond:
+            self._window.apply_headers(headers)
+            self._cond.notify_all()
+
+    def finish(self, athlete: str) -> None:
+        with self._cond:
+            self._active.discard(athlete)
+            self._cond.notify_all()
+
+    def granted(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._granted)
+
+
+class FleetRateLimiter(RateLimiter):
+    """RateLimiter used inside an athlete's pipeline that defers every
+    decision to the fleet scheduler in the parent process."""
+
+    def __init__(self, scheduler, athlete: str) -> None:
+        super().__init__(0, 0, 0, 0, 0, 0)
+        self.scheduler = scheduler
+        self.athlete = athlete
+
+    def before_request(self, kind: str) -> None:
+        started = time.time()
+        self.scheduler.acquire(self.athlete, kind, self.phase)
+        self.metrics.observe_sleep("fleet_scheduler", time.time() - started)
+
+    def reserve(self, kind: str) -> Tuple[float, str]:
+        # The scheduler paces and counts the grant itself; there is no local
+        # slot to hand out, so wait for the grant here.
+        self.before_request(kind)
+        return 0.0, ""
+
+    def record_request(self, kind: str) -> None:
+        # Counted when the scheduler granted the request.
+        self.last_request_at = time.time()
+
+    def apply_headers(self, headers: Dict[str, str]) -> None:
+        self.scheduler.apply_headers(dict(headers))
+        # Local copy only feeds the headroom metrics; pacing stays with the
+        # scheduler.
+        super().apply_headers(headers)
+
+
+class _FleetManager(BaseManager):
+    pass
+
+
+def fleet_limiter_from_env() -> Optional[FleetRateLimiter]:
+    """Connect to a running fleet scheduler when launched by run_fleet()."""
+    address = os.environ.get(ADDRESS_ENV)
+    if not address:
+        return None
+    host, port = address.rsplit(":", 1)
+    _FleetManager.register("scheduler")
+    manager = _FleetManager(address=(host, int(port)), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    manager.connect()
+    return FleetRateLimiter(manager.scheduler(), os.environ.get(ATHLETE_ENV, "athlete"))
+
+
+def _read_yaml(path: str, required: bool = False) -> Dict:
+    if not required and not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _prepare_athlete_dir(athlete: Dict, output_dir: str) -> str:
+    """Athlete working directory with the shared config, its overrides and
+    the static site files; outputs from earlier runs are left in place."""
+    athlete_dir = os.path.join(output_dir, athlete["name"])
+    ensure_dir(os.path.join(athlete_dir, "site"))
+    shutil.copyfile(os.path.join(REPO_ROOT, "config.yaml"), os.path.join(athlete_dir, "config.yaml"))
+
+    # Repo-local overrides (credentials, shared settings) apply to every
+    # athlete, then the athlete's own file, then its inline keys; nested
+    # sections merge key by key. The fleet section stays with the parent.
+    overrides = _read_yaml(os.path.join(REPO_ROOT, CONFIG_LOCAL_PATH))
+    overrides.pop("fleet", None)
+    config_path = athlete.get("config")
+    if config_path:
+        overrides = _deep_merge(overrides, _read_yaml(os.path.join(REPO_ROOT, config_path), required=True))
+    overrides = _deep_merge(
+        overrides, {key: value for key, value in athlete.items() if key not in ("name", "config")}
+    )
+    with open(os.path.join(athlete_dir, "config.local.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(overrides, f, sort_keys=True)
+
+    for filename in SITE_STATIC_FILES:
+        shutil.copyfile(os.path.join(REPO_ROOT, "site", filename), os.path.join(athlete_dir, "site", filename))
+    return athlete_dir
+
+
+def run_fleet(athletes: List[Dict], output_dir: str, rate_cfg: Dict, pipeline_args: List[str]) -> Dict[str, Dict]:
+    names = [athlete["name"] for athlete in athletes]
+    if len(set(names)) != len(names):
+        raise ValueError("Fleet athlete names must be unique")
+
+    scheduler = FleetScheduler(rate_cfg, names)
+    authkey = os.urandom(16)
+    _FleetManager.register("scheduler", callable=lambda: scheduler)
+    server = _FleetManager(address=("127.0.0.1", 0), authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.address
+
+    processes = {}
+    for athlete in athletes:
+        athlete_dir = _prepare_athlete_dir(athlete, output_dir)
+        env = dict(os.environ)
+        env.update({
+            ADDRESS_ENV: f"{host}:{port}",
+            AUTHKEY_ENV: authkey.hex(),
+            ATHLETE_ENV: athlete["name"],
+        })
+        processes[athlete["name"]] = subprocess.Popen(
+            [sys.executable, PIPELINE_SCRIPT, *pipeline_args],
+            cwd=athlete_dir,
+            env=env,
+        )
+
+    results: Dict[str, Dict] = {}
+    pending = dict(processes)
+    while pending:
+        for name, process in list(pending.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            scheduler.finish(name)
+            del pending[name]
+            results[name] = {"exit_code": code}
+        if pending:
+            time.sleep(0.5)
+
+    granted = scheduler.granted()
+    for name in names:
+        results[name]["requests"] = granted.get(name, 0)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sync several athletes under one shared Strava rate budget")
+    parser.add_argument("--only", action="append", default=[], help="Run only the named athlete(s).")
+    parser.add_argument("--skip-sync", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--prune-deleted", action="store_true")
+    args = parser.parse_args()
+
+    config = load_config()
+    fleet_cfg = config.get("fleet", {}) or {}
+    athletes = [athlete for athlete in fleet_cfg.get("athletes", []) or [] if athlete.get("name")]
+    if args.only:
+        athletes = [athlete for athlete in athletes if athlete["name"] in args.only]
+    if not athletes:
+        print("No fleet athletes configured (fleet.athletes)")
+        return 1
+
+    pipeline_args = [
+        flag
+        for flag, enabled in (
+            ("--skip-sync", args.skip_sync),
+            ("--dry-run", args.dry_run),
+            ("--prune-deleted", args.prune_deleted),
+        )
+        if enabled
+    ]
+    output_dir = os.path.abspath(str(fleet_cfg.get("output_dir", DEFAULT_OUTPUT_DIR)))
+    results = run_fleet(athletes, output_dir, config.get("rate_limits", {}) or {}, pipeline_args)
+    for name, result in results.items():
+        print(f"{name}: exit {result['exit_code']}, {result['requests']} API requests ({os.path.join(output_dir, name)})")
+    return 0 if all(result["exit_code"] == 0 for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
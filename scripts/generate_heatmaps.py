@@ -1,24 +1,40 @@
 import argparse
+import base64
+import hashlib
+import html
 import os
+import re
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Callable, Dict, List, Optional
 
-from activity_types import build_type_meta, featured_types_from_config, ordered_types
+from activity_store import read_items, readable_store
+from activity_types import build_type_meta, featured_types_from_config, ordered_types, type_accent
+from training_load import WINDOWS as TRAINING_LOAD_WINDOWS, window_totals
 from utils import (
     ensure_dir,
     format_distance,
     format_duration,
     format_elevation,
+    iter_json_array,
     load_config,
     read_json,
+    remove_path,
+    sha256_file,
     utc_now,
     write_json,
+    write_text,
 )
 
 AGG_PATH = os.path.join("data", "daily_aggregates.json")
+TRAINING_LOAD_PATH = os.path.join("data", "training_load.json")
+SYNC_SUMMARY_PATH = os.path.join("data", "last_sync_summary.json")
 ACTIVITIES_PATH = os.path.join("data", "activities_normalized.json")
 README_PATH = "README.md"
 SITE_DATA_PATH = os.path.join("site", "data.json")
+SITE_INDEX_PATH = os.path.join("site", "index.html")
+SITE_SHARDS_DIR = os.path.join("site", "shards")
+SITE_ROUTES_DIR = os.path.join("site", "routes")
 README_PREVIEW_IMAGE_PATH = os.path.join("site", "readme-preview.png")
 
 CELL = 12
@@ -33,6 +49,8 @@ GRID_PAD_BOTTOM = 6
 GRID_PAD_LEFT = 6
 
 DEFAULT_COLORS = ["#1f2937", "#1f2937", "#1f2937", "#1f2937", "#1f2937"]
+MULTI_TYPE_COLOR = "#b967ff"
+PRERENDER_YEARS = 3
 YEAR_LABEL_COLOR = "#e5e7eb"
 LABEL_COLOR = "#f1f5f9"
 BG_COLOR = "#0f172a"
@@ -117,11 +135,26 @@ def _parse_hour(value: str) -> int:
     return dt.hour
 
 
-def _load_activities() -> List[Dict]:
-    if not os.path.exists(ACTIVITIES_PATH):
-        return []
-    items = read_json(ACTIVITIES_PATH) or []
-    activities: List[Dict] = []
+def _load_hour_cube(config: Dict, years: List[int], types: List[str]) -> Dict[str, Dict[str, List[int]]]:
+    """Activity counts per year/type/weekday/hour for the dashboard's years
+    and types.
+
+    Each cube is a flat list of 7 * 24 counts indexed ``weekday * 24 + hour``
+    (Sunday=0), so the site payload grows with types and years rather than
+    with the number of activities.
+    """
+    if not years or not types:
+        return {}
+    start, end = f"{min(years):04d}-01-01", f"{max(years):04d}-12-31"
+    wanted_types = set(types)
+    store = readable_store(config)
+    if store:
+        items = read_items(store, start, end, types, columns=("date", "year", "type", "start_date_local"))
+    elif os.path.exists(ACTIVITIES_PATH):
+        items = iter_json_array(ACTIVITIES_PATH)
+    else:
+        return {}
+    cube: Dict[str, Dict[str, List[int]]] = {}
     for item in items:
         if not isinstance(item, dict):
             continue
@@ -131,17 +164,32 @@ def _load_activities() -> List[Dict]:
         start_date_local = item.get("start_date_local")
         if not date_str or year is None or not activity_type or not start_date_local:
             continue
+        if not start <= date_str <= end or activity_type not in wanted_types:
+            continue
         try:
             hour = _parse_hour(start_date_local)
+            weekday = (date.fromisoformat(date_str).weekday() + 1) % 7  # Sunday=0
         except Exception:
             continue
-        activities.append({
-            "date": date_str,
-            "year": int(year),
-            "type": activity_type,
-            "hour": hour,
-        })
-    return activities
+        counts = cube.setdefault(str(int(year)), {}).setdefault(activity_type, [0] * (7 * 24))
+        counts[weekday * 24 + hour] += 1
+    return cube
+
+
+def _load_training_load() -> Dict:
+    """Rolling-window and YTD totals per type as of today, from the stored prefix sums."""
+    if not os.path.exists(TRAINING_LOAD_PATH):
+        return {}
+    try:
+        payload = read_json(TRAINING_LOAD_PATH) or {}
+    except Exception:
+        return {}
+    as_of = utc_now().date()
+    return {
+        "as_of": as_of.isoformat(),
+        "windows": list(TRAINING_LOAD_WINDOWS),
+        "types": window_totals(payload, as_of),
+    }
 
 
 def _type_totals(aggregates_years: Dict) -> Dict[str, int]:
@@ -156,13 +204,26 @@ def _type_totals(aggregates_years: Dict) -> Dict[str, int]:
     return totals
 
 
-def _svg_for_year(
-    year: int,
-    entries: Dict[str, Dict],
-    units: Dict[str, str],
-    colors: List[str],
-    color_for_entry: Optional[Callable[[Dict], str]] = None,
-) -> str:
+def _empty_entry() -> Dict:
+    return {
+        "count": 0,
+        "distance": 0.0,
+        "moving_time": 0.0,
+        "elevation_gain": 0.0,
+        "activity_ids": [],
+    }
+
+
+@lru_cache(maxsize=None)
+def _empty_title_suffix(distance_unit: str, elevation_unit: str) -> str:
+    # Every empty day shares the same tooltip body; only the date line differs.
+    units = {"distance": distance_unit, "elevation": elevation_unit}
+    return _build_title("", _empty_entry(), units)
+
+
+@lru_cache(maxsize=None)
+def _year_geometry(year: int) -> Dict:
+    """Grid dimensions, label positions and in-year cell coordinates for a year."""
     start = _sunday_on_or_before(date(year, 1, 1))
     end = _saturday_on_or_after(date(year, 12, 31))
 
@@ -173,17 +234,60 @@ def _svg_for_year(
     grid_width = GRID_PAD_LEFT + grid_inner_width + GRID_PAD_RIGHT
     grid_height = GRID_PAD_TOP + grid_inner_height + GRID_PAD_BOTTOM
 
-    width = OUTER_PAD * 2 + AXIS_WIDTH + AXIS_GAP + grid_width
-    height = OUTER_PAD * 2 + LABEL_ROW_HEIGHT + grid_height
-
     heatmap_x = OUTER_PAD
     heatmap_y = OUTER_PAD
     month_row_x = heatmap_x + AXIS_WIDTH + AXIS_GAP + GRID_PAD_LEFT
-    month_row_y = heatmap_y
-    day_col_x = heatmap_x + AXIS_WIDTH
     day_col_y = heatmap_y + LABEL_ROW_HEIGHT + GRID_PAD_TOP
-    grid_bg_x = heatmap_x + AXIS_WIDTH + AXIS_GAP
-    grid_bg_y = heatmap_y + LABEL_ROW_HEIGHT
+
+    month_labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    months = []
+    for month in range(1, 13):
+        first_day = date(year, month, 1)
+        week_index = (first_day - start).days // 7
+        months.append((month_row_x + week_index * (CELL + GAP), month_labels[month - 1]))
+
+    day_labels = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+    days = []
+    for row, label in enumerate(day_labels):
+        days.append((day_col_y + row * (CELL + GAP) + (CELL / 2), label))
+
+    cells = []
+    current = date(year, 1, 1)
+    last = date(year, 12, 31)
+    while current <= last:
+        week_index = (current - start).days // 7
+        row = (current.weekday() + 1) % 7  # Sunday=0
+        cells.append((current.isoformat(), week_index * (CELL + GAP), row * (CELL + GAP)))
+        current += timedelta(days=1)
+
+    return {
+        "weeks": weeks,
+        "width": OUTER_PAD * 2 + AXIS_WIDTH + AXIS_GAP + grid_width,
+        "height": OUTER_PAD * 2 + LABEL_ROW_HEIGHT + grid_height,
+        "heatmap_x": heatmap_x,
+        "heatmap_y": heatmap_y,
+        "month_row_x": month_row_x,
+        "month_row_y": heatmap_y,
+        "day_col_x": heatmap_x + AXIS_WIDTH,
+        "day_col_y": day_col_y,
+        "grid_bg_x": heatmap_x + AXIS_WIDTH + AXIS_GAP,
+        "grid_bg_y": heatmap_y + LABEL_ROW_HEIGHT,
+        "grid_width": grid_width,
+        "grid_height": grid_height,
+        "first_row": (date(year, 1, 1).weekday() + 1) % 7,
+        "last_row": (date(year, 12, 31).weekday() + 1) % 7,
+        "months": tuple(months),
+        "days": tuple(days),
+        "cells": tuple(cells),
+    }
+
+
+@lru_cache(maxsize=None)
+def _year_layout(year: int) -> Dict:
+    """Static SVG skeleton and per-cell rect prefixes for a year, shared by every type."""
+    geo = _year_geometry(year)
+    width = geo["width"]
+    height = geo["height"]
 
     lines = []
     lines.append('<?xml version="1.0" encoding="UTF-8"?>')
@@ -194,80 +298,364 @@ def _svg_for_year(
         f'<rect width="{width}" height="{height}" fill="{BG_COLOR}"/>'
     )
     lines.append(
-        f'<rect x="{grid_bg_x}" y="{grid_bg_y}" width="{grid_width}" height="{grid_height}" '
+        f'<rect x="{geo["grid_bg_x"]}" y="{geo["grid_bg_y"]}" width="{geo["grid_width"]}" height="{geo["grid_height"]}" '
         f'rx="12" ry="12" fill="{GRID_BG_COLOR}"/>'
     )
     lines.append(
-        f'<text x="{heatmap_x}" y="{heatmap_y + LABEL_ROW_HEIGHT - 2}" font-size="12" '
+        f'<text x="{geo["heatmap_x"]}" y="{geo["heatmap_y"] + LABEL_ROW_HEIGHT - 2}" font-size="12" '
         f'fill="{YEAR_LABEL_COLOR}" font-family="{LABEL_FONT}">{year}</text>'
     )
 
-    month_labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    for month in range(1, 13):
-        first_day = date(year, month, 1)
-        week_index = (first_day - start).days // 7
-        x = month_row_x + week_index * (CELL + GAP)
+    for x, label in geo["months"]:
         lines.append(
-            f'<text x="{x}" y="{month_row_y + 2}" font-size="10" fill="{LABEL_COLOR}" '
-            f'font-family="{LABEL_FONT}" dominant-baseline="hanging">{month_labels[month - 1]}</text>'
+            f'<text x="{x}" y="{geo["month_row_y"] + 2}" font-size="10" fill="{LABEL_COLOR}" '
+            f'font-family="{LABEL_FONT}" dominant-baseline="hanging">{label}</text>'
         )
 
-    day_labels = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-    for row, label in enumerate(day_labels):
-        y = day_col_y + row * (CELL + GAP) + (CELL / 2)
-        x = day_col_x
+    for y, label in geo["days"]:
         lines.append(
-            f'<text x="{x}" y="{y}" font-size="10" fill="{LABEL_COLOR}" font-family="{LABEL_FONT}" '
+            f'<text x="{geo["day_col_x"]}" y="{y}" font-size="10" fill="{LABEL_COLOR}" font-family="{LABEL_FONT}" '
             f'text-anchor="end" dominant-baseline="middle">{label}</text>'
         )
 
     lines.append(
-        f'<g transform="translate({month_row_x},{day_col_y})">'
+        f'<g transform="translate({geo["month_row_x"]},{geo["day_col_y"]})">'
     )
 
-    current = start
-    while current <= end:
-        week_index = (current - start).days // 7
-        row = (current.weekday() + 1) % 7  # Sunday=0
-        x = week_index * (CELL + GAP)
-        y = row * (CELL + GAP)
+    # Each cell keeps its date key and the attribute prefix up to the fill value.
+    cells = tuple(
+        (date_str, f'<rect x="{x}" y="{y}" width="{CELL}" height="{CELL}" rx="3" ry="3" fill="')
+        for date_str, x, y in geo["cells"]
+    )
+    return {
+        "header": tuple(lines),
+        "cells": cells,
+    }
 
-        in_year = current.year == year
-        date_str = current.isoformat()
 
-        if in_year:
-            entry = entries.get(date_str, {
-                "count": 0,
-                "distance": 0.0,
-                "moving_time": 0.0,
-                "elevation_gain": 0.0,
-                "activity_ids": [],
-            })
+@lru_cache(maxsize=None)
+def _compact_year_layout(year: int) -> Dict:
+    """Compact skeleton: labels styled via CSS, one shared cell shape and a
+    pattern-filled background standing in for every empty day."""
+    geo = _year_geometry(year)
+    width = geo["width"]
+    height = geo["height"]
+    step = CELL + GAP
+    weeks = geo["weeks"]
+    first_top = geo["first_row"] * step
+    middle_width = (weeks - 2) * step
+    last_x = (weeks - 1) * step
+    last_height = (geo["last_row"] + 1) * step
+
+    before_style = (
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',  # noqa: E501
+    )
+    after_style = [
+        "<defs>"
+        f'<rect id="c" width="{CELL}" height="{CELL}" rx="3" ry="3"/>'
+        f'<pattern id="e" width="{step}" height="{step}" patternUnits="userSpaceOnUse">'
+        '<use href="#c" class="l0"/></pattern>'
+        "</defs>",
+        f'<rect width="{width}" height="{height}" fill="{BG_COLOR}"/>',
+        f'<rect x="{geo["grid_bg_x"]}" y="{geo["grid_bg_y"]}" width="{geo["grid_width"]}" '
+        f'height="{geo["grid_height"]}" rx="12" ry="12" fill="{GRID_BG_COLOR}"/>',
+        f'<text x="{geo["heatmap_x"]}" y="{geo["heatmap_y"] + LABEL_ROW_HEIGHT - 2}" class="y">{year}</text>',
+    ]
+    after_style.extend(
+        f'<text x="{x}" y="{geo["month_row_y"] + 2}" class="m">{label}</text>'
+        for x, label in geo["months"]
+    )
+    after_style.extend(
+        f'<text x="{geo["day_col_x"]}" y="{y}" class="d">{label}</text>'
+        for y, label in geo["days"]
+    )
+    after_style.append(f'<g transform="translate({geo["month_row_x"]},{geo["day_col_y"]})">')
+    # The in-year days form a partial first week, full middle weeks and a
+    # partial last week; tiling that outline with the empty-cell pattern
+    # draws every empty day at once.
+    after_style.append(
+        f'<path d="M0 {first_top}h{step}V0h{middle_width}v{7 * step}H0z'
+        f'M{last_x} 0h{step}v{last_height}h-{step}z" fill="url(#e)"/>'
+    )
+
+    cells = tuple(
+        (date_str, f'<use href="#c" x="{x}" y="{y}" ')
+        for date_str, x, y in geo["cells"]
+    )
+    return {
+        "before_style": before_style,
+        "after_style": tuple(after_style),
+        "cells": cells,
+    }
+
+
+def _compact_style(colors: List[str], scope: str = "") -> str:
+    levels = "".join(f"{scope}.l{level}{{fill:{color}}}" for level, color in enumerate(colors))
+    return (
+        f"<style>{scope}text{{font-family:{LABEL_FONT};font-size:10px;fill:{LABEL_COLOR}}}"
+        f"{scope}.y{{font-size:12px;fill:{YEAR_LABEL_COLOR}}}"
+        f"{scope}.m{{dominant-baseline:hanging}}"
+        f"{scope}.d{{text-anchor:end;dominant-baseline:middle}}"
+        f"{levels}</style>"
+    )
+
+
+def _svg_for_year(
+    year: int,
+    entries: Dict[str, Dict],
+    units: Dict[str, str],
+    colors: List[str],
+    color_for_entry: Optional[Callable[[Dict], str]] = None,
+    compact: bool = False,
+) -> str:
+    if compact:
+        return _compact_svg_for_year(year, entries, units, colors, color_for_entry)
+
+    layout = _year_layout(year)
+    empty_suffix = _empty_title_suffix(units["distance"], units["elevation"])
+    empty_color = colors[_level(0)]
+
+    lines = list(layout["header"])
+    for date_str, rect_prefix in layout["cells"]:
+        entry = entries.get(date_str)
+        if entry is None:
+            if color_for_entry:
+                color = color_for_entry(_empty_entry())
+            else:
+                color = empty_color
+            title = date_str + empty_suffix
+        else:
             count = int(entry.get("count", 0))
-            level = _level(count)
             if color_for_entry:
                 color = color_for_entry(entry)
             else:
-                color = colors[level]
+                color = colors[_level(count)]
             title = _build_title(date_str, entry, units)
-        else:
-            current += timedelta(days=1)
-            continue
-
-        rect_attrs = (
-            f'x="{x}" y="{y}" width="{CELL}" height="{CELL}" '
-            f'rx="3" ry="3" fill="{color}"'
+        lines.append(
+            f'{rect_prefix}{color}" data-date="{date_str}"><title>{title}</title></rect>'
         )
+
+    lines.append("</g>")
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+
+def _compact_svg_for_year(
+    year: int,
+    entries: Dict[str, Dict],
+    units: Dict[str, str],
+    colors: List[str],
+    color_for_entry: Optional[Callable[[Dict], str]] = None,
+) -> str:
+    # Empty days come from the background pattern, so only days with
+    # activity get their own element and tooltip.
+    layout = _compact_year_layout(year)
+    lines = list(layout["before_style"])
+    lines.append(_compact_style(colors))
+    lines.extend(layout["after_style"])
+    for date_str, use_prefix in layout["cells"]:
+        entry = entries.get(date_str)
+        if entry is None:
+            continue
+        count = int(entry.get("count", 0))
+        if count <= 0:
+            continue
+        if color_for_entry:
+            paint = f'fill="{color_for_entry(entry)}"'
+        else:
+            paint = f'class="l{_level(count)}"'
+        title = _build_title(date_str, entry, units)
         lines.append(
-            f'<rect {rect_attrs} data-date="{date_str}"><title>{title}</title></rect>'
+            f'{use_prefix}{paint} data-date="{date_str}"><title>{title}</title></use>'
         )
-        current += timedelta(days=1)
 
     lines.append("</g>")
     lines.append("</svg>")
     return "\n".join(lines) + "\n"
 
 
+def _combined_year_entries(year_data: Dict, types: List[str]) -> Dict[str, Dict]:
+    combined: Dict[str, Dict] = {}
+    for activity_type in types:
+        for date_str, entry in (year_data.get(activity_type, {}) or {}).items():
+            target = combined.setdefault(date_str, _empty_entry())
+            target.setdefault("types", [])
+            count = int(entry.get("count", 0))
+            target["count"] += count
+            target["distance"] += float(entry.get("distance", 0.0))
+            target["moving_time"] += float(entry.get("moving_time", 0.0))
+            target["elevation_gain"] += float(entry.get("elevation_gain", 0.0))
+            if count > 0:
+                target["types"].append(activity_type)
+    return combined
+
+
+def _site_number(value: float, digits: int) -> str:
+    return f"{value:,.{digits}f}"
+
+
+def _site_distance(meters: float, units: Dict[str, str]) -> str:
+    if units["distance"] == "km":
+        return f"{_site_number(meters / 1000, 1)} km"
+    return f"{_site_number(meters / 1609.344, 1)} mi"
+
+
+def _site_elevation(meters: float, units: Dict[str, str]) -> str:
+    if units["elevation"] == "m":
+        return f"{_site_number(int(meters + 0.5), 0)} m"
+    return f"{_site_number(int(meters * 3.28084 + 0.5), 0)} ft"
+
+
+def _site_duration(seconds: float) -> str:
+    minutes = int(seconds / 60 + 0.5)
+    if minutes >= 60:
+        return f"{minutes // 60}h {minutes % 60}m"
+    return f"{minutes}m"
+
+
+def _accent(type_meta: Dict[str, Dict[str, str]], activity_type: str) -> str:
+    # Same fallback as site/app.js, so hydration keeps the prerendered colors.
+    return type_meta.get(activity_type, {}).get("accent") or type_accent(activity_type)
+
+
+def _prerender_summary(
+    aggregate_years: Dict,
+    types: List[str],
+    years: List[int],
+    type_meta: Dict[str, Dict[str, str]],
+    units: Dict[str, str],
+) -> str:
+    """Summary cards for the default view, mirroring buildSummary in site/app.js."""
+    totals = {"count": 0, "distance": 0.0, "moving_time": 0.0, "elevation_gain": 0.0}
+    type_counts = {activity_type: 0 for activity_type in types}
+    active_days = 0
+    for year in years:
+        year_data = aggregate_years.get(str(year), {}) or {}
+        for entry in _combined_year_entries(year_data, types).values():
+            for key in totals:
+                totals[key] += entry[key]
+            if entry["count"] > 0:
+                active_days += 1
+        for activity_type in types:
+            for entry in (year_data.get(activity_type, {}) or {}).values():
+                type_counts[activity_type] += int(entry.get("count", 0))
+
+    cards = [("Total Activities", _site_number(totals["count"], 0))]
+    if totals["distance"] > 0 or totals["elevation_gain"] > 0:
+        cards.append(("Total Distance", _site_distance(totals["distance"], units)))
+        cards.append(("Total Elevation", _site_elevation(totals["elevation_gain"], units)))
+    cards.append(("Total Time", _site_duration(totals["moving_time"])))
+    multi_type = len(types) > 1
+    if multi_type:
+        cards.append(("Active Days", _site_number(active_days, 0)))
+
+    parts = [
+        f'<div class="summary-card"><div class="summary-title">{html.escape(title)}</div>'
+        f'<div class="summary-value">{html.escape(value)}</div></div>'
+        for title, value in cards
+    ]
+    if multi_type:
+        for activity_type in types:
+            meta = type_meta.get(activity_type, {})
+            label = meta.get("label", activity_type)
+            parts.append(
+                f'<button type="button" class="summary-card summary-card-action" '
+                f'title="Filter: {html.escape(label)}">'
+                f'<div class="summary-title">{html.escape(meta.get("summary_title", label))}</div>'
+                f'<div class="summary-type"><span class="summary-dot" '
+                f'style="background: {_accent(type_meta, activity_type)}"></span>'
+                f"<span>{_site_number(type_counts[activity_type], 0)}</span></div></button>"
+            )
+    return "\n".join(parts)
+
+
+def _prerender_heatmaps(
+    aggregate_years: Dict,
+    types: List[str],
+    years: List[int],
+    type_meta: Dict[str, Dict[str, str]],
+    units: Dict[str, str],
+) -> str:
+    """Inline compact SVG cards for the most recent active years of the
+    default (all types) view; site/app.js hydrates them until its own view
+    is ready."""
+    accents = {activity_type: _accent(type_meta, activity_type) for activity_type in types}
+
+    def color_for_entry(entry: Dict) -> str:
+        entry_types = entry.get("types") or []
+        if not entry_types:
+            return DEFAULT_COLORS[0]
+        if len(entry_types) == 1:
+            return accents.get(entry_types[0]) or _accent(type_meta, entry_types[0])
+        return MULTI_TYPE_COLOR
+
+    if len(types) == 1:
+        header = f'{type_meta.get(types[0], {}).get("label", types[0])} Activities'
+    else:
+        header = "All Activities"
+
+    rows = []
+    for year in sorted(years, reverse=True):
+        entries = _combined_year_entries(aggregate_years.get(str(year), {}) or {}, types)
+        if not any(entry["count"] > 0 for entry in entries.values()):
+            continue
+        svg = _svg_for_year(year, entries, units, DEFAULT_COLORS, color_for_entry, compact=True)
+        # Inline SVGs share one document: drop the XML prolog and the
+        # per-file style (its bare class selectors would leak into the page,
+        # a scoped copy is emitted once below) and give the shared
+        # cell/pattern ids a per-year suffix.
+        svg = svg.split("\n", 1)[1]
+        svg = re.sub(r"<style>.*?</style>", "", svg, count=1)
+        svg = (
+            svg.replace('id="c"', f'id="c{year}"')
+            .replace('href="#c"', f'href="#c{year}"')
+            .replace('id="e"', f'id="e{year}"')
+            .replace("url(#e)", f"url(#e{year})")
+        )
+        rows.append(
+            '<div class="labeled-card-row labeled-card-row-year">'
+            f'<div class="labeled-card-title">{year}</div>'
+            f'<div class="card year-card">{svg}</div></div>'
+        )
+        if len(rows) >= PRERENDER_YEARS:
+            break
+
+    if not rows:
+        return ""
+    # Keyed by content rather than build time, so an unchanged history
+    # leaves site/index.html untouched.
+    digest = hashlib.sha256("\n".join(rows).encode("utf-8")).hexdigest()[:12]
+    return (
+        f'<div class="type-section" data-prerendered="{digest}">'
+        + _compact_style(DEFAULT_COLORS, scope="[data-prerendered] svg ")
+        + f'<div class="type-header">{html.escape(header)}</div>'
+        '<div class="type-list">\n' + "\n".join(rows) + "</div></div>"
+    )
+
+
+def _splice_marked(content: str, name: str, section: str) -> str:
+    start_tag = f"<!-- PRERENDER:{name}:START -->"
+    end_tag = f"<!-- PRERENDER:{name}:END -->"
+    if start_tag not in content or end_tag not in content:
+        return content
+    before, rest = content.split(start_tag, 1)
+    _, after = rest.split(end_tag, 1)
+    return before + start_tag + section + end_tag + after
+
+
+def _update_site_index(summary_html: str, heatmaps_html: str) -> None:
+    if not os.path.exists(SITE_INDEX_PATH):
+        return
+    with open(SITE_INDEX_PATH, "r", encoding="utf-8") as f:
+        content = f.read()
+    new_content = _splice_marked(content, "SUMMARY", summary_html)
+    new_content = _splice_marked(new_content, "HEATMAPS", heatmaps_html)
+    if new_content == content:
+        return
+    write_text(SITE_INDEX_PATH, new_content)
+
+
 def _readme_section() -> str:
     return (
         "Preview:\n\n"
@@ -276,6 +664,21 @@ def _readme_section() -> str:
     )
 
 
+def _last_synced() -> Optional[datetime]:
+    """When Strava data was last fetched, from the sync summary.
+
+    Stamping outputs with this instead of the build time keeps a rebuild
+    from unchanged inputs byte-identical.
+    """
+    if not os.path.exists(SYNC_SUMMARY_PATH):
+        return None
+    try:
+        value = (read_json(SYNC_SUMMARY_PATH) or {}).get("timestamp_utc")
+        return datetime.fromisoformat(value) if value else None
+    except Exception:
+        return None
+
+
 def _update_readme() -> None:
     if not os.path.exists(README_PATH):
         return
@@ -295,19 +698,189 @@ def _update_readme() -> None:
 
     updated_tag_start = "<!-- UPDATED:START -->"
     updated_tag_end = "<!-- UPDATED:END -->"
-    updated_value = utc_now().strftime("%Y-%m-%d %H:%M UTC")
-    if updated_tag_start in new_content and updated_tag_end in new_content:
+    last_synced = _last_synced()
+    if last_synced and updated_tag_start in new_content and updated_tag_end in new_content:
+        updated_value = last_synced.strftime("%Y-%m-%d %H:%M UTC")
         before, rest = new_content.split(updated_tag_start, 1)
         _, after = rest.split(updated_tag_end, 1)
         new_content = before + updated_tag_start + updated_value + updated_tag_end + after
 
-    with open(README_PATH, "w", encoding="utf-8") as f:
-        f.write(new_content)
+    write_text(README_PATH, new_content)
+
+
+def _day_runs(active: List[bool]) -> Dict[str, int]:
+    """Streak boundary info for one year of active-day flags.
+
+    ``leading``/``trailing`` are the runs touching Jan 1 / Dec 31 (so runs can
+    be chained across years), ``last`` is the run ending on the last active
+    day and ``last_from_start`` marks whether that run begins on Jan 1.
+    """
+    longest = 0
+    current = 0
+    last = 0
+    last_start = -1
+    run_start = 0
+    for index, is_active in enumerate(active):
+        if is_active:
+            if current == 0:
+                run_start = index
+            current += 1
+            longest = max(longest, current)
+            last = current
+            last_start = run_start
+        else:
+            current = 0
+    leading = 0
+    while leading < len(active) and active[leading]:
+        leading += 1
+    return {
+        "longest": longest,
+        "leading": leading,
+        "trailing": current,
+        "last": last,
+        "last_from_start": 1 if last and last_start == 0 else 0,
+    }
+
+
+def _year_type_summaries(
+    aggregates_years: Dict,
+    hour_cube: Optional[Dict[str, Dict[str, List[int]]]] = None,
+) -> Dict[str, Dict[str, Dict]]:
+    """Mergeable per (year, type) summaries for the dashboard.
+
+    Totals, weekday/month counts and the weekday x hour cube add up across
+    types and years; the active-day bitset (bit N = day N of the year,
+    base64) ORs across types, and the streak boundary info chains across
+    consecutive years.
+    """
+    summaries: Dict[str, Dict[str, Dict]] = {}
+    for year, year_data in (aggregates_years or {}).items():
+        try:
+            epoch = date(int(year), 1, 1)
+        except (TypeError, ValueError):
+            continue
+        day_count = (date(epoch.year + 1, 1, 1) - epoch).days
+        for activity_type, entries in (year_data or {}).items():
+            summary = {
+                "count": 0,
+                "distance": 0.0,
+                "moving_time": 0.0,
+                "elevation_gain": 0.0,
+                "weekdays": [0] * 7,
+                "months": [0] * 12,
+            }
+            active = [False] * day_count
+            for date_str, entry in (entries or {}).items():
+                # Entries filed under the wrong year (or with a bad date)
+                # would index past the bitset; skip them like the heatmaps do.
+                try:
+                    day = date.fromisoformat(date_str)
+                except (TypeError, ValueError):
+                    continue
+                if day.year != epoch.year:
+                    continue
+                count = int(entry.get("count", 0))
+                summary["count"] += count
+                summary["distance"] += float(entry.get("distance", 0.0))
+                summary["moving_time"] += float(entry.get("moving_time", 0.0))
+                summary["elevation_gain"] += float(entry.get("elevation_gain", 0.0))
+                if count <= 0:
+                    continue
+                active[(day - epoch).days] = True
+                summary["weekdays"][(day.weekday() + 1) % 7] += count  # Sunday=0
+                summary["months"][day.month - 1] += count
+            if summary["count"] <= 0:
+                continue
+            bits = bytearray((day_count + 7) // 8)
+            for index, is_active in enumerate(active):
+                if is_active:
+                    bits[index >> 3] |= 1 << (index & 7)
+            summary["active_days"] = sum(active)
+            summary["active"] = base64.b64encode(bytes(bits)).decode("ascii")
+            summary["streak"] = _day_runs(active)
+            hours = (hour_cube or {}).get(str(year), {}).get(activity_type)
+            if hours:
+                summary["hours"] = hours
+            summaries.setdefault(str(year), {})[activity_type] = summary
+    return summaries
+
+
+def _encode_year_shard(year: str, year_aggregates: Dict) -> Dict:
+    """Columnar shard: day offsets from Jan 1, type indices into ``types`` and
+    parallel value arrays rounded to what the dashboard displays."""
+    epoch = date(int(year), 1, 1)
+    types = sorted(year_aggregates.keys())
+    type_index = {activity_type: index for index, activity_type in enumerate(types)}
+
+    rows = []
+    for activity_type, entries in year_aggregates.items():
+        for date_str, entry in (entries or {}).items():
+            day = (date.fromisoformat(date_str) - epoch).days
+            rows.append((day, type_index[activity_type], entry))
+    rows.sort(key=lambda row: (row[0], row[1]))
+
+    return {
+        "format": "columnar",
+        "year": int(year),
+        "epoch": epoch.isoformat(),
+        "types": types,
+        "days": {
+            "day": [row[0] for row in rows],
+            "type": [row[1] for row in rows],
+            "count": [int(row[2].get("count", 0)) for row in rows],
+            # meters / seconds / decimeters are below the display precision
+            "distance": [round(float(row[2].get("distance", 0.0))) for row in rows],
+            "moving_time": [round(float(row[2].get("moving_time", 0.0))) for row in rows],
+            "elevation_gain": [round(float(row[2].get("elevation_gain", 0.0)), 1) for row in rows],
+        },
+    }
+
+
+def _route_images(types: List[str]) -> Dict[str, str]:
+    images: Dict[str, str] = {}
+    for activity_type in types:
+        path = os.path.join(SITE_ROUTES_DIR, f"{activity_type}.png")
+        if os.path.exists(path):
+            images[activity_type] = f"routes/{activity_type}.png?v={sha256_file(path)[:12]}"
+    return images
 
 
 def _write_site_data(payload: Dict) -> None:
-    ensure_dir("site")
-    write_json(SITE_DATA_PATH, payload)
+    """Write the dashboard manifest plus one lazily loaded shard per year.
+
+    The manifest carries everything needed for first paint (filters, type
+    metadata, per year/type summaries including the hour cube); daily
+    aggregates live in columnar ``site/shards/<year>.json`` files fetched on
+    demand by the dashboard.
+    """
+    ensure_dir(SITE_SHARDS_DIR)
+    aggregates = payload.get("aggregates", {}) or {}
+
+    shard_years = sorted(aggregates.keys())
+    shards: Dict[str, str] = {}
+    for year in shard_years:
+        filename = f"{year}.json"
+        path = os.path.join(SITE_SHARDS_DIR, filename)
+        write_json(
+            path,
+            _encode_year_shard(year, aggregates.get(year, {})),
+            compact=True,
+        )
+        # Content-hash query so shards can be cached long-term by the browser.
+        shards[year] = f"shards/{filename}?v={sha256_file(path)[:12]}"
+
+    for filename in os.listdir(SITE_SHARDS_DIR):
+        if filename.endswith(".json") and filename[:-5] not in shards:
+            remove_path(os.path.join(SITE_SHARDS_DIR, filename))
+
+    manifest = {
+        key: value
+        for key, value in payload.items()
+        if key not in ("aggregates", "hour_cube")
+    }
+    manifest["summaries"] = _year_type_summaries(aggregates, payload.get("hour_cube"))
+    manifest["shards"] = shards
+    write_json(SITE_DATA_PATH, manifest, compact=True)
 
 
 def generate():
@@ -327,10 +900,11 @@ def generate():
     types = ordered_types(type_counts, featured_types)
     type_meta = build_type_meta(types)
     type_colors = {
-        activity_type: _color_scale(type_meta.get(activity_type, {}).get("accent", DEFAULT_COLORS[4]))
+        activity_type: _color_scale(_accent(type_meta, activity_type))
         for activity_type in types
     }
     years = _year_range_from_config(config, aggregate_years)
+    compact_svg = bool((config.get("heatmaps", {}) or {}).get("compact_svg", False))
 
     for activity_type in types:
         type_dir = os.path.join("heatmaps", activity_type)
@@ -346,21 +920,28 @@ def generate():
                 year_entries,
                 units,
                 type_colors.get(activity_type, DEFAULT_COLORS),
+                compact=compact_svg,
             )
-            path = os.path.join(type_dir, f"{year}.svg")
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(svg)
+            write_text(os.path.join(type_dir, f"{year}.svg"), svg)
 
     _update_readme()
 
+    _update_site_index(
+        _prerender_summary(aggregate_years, types, years, type_meta, units),
+        _prerender_heatmaps(aggregate_years, types, years, type_meta, units),
+    )
+
+    last_synced = _last_synced()
     site_payload = {
-        "generated_at": utc_now().isoformat(),
+        "updated_at": last_synced.isoformat() if last_synced else None,
         "years": years,
         "types": types,
         "type_meta": type_meta,
         "aggregates": aggregate_years,
         "units": units,
-        "activities": _load_activities(),
+        "hour_cube": _load_hour_cube(config, years, types),
+        "training_load": _load_training_load(),
+        "routes": _route_images(types),
     }
     _write_site_data(site_payload)
 
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Single entry point for the pipeline stages and tools.
+
+Each subcommand runs the `main()` of the matching script, which is imported
+only when that subcommand is chosen, so `git-sweaty generate` never loads
+the sync stack.
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    "pipeline": ("run_pipeline", "Sync, then regenerate every artifact."),
+    "sync": ("sync_strava", "Fetch activities from Strava."),
+    "plan": ("backfill_plan", "Estimate the remaining history backfill."),
+    "reconcile": ("reconcile", "Reconcile local activities with Strava by month."),
+    "hydrate": ("hydrate", "Fetch detailed activities into the detail cache."),
+    "normalize": ("normalize", "Normalize raw activities."),
+    "types": ("activity_types", "Explain how activity types are grouped."),
+    "aggregate": ("aggregate", "Build daily aggregates."),
+    "query": ("activity_store", "Query activity totals or lists by date range and type."),
+    "training-load": ("training_load", "Compute the training-load series."),
+    "routes": ("route_heatmap", "Build route-density heatmaps."),
+    "generate": ("generate_heatmaps", "Write heatmap SVGs and site data."),
+    "preview": ("render_preview", "Render the README preview PNG."),
+    "compress": ("compress_site", "Precompress site assets."),
+    "state": ("state_pack", "Pack, verify or restore persisted state as one archive."),
+    "daemon": ("daemon", "Run sync and regeneration as a long-lived process."),
+    "fleet": ("fleet", "Sync several athletes under one rate budget."),
+    "webhook": ("webhook", "Receive Strava push-subscription events."),
+    "auth": ("setup_auth", "Bootstrap Strava OAuth and repository secrets."),
+    "bench": ("benchmark", "Benchmark pipeline stages on synthetic histories."),
+}
+
+# Modules an offline (`pipeline --skip-sync`) run imports, and dependencies
+# that must stay out of that path.
+OFFLINE_MODULES = ("run_pipeline",)
+HEAVY_MODULES = ("requests", "urllib3", "numpy", "brotli")
+DEFAULT_IMPORT_BUDGET_MS = 60.0
+IMPORT_CHECK_RUNS = 5
+
+_IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, {scripts_dir!r})
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _measure_imports(modules: Tuple[str, ...]) -> Tuple[float, List[str]]:
+    """Import time in a fresh interpreter, and any heavy modules it loaded."""
+    probe = _IMPORT_PROBE.format(scripts_dir=SCRIPTS_DIR, modules=modules, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+
+def check_imports(budget_ms: float, runs: int = IMPORT_CHECK_RUNS) -> bool:
+    """Fail when the offline path loads a heavy dependency or its best
+    import time over several fresh interpreters exceeds the budget."""
+    # The first run may also compile bytecode; the fastest run is the one
+    # that reflects import cost.
+    measurements = [_measure_imports(OFFLINE_MODULES) for _ in range(max(1, runs))]
+    best = min(elapsed for elapsed, _ in measurements)
+    loaded = sorted({name for _, names in measurements for name in names})
+    print(f"Offline import time: {best:.1f} ms (budget {budget_ms:.0f} ms)")
+    ok = True
+    if loaded:
+        print(f"Heavy modules imported on the offline path: {', '.join(loaded)}")
+        ok = False
+    if best > budget_ms:
+        print("Import time is over budget")
+        ok = False
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = argparse.ArgumentParser(
+        prog="git-sweaty",
+        description="Strava activity heatmaps",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n"
+        + "\n".join(f"  {name:<15}{help_text}" for name, (_, help_text) in COMMANDS.items())
+        + f"\n  {'check-imports':<15}Check the offline import-time budget.",
+    )
+    parser.add_argument("command", choices=[*COMMANDS, "check-imports"], metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the command (see <command> --help).")
+    args = parser.parse_args(argv)
+
+    if args.command == "check-imports":
+        check_parser = argparse.ArgumentParser(prog="git-sweaty check-imports")
+        check_parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+        check_parser.add_argument("--runs", type=int, default=IMPORT_CHECK_RUNS)
+        check_args = check_parser.parse_args(args.args)
+        return 0 if check_imports(check_args.budget_ms, check_args.runs) else 1
+
+    module_name, _ = COMMANDS[args.command]
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    module = importlib.import_module(module_name)
+    sys.argv = [f"git-sweaty {args.command}", *args.args]
+    return module.main()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
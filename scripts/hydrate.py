@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from backfill_plan import page_budget
+from utils import ensure_dir, iter_json_array, load_config, read_json, utc_now, write_json
+
+DETAILS_PATH = os.path.join("data", "activity_details.json")
+NORMALIZED_PATH = os.path.join("data", "activities_normalized.json")
+
+# Fields kept from GET /activities/{id}; the rest of the detailed payload
+# (segment efforts, laps, photos, the full polyline) is not stored.
+DETAIL_FIELDS = ("calories", "average_heartrate", "max_heartrate", "device_name")
+DEFAULT_MAX_PER_RUN = 200
+DEFAULT_MAX_CACHE_ENTRIES = 2000
+DEFAULT_CONCURRENCY = 2
+# Reads left untouched for the next run's recent sync.
+DEFAULT_RESERVE_READS = 10
+
+
+def hydrate_config(config: Dict) -> Dict:
+    hydrate_cfg = config.get("hydrate", {}) or {}
+    return {
+        "enabled": bool(hydrate_cfg.get("enabled", False)),
+        "max_per_run": int(hydrate_cfg.get("max_per_run", DEFAULT_MAX_PER_RUN)),
+        "max_cache_entries": int(hydrate_cfg.get("max_cache_entries", DEFAULT_MAX_CACHE_ENTRIES)),
+        "concurrency": max(1, int(hydrate_cfg.get("concurrency", DEFAULT_CONCURRENCY))),
+        "reserve_reads": int(hydrate_cfg.get("reserve_reads", DEFAULT_RESERVE_READS)),
+    }
+
+
+def load_details() -> Dict[str, Dict]:
+    """Cached detail fields by activity id (without cache bookkeeping)."""
+    if not os.path.exists(DETAILS_PATH):
+        return {}
+    try:
+        entries = (read_json(DETAILS_PATH) or {}).get("activities", {}) or {}
+    except Exception:
+        return {}
+    return {
+        str(activity_id): {key: value for key, value in entry.items() if key in DETAIL_FIELDS}
+        for activity_id, entry in entries.items()
+        if isinstance(entry, dict)
+    }
+
+
+def detail_fields(activity: Dict) -> Dict:
+    return {key: activity[key] for key in DETAIL_FIELDS if activity.get(key) is not None}
+
+
+def hydration_queue(items: Iterable[Dict], cached: Set[str]) -> List[str]:
+    """Ids still lacking details, newest first."""
+    pending = [
+        item
+        for item in items
+        if item.get("id") is not None and "details" not in item and str(item["id"]) not in cached
+    ]
+    pending.sort(key=lambda item: (item.get("start_date_local") or item.get("date") or "", item["id"]), reverse=True)
+    return [str(item["id"]) for item in pending]
+
+
+def evict(entries: Dict[str, Dict], max_entries: int, keep: Set[str]) -> List[str]:
+    """Drop the least recently fetched entries beyond `max_entries`.
+
+    Evicting is safe once normalize has run: hydrated fields stay on the
+    normalized items. Entries fetched in this run (`keep`) are never
+    evicted so normalize sees them at least once.
+    """
+    excess = len(entries) - max(0, max_entries)
+    if excess <= 0:
+        return []
+    candidates = sorted(
+        (activity_id for activity_id in entries if activity_id not in keep),
+        key=lambda activity_id: (entries[activity_id].get("fetched_utc") or "", activity_id),
+    )
+    evicted = candidates[:excess]
+    for activity_id in evicted:
+        del entries[activity_id]
+    return evicted
+
+
+class _SharedLimiter:
+    """Lets several workers share one limiter: each request reserves its
+    slot under a lock and is counted then, and the wait for that slot is
+    slept outside the lock, so the minimum interval and window budgets
+    still hold while other workers keep reserving and finishing."""
+
+    def __init__(self, limiter) -> None:
+        self._limiter = limiter
+        self._lock = threading.Lock()
+        self.metrics = _LockedMetrics(limiter.metrics, self._lock)
+
+    def __getattr__(self, name: str):
+        return getattr(self._limiter, name)
+
+    def before_request(self, kind: str) -> None:
+        with self._lock:
+            delay, reason = self._limiter.reserve(kind)
+        if delay > 0:
+            time.sleep(delay)
+            self.metrics.observe_sleep(reason, delay)
+
+    def record_request(self, kind: str) -> None:
+        # Already counted in before_request.
+        pass
+
+    def apply_headers(self, headers: Dict[str, str]) -> None:
+        with self._lock:
+            self._limiter.apply_headers(headers)
+
+
+class _LockedMetrics:
+    def __init__(self, metrics, lock: threading.Lock) -> None:
+        self._metrics = metrics
+        self._lock = lock
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._metrics, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+
+def hydrate(
+    token: str,
+    config: Dict,
+    limiter,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    seconds_left: Optional[float] = None,
+) -> Dict:
+    """Fetch detailed activities for items that lack them, newest first.
+
+    Only quota the rest of the run leaves spare is used: the page budget
+    still open on the shared limiter, minus `hydrate.reserve_reads`, capped
+    by `hydrate.max_per_run`. Up to `hydrate.concurrency` requests are in
+    flight at once. Results go to data/activity_details.json, which
+    normalize merges into the items; whatever is not fetched stays queued
+    for the next run. Activities Strava no longer has are recorded as
+    deleted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sync_strava import RateLimitExceeded, fetch_activity, mark_deleted
+
+    settings = hydrate_config(config)
+    payload = read_json(DETAILS_PATH) if os.path.exists(DETAILS_PATH) else {}
+    entries: Dict[str, Dict] = dict(payload.get("activities", {}) or {})
+    items = iter_json_array(NORMALIZED_PATH) if os.path.exists(NORMALIZED_PATH) else []
+    queue = hydration_queue(items, set(entries))
+
+    budget = page_budget(
+        config,
+        read_15_used=limiter.read_15,
+        read_day_used=limiter.read_day,
+        overall_15_used=limiter.overall_15,
+        overall_day_used=limiter.overall_day,
+        seconds_left=seconds_left,
+        reserved=settings["reserve_reads"],
+    )
+    budget = min(budget, settings["max_per_run"] if limit is None else limit)
+    summary = {
+        "queued": len(queue),
+        "budget": budget,
+        "fetched": 0,
+        "deleted": 0,
+        "failed": 0,
+        "evicted": 0,
+        "rate_limited": False,
+    }
+    if dry_run or not queue or budget <= 0:
+        return summary
+
+    shared = _SharedLimiter(limiter)
+    stop = threading.Event()
+    results: Dict[str, Optional[Dict]] = {}
+    errors: List[str] = []
+
+    def fetch(activity_id: str) -> None:
+        if stop.is_set():
+            return
+        try:
+            results[activity_id] = fetch_activity(token, int(activity_id), shared)
+        except RateLimitExceeded as exc:
+            if not stop.is_set():
+                summary["rate_limit_message"] = str(exc)
+            stop.set()
+        except Exception as exc:
+            errors.append(f"{activity_id}: {exc}")
+
+    with ThreadPoolExecutor(max_workers=settings["concurrency"]) as pool:
+        list(pool.map(fetch, queue[:budget]))
+
+    fetched_utc = utc_now().isoformat()
+    deleted = [activity_id for activity_id, activity in results.items() if activity is None]
+    for activity_id, activity in results.items():
+        if activity is not None:
+            entries[activity_id] = dict(detail_fields(activity), fetched_utc=fetched_utc)
+    fresh = {activity_id for activity_id, activity in results.items() if activity is not None}
+    summary.update(
+        fetched=len(fresh),
+        deleted=len(deleted),
+        failed=len(errors),
+        evicted=len(evict(entries, settings["max_cache_entries"], fresh)),
+        rate_limited=stop.is_set(),
+    )
+    if errors:
+        summary["errors"] = errors[:5]
+
+    ensure_dir("data")
+    write_json(DETAILS_PATH, {"activities": {activity_id: entries[activity_id] for activity_id in sorted(entries)}})
+    if deleted:
+        mark_deleted(deleted)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fetch detailed Strava activities into the local detail cache")
+    parser.add_argument("--dry-run", action="store_true", help="Report the queue and budget without fetching.")
+    parser.add_argument("--limit", type=int, default=None, help="Fetch at most this many (default: hydrate.max_per_run).")
+    args = parser.parse_args()
+
+    from sync_strava import build_limiter, get_access_token
+
+    config = load_config()
+    limiter = build_limiter(config)
+    limiter.phase = "backfill"
+    token = get_access_token(config, limiter)
+    print(json.dumps(hydrate(token, config, limiter, dry_run=args.dry_run, limit=args.limit), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,16 @@
 import argparse
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from activity_types import featured_types_from_config, normalize_activity_type
+from activity_store import update_store
+from activity_types import TypeClassifier, featured_types_from_config
+from hydrate import load_details
 from utils import ensure_dir, load_config, read_json, write_json
 
 RAW_DIR = os.path.join("activities", "raw")
 OUT_PATH = os.path.join("data", "activities_normalized.json")
+DELETED_PATH = os.path.join("data", "deleted_activities.json")
 
 
 def _parse_datetime(value: str) -> datetime:
@@ -29,7 +32,7 @@ def _parse_datetime(value: str) -> datetime:
         raise
 
 
-def _normalize_activity(activity: Dict, type_aliases: Dict[str, str]) -> Dict:
+def _normalize_activity(activity: Dict, classifier: TypeClassifier) -> Dict:
     activity_id = activity.get("id")
     start_date_local = activity.get("start_date_local") or activity.get("start_date")
     if not activity_id or not start_date_local:
@@ -39,8 +42,7 @@ def _normalize_activity(activity: Dict, type_aliases: Dict[str, str]) -> Dict:
     date_str = dt.strftime("%Y-%m-%d")
     year = dt.year
 
-    raw_type = activity.get("type") or "Unknown"
-    activity_type = type_aliases.get(raw_type, raw_type)
+    activity_type = classifier.classify(activity.get("type") or "Unknown")
 
     return {
         "id": activity_id,
@@ -72,16 +74,67 @@ def _load_existing() -> Dict[str, Dict]:
     return existing
 
 
-def normalize() -> List[Dict]:
-    config = load_config()
+def _load_deleted_ids() -> set:
+    if not os.path.exists(DELETED_PATH):
+        return set()
+    try:
+        return {str(activity_id) for activity_id in read_json(DELETED_PATH) or []}
+    except Exception:
+        return set()
+
+
+def type_settings(config: Dict) -> Dict:
     activities_cfg = config.get("activities", {}) or {}
-    type_aliases = activities_cfg.get("type_aliases", {}) or {}
-    featured_types = featured_types_from_config(activities_cfg)
-    include_all_types = bool(activities_cfg.get("include_all_types", True))
-    group_other_types = bool(activities_cfg.get("group_other_types", True))
-    other_bucket = str(activities_cfg.get("other_bucket", "OtherSports"))
-    group_aliases = activities_cfg.get("group_aliases", {}) or {}
-    featured_set = set(featured_types)
+    return {
+        "classifier": TypeClassifier.from_config(activities_cfg),
+        "featured_set": set(featured_types_from_config(activities_cfg)),
+        "include_all_types": bool(activities_cfg.get("include_all_types", True)),
+    }
+
+
+def normalize_raw_activity(activity: Dict, settings: Dict) -> Dict:
+    """Normalized item for one raw Strava activity, or {} if it is skipped."""
+    normalized = _normalize_activity(activity, settings["classifier"])
+    if not normalized:
+        return {}
+    if not settings["include_all_types"] and normalized["type"] not in settings["featured_set"]:
+        return {}
+    return normalized
+
+
+def keep_details(normalized: Dict, previous: Optional[Dict]) -> None:
+    """Carry hydrated detail fields over when a raw summary replaces an
+    item, so they survive after the detail cache evicts them."""
+    if previous and "details" in previous:
+        normalized["details"] = previous["details"]
+
+
+def finalize_items(
+    existing: Dict[str, Dict],
+    settings: Dict,
+    deleted_ids: set,
+    details: Optional[Dict[str, Dict]] = None,
+) -> List[Dict]:
+    # Activities deleted on Strava (reported by webhook events) stay out of
+    # the persisted history.
+    items = [
+        item
+        for item in existing.values()
+        if item.get("id") is not None and item.get("date") and str(item["id"]) not in deleted_ids
+    ]
+    groups = settings["classifier"].group_many([item.get("type") for item in items])
+    for item, group in zip(items, groups):
+        item["type"] = group
+        if details and str(item["id"]) in details:
+            item["details"] = details[str(item["id"])]
+    if not settings["include_all_types"]:
+        items = [item for item in items if item.get("type") in settings["featured_set"]]
+    items.sort(key=lambda x: (x["date"], x["id"]))
+    return items
+
+
+def normalize() -> List[Dict]:
+    settings = type_settings(load_config())
 
     # In CI, activities/raw is ephemeral per run, so keep persisted normalized
     # history and overlay any newly fetched raw activities.
@@ -92,39 +145,13 @@ def normalize() -> List[Dict]:
             if not filename.endswith(".json"):
                 continue
             path = os.path.join(RAW_DIR, filename)
-            activity = read_json(path)
-            normalized = _normalize_activity(activity, type_aliases)
+            normalized = normalize_raw_activity(read_json(path), settings)
             if not normalized:
                 continue
-            normalized_type = normalize_activity_type(
-                normalized.get("type"),
-                featured_types=featured_types,
-                group_other_types=group_other_types,
-                other_bucket=other_bucket,
-                group_aliases=group_aliases,
-            )
-            normalized["type"] = normalized_type
-            if not include_all_types and normalized_type not in featured_set:
-                continue
+            keep_details(normalized, existing.get(str(normalized["id"])))
             existing[str(normalized["id"])] = normalized
 
-    items = [
-        item
-        for item in existing.values()
-        if item.get("id") is not None and item.get("date")
-    ]
-    for item in items:
-        item["type"] = normalize_activity_type(
-            item.get("type"),
-            featured_types=featured_types,
-            group_other_types=group_other_types,
-            other_bucket=other_bucket,
-            group_aliases=group_aliases,
-        )
-    if not include_all_types:
-        items = [item for item in items if item.get("type") in featured_set]
-    items.sort(key=lambda x: (x["date"], x["id"]))
-    return items
+    return finalize_items(existing, settings, _load_deleted_ids(), load_details())
 
 
 def main() -> int:
@@ -134,6 +161,7 @@ def main() -> int:
     ensure_dir("data")
     items = normalize()
     write_json(OUT_PATH, items)
+    update_store(load_config(), items)
     print(f"Wrote {len(items)} normalized activities")
     return 0
 
@@ -0,0 +1,59 @@
+import os
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+# tEXt keyword holding the hash of the inputs a PNG was rendered from.
+STAMP_KEY = b"git-sweaty-preview"
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _rgb(color: str) -> Tuple[int, int, int]:
+    value = color.lstrip("#")
+    return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(width: int, height: int, pixels: bytearray, palette: List[str], stamp: str) -> bytes:
+    """8-bit palette PNG; every scanline uses filter type 0."""
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0)
+        raw += pixels[y * width:(y + 1) * width]
+    return (
+        SIGNATURE
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+        + _chunk(b"PLTE", b"".join(bytes(_rgb(color)) for color in palette))
+        + _chunk(b"tEXt", STAMP_KEY + b"\x00" + stamp.encode("ascii"))
+        + _chunk(b"IDAT", zlib.compress(bytes(raw), 9))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def read_stamp(path: str) -> Optional[str]:
+    """Input hash stored in an existing PNG's tEXt chunk, if any."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(SIGNATURE):
+        return None
+    offset = 8
+    while offset + 8 <= len(data):
+        (length,) = struct.unpack(">I", data[offset:offset + 4])
+        kind = data[offset + 4:offset + 8]
+        body = data[offset + 8:offset + 8 + length]
+        if kind == b"tEXt" and body.startswith(STAMP_KEY + b"\x00"):
+            return body[len(STAMP_KEY) + 1:].decode("ascii", "replace")
+        if kind == b"IDAT":
+            return None
+        offset += 12 + length
+    return None
@@ -0,0 +1,312 @@
+import argparse
+import calendar
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from normalize import normalize as normalize_items
+from normalize import normalize_raw_activity, type_settings
+from utils import ensure_dir, load_config, read_json, utc_now, write_json
+
+STATE_PATH = os.path.join("data", "reconcile_state.json")
+
+# Sports and scopes reported by GET /athletes/{id}/stats.
+STATS_SPORTS = ("run", "ride", "swim")
+STATS_SCOPES = ("recent", "ytd", "all")
+RECENT_DAYS = 28
+# Months re-listed on every run regardless of the totals, oldest check
+# first: the stats endpoint only counts runs, rides and swims.
+DEFAULT_ROTATION_MONTHS = 2
+LIST_PER_PAGE = 200
+# Remote listings are keyed by local start time, which can be up to a day
+# away from the UTC timestamps Strava filters on.
+BOUNDARY_SLACK = 86400
+
+
+def _month_key(date_str: str) -> str:
+    return date_str[:7]
+
+
+def _checksum(ids: List[str]) -> str:
+    return hashlib.sha256(",".join(sorted(ids)).encode("utf-8")).hexdigest()[:16]
+
+
+def _month_table(items: Dict[str, Dict]) -> Dict[str, Dict]:
+    months: Dict[str, List[str]] = {}
+    for activity_id, item in items.items():
+        months.setdefault(_month_key(item["date"]), []).append(activity_id)
+    return {month: {"count": len(ids), "checksum": _checksum(ids)} for month, ids in months.items()}
+
+
+def _stats_sport(activity_type: str) -> Optional[str]:
+    return {"Run": "run", "Ride": "ride", "Swim": "swim"}.get(activity_type)
+
+
+def _local_totals(items: Dict[str, Dict], today: date) -> Dict[str, Dict[str, int]]:
+    """Local counts for the same scopes and sports as the stats endpoint."""
+    totals = {scope: {sport: 0 for sport in STATS_SPORTS} for scope in STATS_SCOPES}
+    recent_start = (today - timedelta(days=RECENT_DAYS)).isoformat()
+    for item in items.values():
+        sport = _stats_sport(item.get("type"))
+        if sport is None:
+            continue
+        totals["all"][sport] += 1
+        if item["date"][:4] == str(today.year):
+            totals["ytd"][sport] += 1
+        if item["date"] >= recent_start:
+            totals["recent"][sport] += 1
+    return totals
+
+
+def _remote_totals(stats: Dict) -> Dict[str, Dict[str, int]]:
+    return {
+        scope: {
+            sport: int((stats.get(f"{scope}_{sport}_totals") or {}).get("count", 0) or 0)
+            for sport in STATS_SPORTS
+        }
+        for scope in STATS_SCOPES
+    }
+
+
+def _disagreeing_scopes(local: Dict, remote: Dict, state: Dict) -> Set[str]:
+    """Scopes whose remote totals do not match the local store.
+
+    Strava's stats leave out non-public activities, so once a snapshot
+    exists the totals are compared as changes since the last
+    reconciliation rather than as absolute counts.
+    """
+    previous_local = state.get("local_totals")
+    previous_remote = state.get("remote_totals")
+
+    def count(totals: Dict, scope: str, sport: str) -> int:
+        # "prior" (all-time minus year-to-date) isolates earlier years, so a
+        # change this year does not send every older month to be re-listed.
+        if scope == "prior":
+            return count(totals, "all", sport) - count(totals, "ytd", sport)
+        return int((totals.get(scope) or {}).get(sport, 0))
+
+    scopes = set()
+    for scope in ("recent", "ytd", "prior"):
+        for sport in STATS_SPORTS:
+            if previous_local and previous_remote:
+                local_delta = count(local, scope, sport) - count(previous_local, scope, sport)
+                remote_delta = count(remote, scope, sport) - count(previous_remote, scope, sport)
+                if local_delta != remote_delta:
+                    scopes.add(scope)
+            elif count(local, scope, sport) != count(remote, scope, sport):
+                scopes.add(scope)
+    return scopes
+
+
+def _months_between(first: str, last: str) -> List[str]:
+    year, month = int(first[:4]), int(first[5:7])
+    months = []
+    while f"{year:04d}-{month:02d}" <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def candidate_months(
+    scopes: Set[str],
+    local_months: Dict[str, Dict],
+    verified_months: Dict[str, Dict],
+    today: date,
+    full: bool = False,
+) -> List[str]:
+    """Months to re-list: every month of a disagreeing scope plus months
+    whose local contents changed since they were last verified.
+
+    "prior" covers the years before this one.
+    """
+    current = today.strftime("%Y-%m")
+    first = min(list(local_months) + [current])
+    months: Set[str] = set()
+    if full:
+        months.update(_months_between(first, current))
+    elif "prior" in scopes:
+        months.update(_months_between(first, f"{today.year - 1:04d}-12"))
+    if "ytd" in scopes:
+        months.update(_months_between(f"{today.year:04d}-01", current))
+    if "recent" in scopes:
+        months.update(_months_between((today - timedelta(days=RECENT_DAYS)).strftime("%Y-%m"), current))
+    for month, entry in local_months.items():
+        if verified_months.get(month) != entry:
+            months.add(month)
+    return sorted(months)
+
+
+def rotation_months(
+    local_months: Dict[str, Dict], listed_utc: Dict[str, str], exclude: Set[str], count: int
+) -> List[str]:
+    """The `count` local months listed longest ago (never listed first),
+    other than `exclude`.
+
+    Re-listing a few of them each run finds deletions the stats totals
+    cannot show, such as walks, hikes or weight training, within
+    len(local_months) / count runs.
+    """
+    pending = [month for month in local_months if month not in exclude]
+    pending.sort(key=lambda month: (listed_utc.get(month, ""), month))
+    return pending[: max(0, count)]
+
+
+def _month_ranges(months: List[str]) -> List[Tuple[str, str]]:
+    """Collapse sorted months into contiguous (first, last) runs so each
+    run is listed with one paged query."""
+    ranges: List[Tuple[str, str]] = []
+    for month in months:
+        if ranges and _months_between(ranges[-1][1], month)[1:] == [month]:
+            ranges[-1] = (ranges[-1][0], month)
+        else:
+            ranges.append((month, month))
+    return ranges
+
+
+def _range_bounds(first: str, last: str) -> Tuple[int, int]:
+    start = datetime(int(first[:4]), int(first[5:7]), 1, tzinfo=timezone.utc)
+    year, month = int(last[:4]), int(last[5:7])
+    end = datetime(year, month, calendar.monthrange(year, month)[1], tzinfo=timezone.utc) + timedelta(days=1)
+    return int(start.timestamp()) - BOUNDARY_SLACK, int(end.timestamp()) + BOUNDARY_SLACK
+
+
+def _local_items() -> Dict[str, Dict]:
+    return {str(item["id"]): item for item in normalize_items()}
+
+
+def reconcile(token: str, config: Dict, limiter, dry_run: bool = False, full: bool = False) -> Dict:
+    """Make the local store match Strava for the months that disagree.
+
+    Starts from the athlete stats totals (two reads), then re-lists only
+    candidate months plus `sync.reconcile_rotation_months` months checked
+    longest ago, one paged query per contiguous run of months.
+    Activities missing locally are written to activities/raw; local ones
+    Strava no longer lists are recorded as deleted.
+    """
+    from sync_strava import (
+        RateLimitExceeded,
+        fetch_athlete,
+        fetch_athlete_stats,
+        fetch_page,
+        mark_deleted,
+        write_activity,
+    )
+
+    state = read_json(STATE_PATH) if os.path.exists(STATE_PATH) else {}
+    settings = type_settings(config)
+    today = utc_now().date()
+    items = _local_items()
+    local_months = _month_table(items)
+
+    athlete = fetch_athlete(token, limiter)
+    remote_totals = _remote_totals(fetch_athlete_stats(token, athlete["id"], limiter))
+    scopes = _disagreeing_scopes(_local_totals(items, today), remote_totals, state)
+    verified: Dict[str, Dict] = dict(state.get("months", {}) or {})
+    listed_utc: Dict[str, str] = dict(state.get("listed_utc", {}) or {})
+    months = candidate_months(scopes, local_months, verified, today, full=full)
+    rotation = int((config.get("sync", {}) or {}).get("reconcile_rotation_months", DEFAULT_ROTATION_MONTHS))
+    rotated = rotation_months(local_months, listed_utc, set(months), rotation)
+    candidates = len(months)
+    months = sorted(set(months) | set(rotated))
+
+    summary = {
+        "scopes": sorted(scopes),
+        "candidate_months": candidates,
+        "rotated_months": len(rotated),
+        "listed_months": 0,
+        "pages": 0,
+        "added": 0,
+        "deleted": 0,
+        "rate_limited": False,
+    }
+    deleted: List[str] = []
+    for first, last in _month_ranges(months):
+        after, before = _range_bounds(first, last)
+        wanted = set(_months_between(first, last))
+        remote: Dict[str, Dict] = {}
+        page = 1
+        try:
+            while True:
+                activities = fetch_page(token, LIST_PER_PAGE, page, after, before, limiter)
+                summary["pages"] += 1
+                for activity in activities or []:
+                    normalized = normalize_raw_activity(activity, settings)
+                    if normalized and _month_key(normalized["date"]) in wanted:
+                        remote[str(normalized["id"])] = activity
+                if len(activities or []) < LIST_PER_PAGE:
+                    break
+                page += 1
+        except RateLimitExceeded as exc:
+            summary["rate_limited"] = True
+            summary["rate_limit_message"] = str(exc)
+            break
+
+        local_ids = {
+            activity_id for activity_id, item in items.items() if _month_key(item["date"]) in wanted
+        }
+        missing = [activity_id for activity_id in remote if activity_id not in local_ids]
+        extra = sorted(local_ids - set(remote))
+        summary["added"] += len(missing)
+        summary["deleted"] += len(extra)
+        if not dry_run:
+            for activity_id in missing:
+                write_activity(remote[activity_id])
+            deleted.extend(extra)
+        for activity_id in extra:
+            items.pop(activity_id, None)
+        for activity_id in missing:
+            items[activity_id] = normalize_raw_activity(remote[activity_id], settings)
+        remote_months = _month_table({activity_id: items[activity_id] for activity_id in remote})
+        listed_at = utc_now().isoformat()
+        for month in wanted:
+            listed_utc[month] = listed_at
+            if month in remote_months:
+                verified[month] = remote_months[month]
+            else:
+                verified.pop(month, None)
+        summary["listed_months"] += len(wanted)
+
+    if dry_run:
+        return summary
+    if deleted:
+        mark_deleted(deleted)
+    if not summary["rate_limited"]:
+        # Months that were not listed keep their earlier verification; the
+        # totals snapshot only moves forward once every candidate is done.
+        state = {
+            "remote_totals": remote_totals,
+            "local_totals": _local_totals(items, today),
+            "months": {month: verified[month] for month in sorted(verified)},
+            "listed_utc": {month: listed_utc[month] for month in sorted(listed_utc)},
+            "last_run_utc": utc_now().isoformat(),
+        }
+    else:
+        state = dict(
+            state,
+            months={month: verified[month] for month in sorted(verified)},
+            listed_utc={month: listed_utc[month] for month in sorted(listed_utc)},
+        )
+    ensure_dir("data")
+    write_json(STATE_PATH, state)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconcile local activities with Strava month by month")
+    parser.add_argument("--dry-run", action="store_true", help="Report differences without changing anything.")
+    parser.add_argument("--full", action="store_true", help="Re-list every month regardless of the totals.")
+    args = parser.parse_args()
+
+    from sync_strava import build_limiter, get_access_token
+
+    config = load_config()
+    limiter = build_limiter(config)
+    token = get_access_token(config, limiter)
+    print(json.dumps(reconcile(token, config, limiter, dry_run=args.dry_run, full=args.full), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+from typing import Dict, List, Tuple
+
+from activity_types import build_type_meta, featured_types_from_config, ordered_types
+from generate_heatmaps import (
+    AGG_PATH,
+    BG_COLOR,
+    CELL,
+    DEFAULT_COLORS,
+    MULTI_TYPE_COLOR,
+    README_PREVIEW_IMAGE_PATH,
+    YEAR_LABEL_COLOR,
+    _combined_year_entries,
+    _type_totals,
+    _year_geometry,
+    _year_range_from_config,
+)
+from png import encode_png, read_stamp
+from utils import load_config, read_json, write_bytes
+
+PREVIEW_YEARS = 3
+SCALE = 2
+CELL_RADIUS = 3
+
+# 3x5 digit glyphs for the year labels; each row is a 3-bit mask, MSB on the left.
+DIGITS = {
+    "0": (7, 5, 5, 5, 7),
+    "1": (2, 6, 2, 2, 7),
+    "2": (7, 1, 7, 4, 7),
+    "3": (7, 1, 7, 1, 7),
+    "4": (5, 5, 7, 1, 1),
+    "5": (7, 4, 7, 1, 7),
+    "6": (7, 4, 7, 5, 7),
+    "7": (7, 1, 1, 1, 1),
+    "8": (7, 5, 7, 5, 7),
+    "9": (7, 5, 7, 1, 7),
+}
+GLYPH_PIXEL = 2
+
+
+def _corner_insets(size: int, radius: int) -> List[int]:
+    """Per-row horizontal inset that rounds the corners of a size x size cell."""
+    insets = []
+    for row in range(size):
+        distance = min(row, size - 1 - row)
+        if distance >= radius:
+            insets.append(0)
+            continue
+        dy = radius - distance - 0.5
+        insets.append(int(round(radius - math.sqrt(max(radius * radius - dy * dy, 0.0)))))
+    return insets
+
+
+def _fill(pixels: bytearray, width: int, x: int, y: int, w: int, h: int, index: int) -> None:
+    run = bytes([index]) * w
+    for row in range(y, y + h):
+        start = row * width + x
+        pixels[start:start + w] = run
+
+
+def _draw_year_label(pixels: bytearray, width: int, x: int, y: int, year: int, index: int) -> None:
+    pixel = GLYPH_PIXEL * SCALE
+    for char in str(year):
+        for row, mask in enumerate(DIGITS[char]):
+            for col in range(3):
+                if mask & (4 >> col):
+                    _fill(pixels, width, x + col * pixel, y + row * pixel, pixel, pixel, index)
+        x += 4 * pixel
+
+
+def _preview_years(aggregate_years: Dict, types: List[str], years: List[int]) -> List[Tuple[int, Dict]]:
+    selected = []
+    for year in sorted(years, reverse=True):
+        entries = _combined_year_entries(aggregate_years.get(str(year), {}) or {}, types)
+        if any(entry["count"] > 0 for entry in entries.values()):
+            selected.append((year, entries))
+        if len(selected) >= PREVIEW_YEARS:
+            break
+    return selected
+
+
+def render_preview(force: bool = False) -> bool:
+    """Draw the combined all-types grids for the most recent active years
+    into README_PREVIEW_IMAGE_PATH.
+
+    Cell positions come from the same geometry as the SVG heatmaps. Returns
+    False without rendering when the stored input hash still matches.
+    """
+    config = load_config()
+    aggregates = read_json(AGG_PATH) if os.path.exists(AGG_PATH) else {"years": {}}
+    aggregate_years = aggregates.get("years", {}) or {}
+    featured_types = featured_types_from_config(config.get("activities", {}) or {})
+    types = ordered_types(_type_totals(aggregate_years), featured_types)
+    type_meta = build_type_meta(types)
+    years = _year_range_from_config(config, aggregate_years)
+    accents = {
+        activity_type: type_meta.get(activity_type, {}).get("accent", DEFAULT_COLORS[4])
+        for activity_type in types
+    }
+
+    stamp_source = json.dumps(
+        {
+            "aggregates": aggregate_years,
+            "years": years,
+            "accents": accents,
+            "layout": [PREVIEW_YEARS, SCALE, CELL_RADIUS],
+        },
+        sort_keys=True,
+    )
+    stamp = hashlib.sha256(stamp_source.encode("utf-8")).hexdigest()
+    if not force and read_stamp(README_PREVIEW_IMAGE_PATH) == stamp:
+        return False
+
+    palette = [BG_COLOR, YEAR_LABEL_COLOR, DEFAULT_COLORS[0], MULTI_TYPE_COLOR]
+    for accent in accents.values():
+        if accent not in palette:
+            palette.append(accent)
+    color_index = {color: index for index, color in enumerate(palette)}
+
+    selected = _preview_years(aggregate_years, types, years)
+    geometries = [_year_geometry(year) for year, _ in selected] or [_year_geometry(years[-1])]
+    width = max(geo["width"] for geo in geometries) * SCALE
+    height = sum(geo["height"] for geo in geometries) * SCALE
+    pixels = bytearray(width * height)  # palette index 0 is the background
+
+    cell_size = CELL * SCALE
+    insets = _corner_insets(cell_size, CELL_RADIUS * SCALE)
+    offset_y = 0
+    for (year, entries), geo in zip(selected, geometries):
+        label_y = offset_y + (geo["heatmap_y"] + 2) * SCALE
+        _draw_year_label(pixels, width, geo["heatmap_x"] * SCALE, label_y, year, 1)
+        origin_x = geo["month_row_x"] * SCALE
+        origin_y = offset_y + geo["day_col_y"] * SCALE
+        for date_str, x, y in geo["cells"]:
+            entry_types = (entries.get(date_str) or {}).get("types") or []
+            if not entry_types:
+                index = color_index[DEFAULT_COLORS[0]]
+            elif len(entry_types) == 1:
+                index = color_index[accents.get(entry_types[0], DEFAULT_COLORS[4])]
+            else:
+                index = color_index[MULTI_TYPE_COLOR]
+            cell_x = origin_x + x * SCALE
+            cell_y = origin_y + y * SCALE
+            for row, inset in enumerate(insets):
+                _fill(pixels, width, cell_x + inset, cell_y + row, cell_size - 2 * inset, 1, index)
+        offset_y += geo["height"] * SCALE
+
+    write_bytes(README_PREVIEW_IMAGE_PATH, encode_png(width, height, pixels, palette, stamp))
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render the README preview PNG from daily aggregates")
+    parser.add_argument("--force", action="store_true", help="Render even if aggregates are unchanged.")
+    args = parser.parse_args()
+
+    if render_preview(force=args.force):
+        print(f"Wrote {README_PREVIEW_IMAGE_PATH}")
+    else:
+        print("Preview unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,325 @@
+import argparse
+import hashlib
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from activity_store import read_items, readable_store
+from activity_types import build_type_meta
+from png import encode_png, read_stamp
+from utils import ensure_dir, iter_json_array, load_config, read_json, record_change, remove_path, write_bytes, write_json
+
+# numpy is optional and only imported once the route stage is enabled, so
+# runs without routes do not pay for loading it.
+np = None
+
+RAW_DIR = os.path.join("activities", "raw")
+NORMALIZED_PATH = os.path.join("data", "activities_normalized.json")
+POLYLINES_PATH = os.path.join("data", "route_polylines.json")
+TILES_PATH = os.path.join("data", "route_tiles.npz")
+STATE_PATH = os.path.join("data", "route_tiles.json")
+SITE_ROUTES_DIR = os.path.join("site", "routes")
+
+TILE_SIZE = 256
+DEFAULT_ZOOM = 13
+DEFAULT_IMAGE_SIZE = 768
+# Longer jumps between consecutive points are GPS glitches or paused
+# recordings; drawing them would smear straight lines across the map.
+MAX_SEGMENT_PX = 2048
+BG_COLOR = "#0f172a"
+
+
+def _load_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy as module
+        except ImportError:
+            return False
+        np = module
+    return True
+
+
+def routes_config(config: Dict) -> Dict:
+    routes_cfg = config.get("routes", {}) or {}
+    return {
+        "enabled": bool(routes_cfg.get("enabled", False)),
+        "zoom": int(routes_cfg.get("zoom", DEFAULT_ZOOM)),
+        "size": int(routes_cfg.get("size", DEFAULT_IMAGE_SIZE)),
+    }
+
+
+def decode_polyline(encoded: str) -> "np.ndarray":
+    """Decode a Google encoded polyline into an (n, 2) array of lat/lng."""
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if not chunks.size:
+        return np.empty((0, 2))
+    ends = np.flatnonzero(chunks < 0x20)
+    if not ends.size:
+        return np.empty((0, 2))
+    chunks = chunks[: ends[-1] + 1]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Position of each 5-bit chunk within its value, then one reduceat sums
+    # every value's shifted chunks at once.
+    position = np.arange(chunks.size) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((chunks & 0x1F) << (5 * position), starts)
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+    if values.size % 2:
+        values = values[:-1]
+    return np.cumsum(values.reshape(-1, 2), axis=0) / 1e5
+
+
+def _project(latlng: "np.ndarray", zoom: int) -> "np.ndarray":
+    """Web Mercator global pixel coordinates at ``zoom``."""
+    world = TILE_SIZE * (1 << zoom)
+    lat = np.radians(np.clip(latlng[:, 0], -85.0511, 85.0511))
+    x = (latlng[:, 1] + 180.0) / 360.0 * world
+    y = (0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)) * world
+    return np.column_stack((x, y))
+
+
+def _rasterize(encoded: str, zoom: int) -> "np.ndarray":
+    """Unique global pixel keys (y * world + x) touched by one route."""
+    latlng = decode_polyline(encoded)
+    if not latlng.size:
+        return np.empty(0, dtype=np.int64)
+    points = _project(latlng, zoom)
+    world = TILE_SIZE * (1 << zoom)
+
+    start = points[:-1]
+    delta = points[1:] - start
+    steps = np.ceil(np.abs(delta).max(axis=1)).astype(np.int64)
+    keep = steps <= MAX_SEGMENT_PX
+    start, delta, steps = start[keep], delta[keep], np.maximum(steps[keep], 1)
+    segment = np.repeat(np.arange(steps.size), steps)
+    offset = np.arange(segment.size) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = (offset / np.repeat(steps, steps))[:, None]
+    samples = np.concatenate((start[segment] + delta[segment] * t, points[-1:]))
+
+    pixels = np.floor(samples).astype(np.int64)
+    np.clip(pixels, 0, world - 1, out=pixels)
+    return np.unique(pixels[:, 1] * world + pixels[:, 0])
+
+
+def _apply(tiles: Dict[Tuple[int, int], "np.ndarray"], keys: "np.ndarray", zoom: int, sign: int) -> None:
+    world = TILE_SIZE * (1 << zoom)
+    y, x = np.divmod(keys, world)
+    tile_ids = (y // TILE_SIZE) * (world // TILE_SIZE) + x // TILE_SIZE
+    order = np.argsort(tile_ids, kind="stable")
+    tile_ids, x, y = tile_ids[order], x[order], y[order]
+    bounds = np.flatnonzero(np.diff(tile_ids)) + 1
+    for ids, xs, ys in zip(np.split(tile_ids, bounds), np.split(x, bounds), np.split(y, bounds)):
+        if not ids.size:
+            continue
+        tile = (int(xs[0] // TILE_SIZE), int(ys[0] // TILE_SIZE))
+        grid = tiles.get(tile)
+        if grid is None:
+            grid = tiles[tile] = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.int32)
+        # Keys are unique per route, so fancy-index += never collides.
+        grid[ys % TILE_SIZE, xs % TILE_SIZE] += sign
+
+
+def _load_polylines() -> Dict[str, str]:
+    if not os.path.exists(POLYLINES_PATH):
+        return {}
+    try:
+        payload = read_json(POLYLINES_PATH)
+    except Exception:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _raw_polylines() -> Dict[str, str]:
+    polylines: Dict[str, str] = {}
+    if not os.path.exists(RAW_DIR):
+        return polylines
+    for filename in sorted(os.listdir(RAW_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        activity = read_json(os.path.join(RAW_DIR, filename))
+        polyline = ((activity.get("map") or {}).get("summary_polyline") or "").strip()
+        if activity.get("id") and polyline:
+            polylines[str(activity["id"])] = polyline
+    return polylines
+
+
+def _load_tiles(zoom: int) -> Tuple[Dict[str, str], Dict[str, Dict[Tuple[int, int], "np.ndarray"]]]:
+    """Applied activity -> type map and per-type tile grids, or empty on mismatch."""
+    if not (os.path.exists(STATE_PATH) and os.path.exists(TILES_PATH)):
+        return {}, {}
+    try:
+        state = read_json(STATE_PATH)
+        archive = np.load(TILES_PATH)
+    except Exception:
+        return {}, {}
+    if state.get("zoom") != zoom:
+        return {}, {}
+    tiles: Dict[str, Dict[Tuple[int, int], "np.ndarray"]] = {}
+    with archive:
+        for name in archive.files:
+            activity_type, tx, ty = name.rsplit(":", 2)
+            tiles.setdefault(activity_type, {})[(int(tx), int(ty))] = archive[name].astype(np.int32)
+    return dict(state.get("activities") or {}), tiles
+
+
+def _save_tiles(zoom: int, applied: Dict[str, str], tiles: Dict[str, Dict[Tuple[int, int], "np.ndarray"]]) -> None:
+    arrays = {
+        f"{activity_type}:{tx}:{ty}": grid.astype(np.uint32)
+        for activity_type, grids in tiles.items()
+        for (tx, ty), grid in grids.items()
+        if grid.any()
+    }
+    tmp = f"{TILES_PATH}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, TILES_PATH)
+    record_change(TILES_PATH)
+    write_json(STATE_PATH, {"zoom": zoom, "activities": applied}, compact=True)
+
+
+def _tiles_digest(grids: Dict[Tuple[int, int], "np.ndarray"], accent: str, size: int) -> str:
+    digest = hashlib.sha256(f"{accent}:{size}".encode("ascii"))
+    for tile in sorted(grids):
+        digest.update(f"{tile}".encode("ascii"))
+        digest.update(grids[tile].tobytes())
+    return digest.hexdigest()
+
+
+def _palette(accent: str) -> List[str]:
+    base = [int(BG_COLOR[i:i + 2], 16) for i in (1, 3, 5)]
+    target = [int(accent[i:i + 2], 16) for i in (1, 3, 5)]
+    palette = [BG_COLOR]
+    for level in range(1, 256):
+        # Start a quarter of the way in so single passes stay visible.
+        mix = 0.25 + 0.75 * level / 255
+        rgb = [round(b + (t - b) * mix) for b, t in zip(base, target)]
+        palette.append("#" + "".join(f"{value:02x}" for value in rgb))
+    return palette
+
+
+def _render_type(grids: Dict[Tuple[int, int], "np.ndarray"], accent: str, size: int, path: str) -> bool:
+    """Render a size x size window centred on the densest tile; False if unchanged."""
+    stamp = _tiles_digest(grids, accent, size)
+    if read_stamp(path) == stamp:
+        return False
+
+    densest = max(grids, key=lambda tile: int(grids[tile].sum()))
+    grid = grids[densest]
+    ys, xs = np.nonzero(grid)
+    weights = grid[ys, xs]
+    center_x = densest[0] * TILE_SIZE + float(np.average(xs, weights=weights))
+    center_y = densest[1] * TILE_SIZE + float(np.average(ys, weights=weights))
+    left = int(center_x) - size // 2
+    top = int(center_y) - size // 2
+
+    canvas = np.zeros((size, size), dtype=np.int64)
+    for (tx, ty), tile_grid in grids.items():
+        x0, y0 = tx * TILE_SIZE - left, ty * TILE_SIZE - top
+        if x0 >= size or y0 >= size or x0 + TILE_SIZE <= 0 or y0 + TILE_SIZE <= 0:
+            continue
+        sx, sy = max(0, -x0), max(0, -y0)
+        dx, dy = max(0, x0), max(0, y0)
+        w = min(TILE_SIZE - sx, size - dx)
+        h = min(TILE_SIZE - sy, size - dy)
+        canvas[dy:dy + h, dx:dx + w] = tile_grid[sy:sy + h, sx:sx + w]
+
+    peak = int(canvas.max())
+    levels = np.zeros((size, size), dtype=np.uint8)
+    if peak > 0:
+        scaled = np.log1p(canvas) / math.log1p(peak) * 255
+        levels = np.where(canvas > 0, np.clip(scaled, 1, 255), 0).astype(np.uint8)
+
+    write_bytes(path, encode_png(size, size, bytearray(levels.tobytes()), _palette(accent), stamp))
+    return True
+
+
+def update_route_tiles() -> Optional[Dict[str, int]]:
+    """Fold new, changed and deleted routes into the cached density tiles
+    and re-render the per-type images under site/routes/.
+
+    Only activities whose polyline or type changed since the last run are
+    rasterized; returns None when routes are disabled or numpy is missing.
+    """
+    config = load_config()
+    cfg = routes_config(config)
+    if not cfg["enabled"]:
+        return None
+    if not _load_numpy():
+        print("Warning: numpy is not installed; skipping route heatmaps")
+        return None
+    zoom = cfg["zoom"]
+
+    store = readable_store(config)
+    if store:
+        items = read_items(store, columns=("id", "type"))
+    else:
+        items = iter_json_array(NORMALIZED_PATH) if os.path.exists(NORMALIZED_PATH) else []
+    types_by_id = {str(item["id"]): item.get("type") for item in items or [] if item.get("id") is not None}
+
+    # activities/raw is ephemeral in CI, so keep persisted polylines and
+    # overlay newly fetched ones, like normalize does for activities.
+    previous = _load_polylines()
+    polylines = dict(previous)
+    polylines.update(_raw_polylines())
+    polylines = {activity_id: line for activity_id, line in polylines.items() if activity_id in types_by_id}
+
+    applied, tiles = _load_tiles(zoom)
+    if any(activity_id not in previous for activity_id in applied):
+        applied, tiles = {}, {}
+        previous = {}
+
+    removed = added = 0
+    for activity_id, activity_type in list(applied.items()):
+        current_type = types_by_id.get(activity_id)
+        if current_type == activity_type and polylines.get(activity_id) == previous[activity_id]:
+            continue
+        _apply(tiles.setdefault(activity_type, {}), _rasterize(previous[activity_id], zoom), zoom, -1)
+        del applied[activity_id]
+        removed += 1
+    for activity_id, polyline in polylines.items():
+        if activity_id in applied:
+            continue
+        activity_type = types_by_id[activity_id]
+        _apply(tiles.setdefault(activity_type, {}), _rasterize(polyline, zoom), zoom, 1)
+        applied[activity_id] = activity_type
+        added += 1
+
+    tiles = {
+        activity_type: {tile: grid for tile, grid in grids.items() if grid.any()}
+        for activity_type, grids in tiles.items()
+    }
+    tiles = {activity_type: grids for activity_type, grids in tiles.items() if grids}
+
+    ensure_dir("data")
+    write_json(POLYLINES_PATH, polylines, compact=True)
+    if added or removed or not os.path.exists(TILES_PATH):
+        _save_tiles(zoom, applied, tiles)
+
+    ensure_dir(SITE_ROUTES_DIR)
+    type_meta = build_type_meta(sorted(tiles))
+    rendered = 0
+    for activity_type, grids in tiles.items():
+        accent = type_meta.get(activity_type, {}).get("accent", "#01cdfe")
+        path = os.path.join(SITE_ROUTES_DIR, f"{activity_type}.png")
+        if _render_type(grids, accent, cfg["size"], path):
+            rendered += 1
+    for filename in os.listdir(SITE_ROUTES_DIR):
+        if filename.endswith(".png") and filename[:-4] not in tiles:
+            remove_path(os.path.join(SITE_ROUTES_DIR, filename))
+
+    return {"added": added, "removed": removed, "routes": len(applied), "rendered": rendered}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build route-density heatmaps from activity polylines")
+    args = parser.parse_args()
+
+    summary = update_route_tiles()
+    if summary is None:
+        print("Route heatmaps disabled")
+    else:
+        print(f"Route heatmaps: {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,16 +2,21 @@ import argparse
 import os
 import re
 import subprocess
-from typing import Optional
+from typing import List, Optional
 
+from activity_store import update_store
 from aggregate import aggregate as aggregate_func
+from compress_site import compress_site, precompress_enabled
 from normalize import normalize as normalize_func
-from sync_strava import sync_strava
-from utils import ensure_dir, write_json
+from render_preview import render_preview
+from route_heatmap import update_route_tiles
+from training_load import training_load as training_load_func, write_training_load
+from utils import changed_paths, ensure_dir, load_config, write_json, write_text
 from generate_heatmaps import generate as generate_heatmaps
 
 SUMMARY_TXT = os.path.join("data", "last_sync_summary.txt")
 README_MD = "README.md"
+COMMIT_ROOTS = ("data", "heatmaps", "site", README_MD)
 README_LIVE_SITE_RE = re.compile(
     r"(?im)^(-\s*(?:Live site:\s*\[Interactive Heatmaps\]|View the Interactive \[Activity Dashboard\])\()https?://[^)]+(\)\s*)$",
     re.IGNORECASE,
@@ -21,6 +26,7 @@ README_LIVE_SITE_RE = re.compile(
 def _write_normalized(items):
     ensure_dir("data")
     write_json(os.path.join("data", "activities_normalized.json"), items)
+    update_store(load_config(), items)
 
 
 def _write_aggregates(payload):
@@ -28,28 +34,56 @@ def _write_aggregates(payload):
     write_json(os.path.join("data", "daily_aggregates.json"), payload)
 
 
+def _commit_paths() -> List[str]:
+    """Artifacts this run wrote with new content or removed, limited to
+    what the pipeline commits."""
+    return [
+        path
+        for path in changed_paths()
+        if any(path == root or path.startswith(root + os.sep) for root in COMMIT_ROOTS)
+    ]
+
+
 def _commit_changes(message: str) -> None:
-    status = subprocess.run(
-        ["git", "status", "--porcelain"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    if not status.stdout.strip():
+    # Stage exactly the artifacts this run changed instead of scanning the
+    # worktree; removed paths leave the index, the rest are added.
+    paths = _commit_paths()
+    removed = [path for path in paths if not os.path.exists(path)]
+    present = [path for path in paths if os.path.exists(path)]
+    if removed:
+        subprocess.run(
+            [
+                "git",
+                "--literal-pathspecs",
+                "rm",
+                "-r",
+                "--cached",
+                "--quiet",
+                "--ignore-unmatch",
+                "--pathspec-from-file=-",
+                "--pathspec-file-nul",
+            ],
+            input="\0".join(removed),
+            text=True,
+            check=True,
+        )
+    if present:
+        subprocess.run(
+            [
+                "git",
+                "--literal-pathspecs",
+                "add",
+                "--pathspec-from-file=-",
+                "--pathspec-file-nul",
+            ],
+            input="\0".join(present),
+            text=True,
+            check=True,
+        )
+    staged = subprocess.run(["git", "diff", "--cached", "--quiet"], check=False)
+    if staged.returncode == 0:
         print("No changes to commit")
         return
-
-    subprocess.run(
-        [
-            "git",
-            "add",
-            "data",
-            "heatmaps",
-            "site",
-            "README.md",
-        ],
-        check=True,
-    )
     subprocess.run(["git", "commit", "-m", message], check=True)
 
 
@@ -110,8 +144,7 @@ def _update_readme_live_site_link() -> None:
     if updated == content:
         return
 
-    with open(README_MD, "w", encoding="utf-8") as f:
-        f.write(updated)
+    write_text(README_MD, updated)
 
 
 def run_pipeline(
@@ -120,8 +153,16 @@ def run_pipeline(
     prune_deleted: bool,
     commit: bool,
     update_readme_link: bool,
+    from_events: bool = False,
 ) -> None:
-    if not skip_sync:
+    # The sync stage pulls in the HTTP client; offline regeneration skips it.
+    if from_events or not skip_sync:
+        from sync_strava import sync_events, sync_strava
+
+    if from_events:
+        summary = sync_events(dry_run=dry_run)
+        print(f"Synced webhook events: {summary}")
+    elif not skip_sync:
         summary = sync_strava(dry_run=dry_run, prune_deleted=prune_deleted)
         print(f"Synced: {summary}")
 
@@ -130,8 +171,17 @@ def run_pipeline(
 
     aggregates = aggregate_func()
     _write_aggregates(aggregates)
+    write_training_load(training_load_func())
+    routes = update_route_tiles()
+    if routes is not None:
+        print(f"Route heatmaps: {routes}")
 
     generate_heatmaps()
+    if render_preview():
+        print("Rendered README preview")
+    if precompress_enabled(load_config()):
+        compressed = compress_site()
+        print(f"Precompressed site assets: {compressed}")
     if update_readme_link:
         _update_readme_live_site_link()
 
@@ -146,6 +196,11 @@ def main() -> int:
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--prune-deleted", action="store_true")
     parser.add_argument("--commit", action="store_true")
+    parser.add_argument(
+        "--from-events",
+        action="store_true",
+        help="Sync only activities referenced by queued webhook events instead of polling.",
+    )
     parser.add_argument(
         "--update-readme-link",
         action="store_true",
@@ -159,6 +214,7 @@ def main() -> int:
         prune_deleted=args.prune_deleted,
         commit=args.commit,
         update_readme_link=args.update_readme_link,
+        from_events=args.from_events,
     )
     return 0
 
@@ -0,0 +1,229 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+from typing import Dict, List, Optional
+
+from utils import ensure_dir, sha256_file, utc_now
+
+DEFAULT_ARCHIVE = os.path.join("state", "pipeline-state.tar.gz")
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+# Everything a run restores from the dashboard-data branch before the
+# pipeline starts.
+PACK_ROOTS = (
+    "data",
+    "heatmaps",
+    os.path.join("site", "data.json"),
+    os.path.join("site", "shards"),
+    os.path.join("site", "routes"),
+    os.path.join("site", "asset-manifest.json"),
+)
+# The same roots in archive form; nothing outside them is ever written or
+# removed, whatever a manifest lists.
+ALLOWED_ROOTS = tuple(root.replace(os.sep, "/") for root in PACK_ROOTS)
+SKIP_SUFFIXES = (".tmp", "-journal")
+STAGING_DIR = ".state-unpack"
+
+
+class StateError(RuntimeError):
+    pass
+
+
+def _state_files() -> List[str]:
+    files = []
+    for root in PACK_ROOTS:
+        if os.path.isfile(root):
+            files.append(root)
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(SKIP_SUFFIXES):
+                    files.append(os.path.join(dirpath, filename))
+    return sorted(path.replace(os.sep, "/") for path in files)
+
+
+def _tar_info(name: str, size: int) -> tarfile.TarInfo:
+    # Fixed metadata so identical state packs to an identical archive.
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mode = 0o644
+    info.mtime = 0
+    return info
+
+
+def pack(archive: str = DEFAULT_ARCHIVE) -> Dict:
+    """Write every persisted state file into one gzip tar with a leading
+    manifest of sha256 digests, plus a `.sha256` sidecar for the archive."""
+    files = _state_files()
+    manifest = {
+        "version": FORMAT_VERSION,
+        "roots": list(ALLOWED_ROOTS),
+        "files": {path: {"sha256": sha256_file(path), "size": os.path.getsize(path)} for path in files},
+    }
+    ensure_dir(os.path.dirname(archive) or ".")
+    tmp = f"{archive}.tmp"
+    with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            payload = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+            tar.addfile(_tar_info(MANIFEST_NAME, len(payload)), io.BytesIO(payload))
+            for path in files:
+                with open(path, "rb") as f:
+                    tar.addfile(_tar_info(path, manifest["files"][path]["size"]), f)
+    os.replace(tmp, archive)
+    digest = sha256_file(archive)
+    with open(f"{archive}.sha256", "w", encoding="utf-8") as f:
+        f.write(f"{digest}  {os.path.basename(archive)}\n")
+    return {
+        "archive": archive,
+        "files": len(files),
+        "bytes": sum(entry["size"] for entry in manifest["files"].values()),
+        "archive_bytes": os.path.getsize(archive),
+        "sha256": digest,
+    }
+
+
+class _HashingReader:
+    def __init__(self, f) -> None:
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._f.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+def _expected_digest(archive: str) -> Optional[str]:
+    sidecar = f"{archive}.sha256"
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar, "r", encoding="utf-8") as f:
+        return (f.read().split() or [None])[0]
+
+
+def _safe_member(name: str) -> bool:
+    parts = name.split("/")
+    if name.startswith("/") or ".." in parts or "." in parts or "" in parts:
+        return False
+    return any(name == root or name.startswith(f"{root}/") for root in ALLOWED_ROOTS)
+
+
+def _extract_verified(archive: str, staging: str) -> Dict:
+    """Stream the archive once into `staging`, checking every member
+    against the manifest and the archive against its sidecar digest."""
+    with open(archive, "rb") as raw:
+        reader = _HashingReader(raw)
+        manifest = None
+        seen = set()
+        with gzip.GzipFile(fileobj=reader, mode="rb") as gz, tarfile.open(fileobj=gz, mode="r|") as tar:
+            for member in tar:
+                if manifest is None:
+                    if member.name != MANIFEST_NAME:
+                        raise StateError("archive does not start with a manifest")
+                    manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                    if manifest.get("version") != FORMAT_VERSION:
+                        raise StateError(f"unsupported state format {manifest.get('version')}")
+                    unknown = sorted(set(manifest.get("roots") or []) - set(ALLOWED_ROOTS))
+                    if unknown:
+                        raise StateError(f"manifest lists unexpected root {unknown[0]}")
+                    if any(not _safe_member(name) for name in manifest.get("files") or {}):
+                        raise StateError("manifest lists a file outside the packed roots")
+                    continue
+                expected = manifest["files"].get(member.name)
+                if not member.isfile() or expected is None or not _safe_member(member.name):
+                    raise StateError(f"unexpected archive member {member.name}")
+                target = os.path.join(staging, *member.name.split("/"))
+                ensure_dir(os.path.dirname(target))
+                digest = hashlib.sha256()
+                source = tar.extractfile(member)
+                with open(target, "wb") as f:
+                    for chunk in iter(lambda: source.read(1 << 16), b""):
+                        digest.update(chunk)
+                        f.write(chunk)
+                if digest.hexdigest() != expected["sha256"] or member.size != expected["size"]:
+                    raise StateError(f"checksum mismatch for {member.name}")
+                seen.add(member.name)
+        while reader.read(1 << 16):
+            pass
+    if manifest is None:
+        raise StateError("empty archive")
+    missing = set(manifest["files"]) - seen
+    if missing:
+        raise StateError(f"archive is missing {len(missing)} file(s), e.g. {sorted(missing)[0]}")
+    expected_digest = _expected_digest(archive)
+    if expected_digest and reader.digest.hexdigest() != expected_digest:
+        raise StateError("archive does not match its .sha256")
+    return manifest
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def unpack(archive: str = DEFAULT_ARCHIVE, verify_only: bool = False) -> Dict:
+    """Restore the packed state, replacing every packed root.
+
+    Nothing in the working tree changes until the whole archive has been
+    read and verified; a corrupt or truncated pack raises StateError.
+    """
+    if not os.path.exists(archive):
+        raise StateError(f"{archive} not found")
+    _remove(STAGING_DIR)
+    try:
+        try:
+            manifest = _extract_verified(archive, STAGING_DIR)
+        except (OSError, EOFError, tarfile.TarError, ValueError, KeyError) as exc:
+            raise StateError(f"unreadable archive: {exc}") from exc
+        if not verify_only:
+            for root in ALLOWED_ROOTS:
+                if root not in manifest["roots"]:
+                    continue
+                _remove(root)
+                staged = os.path.join(STAGING_DIR, *root.split("/"))
+                if os.path.exists(staged):
+                    ensure_dir(os.path.dirname(root) or ".")
+                    os.replace(staged, root)
+    finally:
+        _remove(STAGING_DIR)
+    return {
+        "archive": archive,
+        "files": len(manifest["files"]),
+        "verified_utc": utc_now().isoformat(),
+        "restored": not verify_only,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pack or restore persisted pipeline state as one archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("pack", "Write the state archive."),
+        ("unpack", "Verify the archive, then restore it."),
+        ("verify", "Verify the archive without restoring it."),
+    ):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--archive", default=DEFAULT_ARCHIVE)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        print(json.dumps(pack(args.archive), indent=2))
+        return 0
+    try:
+        summary = unpack(args.archive, verify_only=args.command == "verify")
+    except StateError as exc:
+        print(f"State archive rejected: {exc}")
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
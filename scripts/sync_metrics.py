@@ -0,0 +1,202 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from utils import ensure_dir, utc_now, write_json, write_text
+
+# Outside the committed data/ tree: metrics describe this host's runs, not
+# the athlete's history.
+DEFAULT_TEXTFILE_PATH = os.path.join(".metrics", "sync_metrics.prom")
+# Where earlier versions wrote the export; removed so the copies drop out of
+# the data branch.
+LEGACY_PATHS = (os.path.join("data", "sync_metrics.prom"), os.path.join("data", "sync_metrics.json"))
+PREFIX = "git_sweaty"
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def metrics_path(config: Dict) -> Optional[str]:
+    """Prometheus textfile path from config; None disables the export."""
+    metrics_cfg = config.get("metrics", {}) or {}
+    path = metrics_cfg.get("textfile", DEFAULT_TEXTFILE_PATH)
+    return str(path) if path else None
+
+
+class SyncMetrics:
+    """Request, pacing and quota measurements collected during one sync."""
+
+    def __init__(self) -> None:
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[str, Dict] = {}
+        self.sleep_seconds: Dict[str, float] = {}
+        self.headroom: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.sync: Dict[str, float] = {}
+
+    def observe_request(self, endpoint: str, kind: str, status, seconds: float) -> None:
+        key = (endpoint, kind, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.setdefault(
+            endpoint, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        )
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+    def observe_sleep(self, reason: str, seconds: float) -> None:
+        if seconds > 0:
+            self.sleep_seconds[reason] = self.sleep_seconds.get(reason, 0.0) + seconds
+
+    def observe_headroom(self, limiter) -> None:
+        """Remaining budget per window after Strava's rate-limit headers
+        have been applied to the limiter."""
+        for kind, window, limit, usage in (
+            ("overall", "15min", limiter.overall_15_limit, limiter.overall_15),
+            ("overall", "daily", limiter.overall_day_limit, limiter.overall_day),
+            ("read", "15min", limiter.read_15_limit, limiter.read_15),
+            ("read", "daily", limiter.read_day_limit, limiter.read_day),
+        ):
+            if limit:
+                self.headroom[(kind, window)] = {"limit": limit, "usage": usage}
+
+    def observe_sync(self, mode: str, summary: Dict, state: Optional[Dict] = None) -> None:
+        self.sync = {
+            "mode": mode,
+            "last_run_timestamp_seconds": int(utc_now().timestamp()),
+            "fetched": int(summary.get("fetched", 0) or 0),
+            "new_or_updated": int(summary.get("new_or_updated", 0) or 0),
+            "deleted": int(summary.get("deleted", 0) or 0),
+            "rate_limited": int(bool(summary.get("rate_limited"))),
+        }
+        if state is not None:
+            self.sync["backfill_completed"] = int(bool(state.get("completed")))
+            for key, name in (
+                ("next_before", "backfill_cursor_timestamp_seconds"),
+                ("oldest_seen_ts", "backfill_oldest_seen_timestamp_seconds"),
+                ("newest_seen_ts", "backfill_newest_seen_timestamp_seconds"),
+            ):
+                if state.get(key) is not None:
+                    self.sync[name] = int(state[key])
+
+    def to_json(self) -> Dict:
+        return {
+            "generated_at": utc_now().isoformat(),
+            "sync": self.sync,
+            "requests": [
+                {"endpoint": endpoint, "kind": kind, "status": status, "count": count}
+                for (endpoint, kind, status), count in sorted(self.requests.items())
+            ],
+            "latency_seconds": {
+                endpoint: {
+                    "buckets": dict(zip([str(bound) for bound in LATENCY_BUCKETS], histogram["buckets"])),
+                    "sum": round(histogram["sum"], 6),
+                    "count": histogram["count"],
+                }
+                for endpoint, histogram in sorted(self.latency.items())
+            },
+            "sleep_seconds": {reason: round(value, 3) for reason, value in sorted(self.sleep_seconds.items())},
+            "headroom": [
+                {"kind": kind, "window": window, **values, "remaining": values["limit"] - values["usage"]}
+                for (kind, window), values in sorted(self.headroom.items())
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]) -> None:
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{PREFIX}_{name}{labels} {_format_value(value)}")
+
+        # Values cover the last sync only and reset with every run, so they
+        # are gauges rather than counters.
+        metric(
+            "strava_requests",
+            "gauge",
+            "Strava API requests in the last sync by endpoint, kind and HTTP status.",
+            [
+                (_labels(endpoint=endpoint, kind=kind, status=status), count)
+                for (endpoint, kind, status), count in sorted(self.requests.items())
+            ],
+        )
+
+        histogram_samples: List[Tuple[str, float]] = []
+        for endpoint, histogram in sorted(self.latency.items()):
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                histogram_samples.append((_labels(endpoint=endpoint, le=_format_value(bound)), count))
+            histogram_samples.append((_labels(endpoint=endpoint, le="+Inf"), histogram["count"]))
+        metric(
+            "strava_request_duration_seconds",
+            "histogram",
+            "Strava API request latency in the last sync.",
+            [],
+        )
+        name = f"{PREFIX}_strava_request_duration_seconds"
+        for labels, value in histogram_samples:
+            lines.append(f"{name}_bucket{labels} {_format_value(value)}")
+        for endpoint, histogram in sorted(self.latency.items()):
+            lines.append(f"{name}_sum{_labels(endpoint=endpoint)} {_format_value(histogram['sum'])}")
+            lines.append(f"{name}_count{_labels(endpoint=endpoint)} {histogram['count']}")
+
+        metric(
+            "rate_limiter_sleep_seconds",
+            "gauge",
+            "Seconds the rate limiter waited in the last sync by reason.",
+            [(_labels(reason=reason), value) for reason, value in sorted(self.sleep_seconds.items())],
+        )
+        metric(
+            "strava_rate_limit_remaining",
+            "gauge",
+            "Requests left in the Strava rate-limit window after the last response.",
+            [
+                (_labels(kind=kind, window=window), values["limit"] - values["usage"])
+                for (kind, window), values in sorted(self.headroom.items())
+            ],
+        )
+        metric(
+            "strava_rate_limit",
+            "gauge",
+            "Strava rate limit per window as reported by the last response.",
+            [
+                (_labels(kind=kind, window=window), values["limit"])
+                for (kind, window), values in sorted(self.headroom.items())
+            ],
+        )
+
+        mode = str(self.sync.get("mode", ""))
+        for key, help_text in (
+            ("last_run_timestamp_seconds", "Unix time the last sync finished."),
+            ("fetched", "Activities fetched by the last sync."),
+            ("new_or_updated", "Activities written by the last sync."),
+            ("deleted", "Activities removed by the last sync."),
+            ("rate_limited", "1 if the last sync stopped on a rate limit."),
+            ("backfill_completed", "1 once the history backfill has reached the start boundary."),
+            ("backfill_cursor_timestamp_seconds", "Unix time the backfill cursor resumes before."),
+            ("backfill_oldest_seen_timestamp_seconds", "Start time of the oldest activity seen by the last backfill."),
+            ("backfill_newest_seen_timestamp_seconds", "Start time of the newest activity seen by the last backfill."),
+        ):
+            if key in self.sync:
+                metric(f"sync_{key}", "gauge", help_text, [(_labels(mode=mode), self.sync[key])])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the textfile atomically (node_exporter may read it at any
+        time) plus a JSON twin next to it."""
+        ensure_dir(os.path.dirname(path) or ".")
+        write_text(path, self.to_prometheus())
+        write_json(f"{os.path.splitext(path)[0]}.json", self.to_json())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(round(float(value), 6))
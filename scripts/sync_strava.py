@@ -3,15 +3,15 @@ import hashlib
 import hmac
 import json
 import os
-import shutil
 import sys
 import time
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
 
-import requests
-
-from utils import ensure_dir, load_config, read_json, utc_now, write_json
+from backfill_plan import max_run_seconds, page_budget
+from hydrate import hydrate, hydrate_config
+from sync_metrics import LEGACY_PATHS as LEGACY_METRICS_PATHS, SyncMetrics, metrics_path
+from utils import ensure_dir, load_config, read_json, remove_path, utc_now, write_json, write_text
 
 TOKEN_CACHE = ".strava_token.json"
 RAW_DIR = os.path.join("activities", "raw")
@@ -19,6 +19,7 @@ SUMMARY_JSON = os.path.join("data", "last_sync_summary.json")
 SUMMARY_TXT = os.path.join("data", "last_sync_summary.txt")
 STATE_PATH = os.path.join("data", "backfill_state.json")
 ATHLETE_PATH = os.path.join("data", "athletes.json")
+DELETED_PATH = os.path.join("data", "deleted_activities.json")
 
 
 class RateLimitExceeded(RuntimeError):
@@ -50,6 +51,9 @@ class RateLimiter:
         self.read_15 = 0
         self.read_day = 0
         self.last_request_at = 0.0
+        # "recent" or "backfill"; lets a shared fleet scheduler favour recent syncs.
+        self.phase = "recent"
+        self.metrics = SyncMetrics()
 
     def _reset_if_needed(self) -> None:
         now = time.time()
@@ -64,11 +68,12 @@ class RateLimiter:
             self.overall_day = 0
             self.read_day = 0
 
-    def _sleep_until_window_reset(self) -> None:
+    def _sleep_until_window_reset(self, reason: str) -> None:
         now = time.time()
         remaining = 900 - (now - self.window_start)
         if remaining > 0:
             time.sleep(remaining)
+            self.metrics.observe_sleep(reason, remaining)
         self._reset_if_needed()
 
     def before_request(self, kind: str) -> None:
@@ -78,13 +83,14 @@ class RateLimiter:
             elapsed = time.time() - self.last_request_at
             if elapsed < self.min_interval_seconds:
                 time.sleep(self.min_interval_seconds - elapsed)
+                self.metrics.observe_sleep("min_interval", self.min_interval_seconds - elapsed)
                 self._reset_if_needed()
 
         if self.overall_15 >= self.overall_15_limit - self.safety_buffer:
-            self._sleep_until_window_reset()
+            self._sleep_until_window_reset("overall_15min")
 
         if kind == "read" and self.read_15 >= self.read_15_limit - self.safety_buffer:
-            self._sleep_until_window_reset()
+            self._sleep_until_window_reset("read_15min")
 
         if self.overall_day >= self.overall_day_limit - self.safety_buffer:
             raise RateLimitExceeded("Overall daily limit reached; try again after UTC midnight.")
@@ -92,6 +98,50 @@ class RateLimiter:
         if kind == "read" and self.read_day >= self.read_day_limit - self.safety_buffer:
             raise RateLimitExceeded("Read daily limit reached; try again after UTC midnight.")
 
+    def reserve(self, kind: str) -> Tuple[float, str]:
+        """Claim the next request slot without sleeping.
+
+        Counts the request against the window the slot falls in and returns
+        how long the caller must wait before starting it, with the pacing
+        reason. Callers that share the limiter can reserve under a lock and
+        sleep outside it, so overlapping requests stay evenly spaced.
+        """
+        self._reset_if_needed()
+        if self.overall_day >= self.overall_day_limit - self.safety_buffer:
+            raise RateLimitExceeded("Overall daily limit reached; try again after UTC midnight.")
+        if kind == "read" and self.read_day >= self.read_day_limit - self.safety_buffer:
+            raise RateLimitExceeded("Read daily limit reached; try again after UTC midnight.")
+
+        now = time.time()
+        start, reason = now, ""
+        if self.window_start > now:
+            # An earlier reservation exhausted the window and rolled into
+            # the next one; nothing may start before it opens.
+            start, reason = self.window_start, "read_15min" if kind == "read" else "overall_15min"
+        if self.min_interval_seconds > 0 and self.last_request_at:
+            slot = self.last_request_at + self.min_interval_seconds
+            if slot > start:
+                start, reason = slot, "min_interval"
+        for window_reason, exhausted in (
+            ("overall_15min", self.overall_15 >= self.overall_15_limit - self.safety_buffer),
+            ("read_15min", kind == "read" and self.read_15 >= self.read_15_limit - self.safety_buffer),
+        ):
+            if exhausted:
+                self.window_start += 900
+                self.overall_15 = 0
+                self.read_15 = 0
+                if self.window_start > start:
+                    start, reason = self.window_start, window_reason
+                break
+
+        self.overall_15 += 1
+        self.overall_day += 1
+        if kind == "read":
+            self.read_15 += 1
+            self.read_day += 1
+        self.last_request_at = start
+        return start - now, reason
+
     def record_request(self, kind: str) -> None:
         self._reset_if_needed()
         self.overall_15 += 1
@@ -134,6 +184,21 @@ class RateLimiter:
             self.read_day = max(self.read_day, usage_day)
 
 
+def build_limiter(config: Dict) -> RateLimiter:
+    # Imported here: fleet builds on this module's RateLimiter.
+    from fleet import fleet_limiter_from_env
+
+    rate_cfg = config.get("rate_limits", {}) or {}
+    return fleet_limiter_from_env() or RateLimiter(
+        overall_15_limit=int(rate_cfg.get("overall_15_min", 200)),
+        overall_day_limit=int(rate_cfg.get("overall_daily", 2000)),
+        read_15_limit=int(rate_cfg.get("read_15_min", 100)),
+        read_day_limit=int(rate_cfg.get("read_daily", 1000)),
+        safety_buffer=int(rate_cfg.get("safety_buffer", 2)),
+        min_interval_seconds=float(rate_cfg.get("min_interval_seconds", 10)),
+    )
+
+
 def _load_token_cache() -> Dict:
     if not os.path.exists(TOKEN_CACHE):
         return {}
@@ -178,7 +243,36 @@ def _athlete_fingerprint(athlete_id: int, secret: str) -> str:
     return hmac.new(key, msg, hashlib.sha256).hexdigest()
 
 
-def _get_access_token(config: Dict, limiter: Optional[RateLimiter]) -> str:
+def _strava_request(
+    method: str,
+    url: str,
+    endpoint: str,
+    kind: str,
+    limiter: Optional[RateLimiter],
+    **kwargs,
+):
+    """One paced Strava API call; counts it against the limiter and records
+    its status and latency."""
+    import requests
+
+    if limiter:
+        limiter.before_request(kind)
+    started = time.perf_counter()
+    try:
+        resp = requests.request(method, url, timeout=30, **kwargs)
+    except requests.RequestException:
+        if limiter:
+            limiter.metrics.observe_request(endpoint, kind, "error", time.perf_counter() - started)
+        raise
+    if limiter:
+        limiter.record_request(kind)
+        limiter.apply_headers(resp.headers)
+        limiter.metrics.observe_request(endpoint, kind, resp.status_code, time.perf_counter() - started)
+        limiter.metrics.observe_headroom(limiter)
+    return resp
+
+
+def get_access_token(config: Dict, limiter: Optional[RateLimiter]) -> str:
     strava = config.get("strava", {})
     client_id = strava.get("client_id")
     client_secret = strava.get("client_secret")
@@ -194,38 +288,47 @@ def _get_access_token(config: Dict, limiter: Optional[RateLimiter]) -> str:
     if access_token and expires_at - 60 > now:
         return access_token
 
-    if limiter:
-        limiter.before_request("overall")
-    resp = requests.post(
+    resp = _strava_request(
+        "POST",
         "https://www.strava.com/oauth/token",
+        "oauth_token",
+        "overall",
+        limiter,
         data={
             "client_id": client_id,
             "client_secret": client_secret,
             "refresh_token": refresh_token,
             "grant_type": "refresh_token",
         },
-        timeout=30,
     )
-    if limiter:
-        limiter.record_request("overall")
-        limiter.apply_headers(resp.headers)
     resp.raise_for_status()
     payload = resp.json()
     _save_token_cache(payload)
     return payload["access_token"]
 
 
-def _fetch_athlete(token: str, limiter: Optional[RateLimiter]) -> Dict:
-    if limiter:
-        limiter.before_request("read")
-    resp = requests.get(
+def fetch_athlete(token: str, limiter: Optional[RateLimiter]) -> Dict:
+    resp = _strava_request(
+        "GET",
         "https://www.strava.com/api/v3/athlete",
+        "athlete",
+        "read",
+        limiter,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def fetch_athlete_stats(token: str, athlete_id: int, limiter: Optional[RateLimiter]) -> Dict:
+    resp = _strava_request(
+        "GET",
+        f"https://www.strava.com/api/v3/athletes/{athlete_id}/stats",
+        "athlete_stats",
+        "read",
+        limiter,
         headers={"Authorization": f"Bearer {token}"},
-        timeout=30,
     )
-    if limiter:
-        limiter.record_request("read")
-        limiter.apply_headers(resp.headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -240,7 +343,7 @@ def _lookback_after_ts(years: int) -> int:
     return int(start.timestamp())
 
 
-def _start_after_ts(config: Dict) -> int:
+def start_after_ts(config: Dict) -> int:
     sync_cfg = config.get("sync", {})
     start_date = sync_cfg.get("start_date")
     if start_date:
@@ -253,7 +356,7 @@ def _start_after_ts(config: Dict) -> int:
     return _lookback_after_ts(int(lookback_years))
 
 
-def _activity_start_ts(activity: Dict) -> Optional[int]:
+def activity_start_ts(activity: Dict) -> Optional[int]:
     value = activity.get("start_date") or activity.get("start_date_local")
     if not value:
         return None
@@ -265,7 +368,7 @@ def _activity_start_ts(activity: Dict) -> Optional[int]:
         return None
 
 
-def _fetch_page(
+def fetch_page(
     token: str,
     per_page: int,
     page: int,
@@ -273,24 +376,57 @@ def _fetch_page(
     before: Optional[int],
     limiter: Optional[RateLimiter],
 ) -> List[Dict]:
-    if limiter:
-        limiter.before_request("read")
     params = {"per_page": per_page, "page": page, "after": after}
     if before is not None:
         params["before"] = before
-    resp = requests.get(
+    resp = _strava_request(
+        "GET",
         "https://www.strava.com/api/v3/athlete/activities",
+        "athlete_activities",
+        "read",
+        limiter,
         headers={"Authorization": f"Bearer {token}"},
         params=params,
-        timeout=30,
     )
-    if limiter:
-        limiter.record_request("read")
-        limiter.apply_headers(resp.headers)
     resp.raise_for_status()
     return resp.json()
 
 
+def fetch_activity(token: str, activity_id: int, limiter: Optional[RateLimiter]) -> Optional[Dict]:
+    """Single activity by id, or None if Strava no longer has it."""
+    resp = _strava_request(
+        "GET",
+        f"https://www.strava.com/api/v3/activities/{activity_id}",
+        "activity",
+        "read",
+        limiter,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _load_deleted_ids() -> List[str]:
+    if not os.path.exists(DELETED_PATH):
+        return []
+    try:
+        payload = read_json(DELETED_PATH)
+    except Exception:
+        return []
+    return [str(activity_id) for activity_id in payload or []]
+
+
+def mark_deleted(activity_ids: List[str]) -> None:
+    deleted = set(_load_deleted_ids())
+    deleted.update(activity_ids)
+    ensure_dir("data")
+    write_json(DELETED_PATH, sorted(deleted))
+    for activity_id in activity_ids:
+        remove_path(os.path.join(RAW_DIR, f"{activity_id}.json"))
+
+
 def _load_existing_activity_ids() -> set:
     path = os.path.join("data", "activities_normalized.json")
     if not os.path.exists(path):
@@ -313,11 +449,18 @@ def _load_existing_activity_ids() -> set:
 def _has_existing_data() -> bool:
     candidates = [
         os.path.join("data", "activities_normalized.json"),
+        os.path.join("data", "activities.sqlite"),
         os.path.join("data", "daily_aggregates.json"),
+        os.path.join("data", "training_load.json"),
+        os.path.join("data", "route_polylines.json"),
+        os.path.join("data", "deleted_activities.json"),
+        os.path.join("data", "reconcile_state.json"),
+        os.path.join("data", "activity_details.json"),
         os.path.join("data", "backfill_state.json"),
         os.path.join("data", "last_sync_summary.json"),
         os.path.join("data", "last_sync_summary.txt"),
         os.path.join("site", "data.json"),
+        os.path.join("site", "shards"),
         "heatmaps",
     ]
     for path in candidates:
@@ -329,26 +472,33 @@ def _has_existing_data() -> bool:
 def _reset_persisted_data() -> None:
     paths = [
         os.path.join("data", "activities_normalized.json"),
+        os.path.join("data", "activities.sqlite"),
         os.path.join("data", "daily_aggregates.json"),
+        os.path.join("data", "training_load.json"),
+        os.path.join("data", "route_polylines.json"),
+        os.path.join("data", "route_tiles.json"),
+        os.path.join("data", "route_tiles.npz"),
+        os.path.join("data", "deleted_activities.json"),
+        os.path.join("data", "reconcile_state.json"),
+        os.path.join("data", "activity_details.json"),
         os.path.join("data", "backfill_state.json"),
         os.path.join("data", "last_sync_summary.json"),
         os.path.join("data", "last_sync_summary.txt"),
         os.path.join("site", "data.json"),
+        os.path.join("site", "asset-manifest.json"),
     ]
     for path in paths:
-        if os.path.exists(path):
-            os.remove(path)
+        remove_path(path)
 
-    for dir_path in ["heatmaps", RAW_DIR]:
-        if os.path.exists(dir_path):
-            shutil.rmtree(dir_path)
+    for dir_path in ["heatmaps", os.path.join("site", "shards"), os.path.join("site", "routes"), RAW_DIR]:
+        remove_path(dir_path)
 
 
 def _fetch_recent_activity_ids(
     token: str, per_page: int, limiter: Optional[RateLimiter]
 ) -> Optional[List[str]]:
     try:
-        activities = _fetch_page(token, min(per_page, 50), 1, 0, None, limiter)
+        activities = fetch_page(token, min(per_page, 50), 1, 0, None, limiter)
     except Exception:
         return None
     activity_ids = []
@@ -361,54 +511,57 @@ def _fetch_recent_activity_ids(
 
 def _maybe_reset_for_new_athlete(
     config: Dict, token: str, per_page: int, limiter: Optional[RateLimiter]
-) -> None:
+) -> bool:
+    """Reset persisted data when the token belongs to another athlete than
+    the stored one; returns whether it did."""
     strava = config.get("strava", {}) or {}
     secret = strava.get("client_secret") or strava.get("refresh_token") or ""
     if not secret:
-        return
+        return False
 
     try:
-        athlete = _fetch_athlete(token, limiter)
+        athlete = fetch_athlete(token, limiter)
     except Exception as exc:
         print(f"Warning: unable to fetch athlete profile; skipping reset ({exc})")
-        return
+        return False
     athlete_id = athlete.get("id")
     if athlete_id is None:
         print("Warning: athlete profile missing id; skipping reset")
-        return
+        return False
 
     current_fingerprint = _athlete_fingerprint(int(athlete_id), secret)
     stored_fingerprint = _load_athlete_fingerprint()
 
     if stored_fingerprint and stored_fingerprint == current_fingerprint:
-        return
+        return False
 
     if stored_fingerprint and stored_fingerprint != current_fingerprint:
         print("Detected different athlete; resetting persisted data.")
         _reset_persisted_data()
         _write_athlete_fingerprint(current_fingerprint)
-        return
+        return True
 
     if not _has_existing_data():
         _write_athlete_fingerprint(current_fingerprint)
-        return
+        return False
 
     recent_ids = _fetch_recent_activity_ids(token, per_page, limiter)
     if recent_ids is None:
         print("Warning: unable to verify recent activity overlap; skipping reset")
-        return
+        return False
 
     existing_ids = _load_existing_activity_ids()
     if recent_ids and any(activity_id in existing_ids for activity_id in recent_ids):
         _write_athlete_fingerprint(current_fingerprint)
-        return
+        return False
 
     print("No athlete fingerprint found and data does not match; resetting persisted data.")
     _reset_persisted_data()
     _write_athlete_fingerprint(current_fingerprint)
+    return True
 
 
-def _write_activity(activity: Dict) -> bool:
+def write_activity(activity: Dict) -> bool:
     activity_id = activity.get("id")
     if not activity_id:
         return False
@@ -463,11 +616,10 @@ def _sync_recent(
     newest_ts = None
     rate_limited = False
     rate_limit_message = ""
-    activity_ids = set()
 
     while True:
         try:
-            activities = _fetch_page(token, per_page, page, after, None, limiter)
+            activities = fetch_page(token, per_page, page, after, None, limiter)
         except RateLimitExceeded as exc:
             rate_limited = True
             rate_limit_message = str(exc)
@@ -476,16 +628,13 @@ def _sync_recent(
             break
         for activity in activities:
             total += 1
-            ts = _activity_start_ts(activity)
+            ts = activity_start_ts(activity)
             if ts is not None:
                 oldest_ts = ts if oldest_ts is None else min(oldest_ts, ts)
                 newest_ts = ts if newest_ts is None else max(newest_ts, ts)
-            activity_id = activity.get("id")
-            if activity_id:
-                activity_ids.add(str(activity_id))
             if dry_run:
                 continue
-            if _write_activity(activity):
+            if write_activity(activity):
                 new_or_updated += 1
         page += 1
 
@@ -496,29 +645,118 @@ def _sync_recent(
         "newest_ts": newest_ts,
         "rate_limited": rate_limited,
         "rate_limit_message": rate_limit_message,
-        "activity_ids": sorted(activity_ids),
     }
 
 
-def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
-    config = load_config()
-    rate_cfg = config.get("rate_limits", {}) or {}
-    limiter = RateLimiter(
-        overall_15_limit=int(rate_cfg.get("overall_15_min", 200)),
-        overall_day_limit=int(rate_cfg.get("overall_daily", 2000)),
-        read_15_limit=int(rate_cfg.get("read_15_min", 100)),
-        read_day_limit=int(rate_cfg.get("read_daily", 1000)),
-        safety_buffer=int(rate_cfg.get("safety_buffer", 2)),
-        min_interval_seconds=float(rate_cfg.get("min_interval_seconds", 10)),
-    )
+def _write_metrics(config: Dict, limiter: RateLimiter, mode: str, summary: Dict, state: Optional[Dict] = None) -> None:
+    path = metrics_path(config)
+    for legacy_path in LEGACY_METRICS_PATHS:
+        if not path or os.path.splitext(legacy_path)[0] != os.path.splitext(os.path.normpath(path))[0]:
+            remove_path(legacy_path)
+    if not path:
+        return
+    limiter.metrics.observe_sync(mode, summary, state)
+    limiter.metrics.write(path)
+
+
+def sync_events(
+    dry_run: bool,
+    config: Optional[Dict] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Dict:
+    """Apply queued webhook events instead of polling recent activities.
+
+    Events are coalesced per activity (the latest aspect wins); created or
+    updated activities are fetched by id and written to activities/raw,
+    deleted ones are recorded in data/deleted_activities.json so normalize
+    drops them from the persisted history. Events for other athletes are
+    skipped; events left over after a rate limit stay queued.
+    """
+    # Only event-driven runs need the webhook queue (and its POSIX file
+    # locking), so polling syncs never import it.
+    from webhook import claim_events, release_events
+
+    config = config if config is not None else load_config()
+    limiter = limiter or build_limiter(config)
+    limiter.metrics = SyncMetrics()
+    strava = config.get("strava", {}) or {}
+    secret = strava.get("client_secret") or strava.get("refresh_token") or ""
+    fingerprint = _load_athlete_fingerprint()
+
+    events = claim_events()
+    latest: Dict[int, Dict] = {}
+    skipped = 0
+    for event in sorted(events, key=lambda item: int(item.get("event_time") or 0)):
+        if event.get("object_type") != "activity":
+            skipped += 1
+            continue
+        owner_id = event.get("owner_id")
+        if fingerprint and owner_id is not None and _athlete_fingerprint(int(owner_id), secret) != fingerprint:
+            skipped += 1
+            continue
+        latest[int(event["object_id"])] = event
+
+    summary = {
+        "events": len(events),
+        "activities": len(latest),
+        "skipped": skipped,
+        "fetched": 0,
+        "new_or_updated": 0,
+        "deleted": 0,
+        "rate_limited": False,
+        "timestamp_utc": utc_now().isoformat(),
+    }
+    if dry_run:
+        return summary
+
+    ensure_dir(RAW_DIR)
+    deleted = [str(activity_id) for activity_id, event in latest.items() if event["aspect_type"] == "delete"]
+    pending = [activity_id for activity_id, event in latest.items() if event["aspect_type"] != "delete"]
+    unprocessed: List[Dict] = []
+    if pending:
+        token = get_access_token(config, limiter)
+        for index, activity_id in enumerate(pending):
+            try:
+                activity = fetch_activity(token, activity_id, limiter)
+            except RateLimitExceeded as exc:
+                summary["rate_limited"] = True
+                summary["rate_limit_message"] = str(exc)
+                unprocessed = [latest[remaining] for remaining in pending[index:]]
+                break
+            summary["fetched"] += 1
+            if activity is None:
+                deleted.append(str(activity_id))
+            elif write_activity(activity):
+                summary["new_or_updated"] += 1
+
+    if deleted:
+        mark_deleted(deleted)
+    summary["deleted"] = len(deleted)
+    release_events(unprocessed)
+    _write_metrics(config, limiter, "events", summary)
+    return summary
+
+
+def sync_strava(
+    dry_run: bool,
+    prune_deleted: bool,
+    config: Optional[Dict] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Dict:
+    run_started = time.time()
+    config = config if config is not None else load_config()
+    limiter = limiter or build_limiter(config)
+    limiter.phase = "recent"
+    limiter.metrics = SyncMetrics()
     per_page = int(config.get("sync", {}).get("per_page", 200))
-    after = _start_after_ts(config)
+    after = start_after_ts(config)
     recent_days = int(config.get("sync", {}).get("recent_days", 7))
     resume_backfill = bool(config.get("sync", {}).get("resume_backfill", True))
 
-    token = _get_access_token(config, limiter)
+    token = get_access_token(config, limiter)
+    athlete_reset = False
     if not dry_run:
-        _maybe_reset_for_new_athlete(config, token, per_page, limiter)
+        athlete_reset = _maybe_reset_for_new_athlete(config, token, per_page, limiter)
 
     ensure_dir(RAW_DIR)
 
@@ -527,7 +765,6 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
     page = 1
     total = 0
     new_or_updated = 0
-    fetched_ids = set(recent_summary.get("activity_ids", []))
     min_ts = None
     max_ts = None
     exhausted = False
@@ -555,10 +792,25 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
     rate_limited = bool(recent_summary.get("rate_limited"))
     rate_limit_message = recent_summary.get("rate_limit_message", "")
 
+    # Stop the backfill cleanly, with the cursor saved, once this run's
+    # share of the daily budget or job time is used up rather than running
+    # into the daily limit or the job timeout.
+    backfill_budget = page_budget(
+        config,
+        read_15_used=limiter.read_15,
+        read_day_used=limiter.read_day,
+        overall_15_used=limiter.overall_15,
+        overall_day_used=limiter.overall_day,
+        seconds_left=max_run_seconds(config) - (time.time() - run_started),
+    )
+    backfill_pages = 0
+
     if not rate_limited and not skip_backfill:
-        while True:
+        limiter.phase = "backfill"
+        while backfill_pages < backfill_budget:
+            backfill_pages += 1
             try:
-                activities = _fetch_page(token, per_page, page, after, before, limiter)
+                activities = fetch_page(token, per_page, page, after, before, limiter)
             except RateLimitExceeded as exc:
                 rate_limited = True
                 rate_limit_message = str(exc)
@@ -568,28 +820,41 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
                 break
             for activity in activities:
                 total += 1
-                activity_id = activity.get("id")
-                if activity_id:
-                    fetched_ids.add(str(activity_id))
-                ts = _activity_start_ts(activity)
+                ts = activity_start_ts(activity)
                 if ts is not None:
                     min_ts = ts if min_ts is None else min(min_ts, ts)
                     max_ts = ts if max_ts is None else max(max_ts, ts)
                 if dry_run:
                     continue
-                if _write_activity(activity):
+                if write_activity(activity):
                     new_or_updated += 1
             page += 1
 
+    # Deletions are found by reconciling per-month counts and id checksums
+    # with Strava, so a resumed or skipped backfill never prunes valid data.
     deleted = 0
-    if prune_deleted and not dry_run:
-        for filename in os.listdir(RAW_DIR):
-            if not filename.endswith(".json"):
-                continue
-            activity_id = filename[:-5]
-            if activity_id not in fetched_ids:
-                os.remove(os.path.join(RAW_DIR, filename))
-                deleted += 1
+    reconcile_summary = None
+    if prune_deleted and not dry_run and not rate_limited:
+        from reconcile import reconcile
+
+        try:
+            reconcile_summary = reconcile(token, config, limiter)
+        except RateLimitExceeded as exc:
+            reconcile_summary = {"rate_limited": True, "rate_limit_message": str(exc)}
+        deleted = int(reconcile_summary.get("deleted", 0))
+
+    # Detailed activities only get what the backfill and reconciliation
+    # left of the budget, so they never delay the history itself.
+    hydrate_summary = None
+    if hydrate_config(config)["enabled"] and not dry_run and not rate_limited:
+        limiter.phase = "backfill"
+        hydrate_summary = hydrate(
+            token,
+            config,
+            limiter,
+            seconds_left=max_run_seconds(config) - (time.time() - run_started),
+        )
+        deleted += int(hydrate_summary.get("deleted", 0))
 
     completed = True if skip_backfill else (exhausted and not rate_limited)
     next_before = None
@@ -602,9 +867,10 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
             state_update["completed"] = True
             state_update["rate_limited"] = rate_limited
             state_update["last_run_utc"] = utc_now().isoformat()
-        elif rate_limited and min_ts is None and state:
+        elif (rate_limited or not exhausted) and min_ts is None and state:
+            # Stopped before fetching anything: keep the saved cursor.
             state_update = dict(state)
-            state_update["rate_limited"] = True
+            state_update["rate_limited"] = rate_limited
             state_update["last_run_utc"] = utc_now().isoformat()
         else:
             state_update = {
@@ -630,10 +896,20 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
         "rate_limited": rate_limited,
         "backfill_completed": completed,
         "backfill_next_before": next_before,
+        "backfill_pages": backfill_pages,
+        "backfill_page_budget": backfill_budget,
         "recent_sync": recent_summary,
     }
+    if athlete_reset:
+        summary["athlete_reset"] = True
+    if reconcile_summary is not None:
+        summary["reconcile"] = reconcile_summary
+    if hydrate_summary is not None:
+        summary["hydrate"] = hydrate_summary
     if rate_limited:
         summary["rate_limit_message"] = rate_limit_message
+    if not dry_run:
+        _write_metrics(config, limiter, "poll", summary, state_update)
     return summary
 
 
@@ -643,7 +919,7 @@ def main() -> int:
     parser.add_argument(
         "--prune-deleted",
         action="store_true",
-        help="Remove local raw activities not returned by Strava",
+        help="Reconcile with Strava and drop activities it no longer has",
     )
     args = parser.parse_args()
 
@@ -669,8 +945,7 @@ def main() -> int:
         )
         if summary.get("rate_limited"):
             message += " [rate limited]"
-        with open(SUMMARY_TXT, "w", encoding="utf-8") as f:
-            f.write(message + "\n")
+        write_text(SUMMARY_TXT, message + "\n")
 
     print(json.dumps(summary, indent=2))
     return 0
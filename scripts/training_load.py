@@ -0,0 +1,187 @@
+import argparse
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from utils import ensure_dir, read_json, write_json
+
+AGG_PATH = os.path.join("data", "daily_aggregates.json")
+OUT_PATH = os.path.join("data", "training_load.json")
+
+WINDOWS = (7, 28, 365)
+METRICS = ("count", "distance", "moving_time")
+
+
+def _daily_values(aggregate_years: Dict) -> Dict[str, Dict[date, Tuple[int, int, int]]]:
+    """Per type and day: (count, distance in m, moving time in s).
+
+    Values are rounded per day so prefix sums stay exact integers and a
+    stored series can be compared against fresh aggregates without drift.
+    """
+    values: Dict[str, Dict[date, Tuple[int, int, int]]] = {}
+    for year_data in (aggregate_years or {}).values():
+        for activity_type, entries in (year_data or {}).items():
+            for date_str, entry in (entries or {}).items():
+                try:
+                    day = date.fromisoformat(date_str)
+                except ValueError:
+                    continue
+                values.setdefault(activity_type, {})[day] = (
+                    int(entry.get("count", 0)),
+                    int(round(float(entry.get("distance", 0.0)))),
+                    int(round(float(entry.get("moving_time", 0.0)))),
+                )
+    return values
+
+
+def _valid_series(series: Optional[Dict]) -> bool:
+    if not isinstance(series, dict):
+        return False
+    try:
+        lengths = {len(series[metric]) for metric in METRICS}
+    except (KeyError, TypeError):
+        return False
+    return len(lengths) == 1
+
+
+def _unchanged_length(prefix: Dict[str, List[int]], daily: Dict[str, List[int]], days: int) -> int:
+    """Number of leading days whose stored daily values still match."""
+    length = min(days, len(prefix[METRICS[0]]))
+    for index in range(length):
+        for metric in METRICS:
+            series = prefix[metric]
+            stored = series[index] - (series[index - 1] if index else 0)
+            if stored != daily[metric][index]:
+                return index
+    return length
+
+
+def _type_series(
+    start: date,
+    days: int,
+    values: Dict[date, Tuple[int, int, int]],
+    previous: Optional[Dict],
+) -> Dict[str, List[int]]:
+    daily = {metric: [0] * days for metric in METRICS}
+    for day, row in values.items():
+        index = (day - start).days
+        for metric, value in zip(METRICS, row):
+            daily[metric][index] = value
+
+    prefix = previous if _valid_series(previous) else {metric: [] for metric in METRICS}
+    keep = _unchanged_length(prefix, daily, days)
+
+    # Only the tail from the first changed day is recomputed; an unchanged
+    # history plus one new day just appends one element per array.
+    for metric in METRICS:
+        series = prefix[metric]
+        del series[keep:]
+        for index in range(keep, days):
+            series.append((series[index - 1] if index else 0) + daily[metric][index])
+    return prefix
+
+
+def _prefix_at(series: List[int], index: int) -> int:
+    """Cumulative total through day ``index``; the series is flat after its end."""
+    if index < 0 or not series:
+        return 0
+    return series[min(index, len(series) - 1)]
+
+
+def window_totals(payload: Dict, as_of: date) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Rolling-window and year-to-date totals per type as of a day.
+
+    Every value is a difference of two prefix entries, so any day (including
+    days after the last activity) costs O(types x windows).
+    """
+    if not payload.get("start"):
+        return {}
+    start = date.fromisoformat(payload["start"])
+    index = (as_of - start).days
+    year_start = (date(as_of.year, 1, 1) - start).days
+    totals: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for activity_type, prefix in (payload.get("types") or {}).items():
+        if not _valid_series(prefix):
+            continue
+        current = {metric: _prefix_at(prefix[metric], index) for metric in METRICS}
+        type_totals = {
+            str(window): {
+                metric: current[metric] - _prefix_at(prefix[metric], index - window)
+                for metric in METRICS
+            }
+            for window in WINDOWS
+        }
+        type_totals["ytd"] = {
+            metric: current[metric] - _prefix_at(prefix[metric], year_start - 1) for metric in METRICS
+        }
+        totals[activity_type] = type_totals
+    return totals
+
+
+def _load_previous() -> Dict:
+    if not os.path.exists(OUT_PATH):
+        return {}
+    try:
+        payload = read_json(OUT_PATH)
+    except Exception:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def training_load(previous: Optional[Dict] = None) -> Dict:
+    """Day-indexed prefix sums per type, from ``start`` to the last activity.
+
+    Only the prefix sums are stored; rolling 7/28/365-day and year-to-date
+    totals are derived from them by ``window_totals`` when they are read. A
+    full rebuild is O(days) and a run that only adds days extends the arrays.
+    """
+    aggregates = read_json(AGG_PATH) if os.path.exists(AGG_PATH) else {"years": {}}
+    values = _daily_values(aggregates.get("years", {}) or {})
+    output = {
+        "metrics": list(METRICS),
+        "start": None,
+        "end": None,
+        "types": {},
+    }
+    if not values:
+        return output
+
+    start = min(min(days) for days in values.values())
+    end = max(max(days) for days in values.values())
+    days = (end - start).days + 1
+
+    if previous is None:
+        previous = _load_previous()
+    reusable = (
+        previous.get("start") == start.isoformat()
+        and previous.get("metrics") == list(METRICS)
+    )
+    previous_types = (previous.get("types") or {}) if reusable else {}
+
+    for activity_type in sorted(values):
+        output["types"][activity_type] = _type_series(
+            start, days, values[activity_type], previous_types.get(activity_type)
+        )
+
+    output["start"] = start.isoformat()
+    output["end"] = end.isoformat()
+    return output
+
+
+def write_training_load(payload: Dict) -> None:
+    ensure_dir("data")
+    write_json(OUT_PATH, payload, compact=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compute rolling training-load totals from daily aggregates")
+    args = parser.parse_args()
+
+    output = training_load()
+    write_training_load(output)
+    print(f"Training load: {len(output['types'])} types, {output['start']} to {output['end']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,22 @@
+import hashlib
 import json
 import os
+import re
+import shutil
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Set
 
 import yaml
 
 CONFIG_PATH = "config.yaml"
 CONFIG_LOCAL_PATH = "config.local.yaml"
+STREAM_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_ELEMENT_ENDS = frozenset(" \t\r\n,]")
+
+# Paths this process wrote with new content or removed, so a commit can
+# stage exactly those (run_pipeline --commit).
+_CHANGED_PATHS: Set[str] = set()
 
 
 def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
@@ -44,12 +54,129 @@ def read_json(path: str) -> Any:
         return json.load(f)
 
 
-def write_json(path: str, data: Any) -> None:
+def iter_json_array(path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a file holding one JSON array, one at a time.
+
+    Only the current element and one read chunk are held in memory, so
+    peak usage does not grow with the length of the array. The file must
+    be exactly one array (whitespace aside); anything else raises
+    ValueError.
+    """
+    scan = json.JSONDecoder().scan_once
+    skip = _WHITESPACE.match
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> None:
+            # Drop what has been consumed and append the next chunk.
+            nonlocal buffer, pos, eof
+            more = f.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+
+        def peek() -> str:
+            # Next non-whitespace character, reading on as needed; "" at EOF.
+            nonlocal pos
+            while True:
+                pos = skip(buffer, pos).end()
+                if pos < len(buffer) or eof:
+                    return buffer[pos : pos + 1]
+                fill()
+
+        if peek() != "[":
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos += 1
+        char = peek()
+        while char != "]":
+            if char in ("", ",", "]"):
+                raise ValueError(f"{path}: expected an array element")
+            while True:
+                try:
+                    value, end = scan(buffer, pos)
+                except (StopIteration, json.JSONDecodeError) as exc:
+                    if eof:
+                        raise ValueError(f"{path}: invalid array element: {exc}") from None
+                    fill()
+                    continue
+                if not eof and (end == len(buffer) or buffer[end] not in _ELEMENT_ENDS):
+                    # A number cut off at the chunk boundary (`1.` of `1.5`)
+                    # still decodes; read on until the element is delimited.
+                    fill()
+                    continue
+                break
+            yield value
+            # The separator and the next element usually sit in the same
+            # chunk, so look there before falling back to peek().
+            pos = skip(buffer, end).end()
+            char = buffer[pos] if pos < len(buffer) else peek()
+            if char == ",":
+                pos = skip(buffer, pos + 1).end()
+                char = buffer[pos] if pos < len(buffer) else peek()
+                if char == "]":
+                    raise ValueError(f"{path}: trailing comma in JSON array")
+            elif char != "]":
+                raise ValueError(f"{path}: expected ',' or ']' between array elements")
+        pos += 1
+        if peek():
+            raise ValueError(f"{path}: unexpected data after the JSON array")
+
+
+def record_change(path: str) -> None:
+    _CHANGED_PATHS.add(os.path.normpath(path))
+
+
+def changed_paths() -> List[str]:
+    return sorted(_CHANGED_PATHS)
+
+
+def write_bytes(path: str, data: bytes) -> bool:
+    """Atomically replace `path` with `data` unless it already holds exactly
+    that; returns whether the file changed."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
     tmp = f"{path}.tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=True, indent=2, sort_keys=True)
-        f.write("\n")
+    with open(tmp, "wb") as f:
+        f.write(data)
     os.replace(tmp, path)
+    record_change(path)
+    return True
+
+
+def write_text(path: str, text: str) -> bool:
+    return write_bytes(path, text.encode("utf-8"))
+
+
+def remove_path(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    else:
+        return
+    record_change(path)
+
+
+def write_json(path: str, data: Any, compact: bool = False) -> bool:
+    if compact:
+        text = json.dumps(data, ensure_ascii=True, separators=(",", ":"), sort_keys=True)
+    else:
+        text = json.dumps(data, ensure_ascii=True, indent=2, sort_keys=True)
+    return write_text(path, text + "\n")
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def utc_now() -> datetime:
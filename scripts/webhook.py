@@ -0,0 +1,276 @@
+import argparse
+import fcntl
+import http.server
+import json
+import os
+import secrets
+import socketserver
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional
+
+from utils import ensure_dir, load_config, remove_path, utc_now
+
+# The queue is local working state, kept out of the committed data/ tree.
+QUEUE_DIR = ".webhook"
+QUEUE_PATH = os.path.join(QUEUE_DIR, "events.jsonl")
+CLAIMED_PATH = os.path.join(QUEUE_DIR, "events.processing.jsonl")
+# Where earlier versions kept the queue; claimed once and then removed.
+LEGACY_PATHS = (
+    os.path.join("data", "webhook_events.processing.jsonl"),
+    os.path.join("data", "webhook_events.jsonl"),
+)
+WEBHOOK_PATH = "/webhook"
+SUBSCRIPTIONS_ENDPOINT = "https://www.strava.com/api/v3/push_subscriptions"
+ASPECTS = ("create", "update", "delete")
+
+
+def _append_lines(path: str, events: List[Dict]) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            for event in events:
+                f.write(json.dumps(event, sort_keys=True) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_lines(path: str) -> List[Dict]:
+    events = []
+    if not os.path.exists(path):
+        return events
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def enqueue_event(event: Dict) -> None:
+    ensure_dir(os.path.dirname(QUEUE_PATH))
+    _append_lines(QUEUE_PATH, [event])
+
+
+def claim_events() -> List[Dict]:
+    """Move queued events to the claimed file and return everything claimed.
+
+    Events claimed by an earlier run that did not finish are returned again,
+    ahead of new ones, so nothing is lost if a sync is interrupted.
+    """
+    for legacy_path in LEGACY_PATHS:
+        if os.path.exists(legacy_path):
+            ensure_dir(QUEUE_DIR)
+            _append_lines(CLAIMED_PATH, _read_lines(legacy_path))
+            remove_path(legacy_path)
+    if os.path.exists(QUEUE_PATH):
+        with open(QUEUE_PATH, "r+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                pending = [json.loads(line) for line in f if line.strip()]
+                if pending:
+                    _append_lines(CLAIMED_PATH, pending)
+                f.seek(0)
+                f.truncate()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    return _read_lines(CLAIMED_PATH)
+
+
+def release_events(unprocessed: List[Dict]) -> None:
+    """Keep only the claimed events that still need processing."""
+    if not unprocessed:
+        if os.path.exists(CLAIMED_PATH):
+            os.remove(CLAIMED_PATH)
+        return
+    with open(CLAIMED_PATH, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(event, sort_keys=True) + "\n" for event in unprocessed)
+
+
+def _valid_event(event: Dict) -> bool:
+    return (
+        isinstance(event, dict)
+        and event.get("object_type") in ("activity", "athlete")
+        and event.get("aspect_type") in ASPECTS
+        and isinstance(event.get("object_id"), int)
+    )
+
+
+class ReusableTCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class WebhookHandler(http.server.BaseHTTPRequestHandler):
+    verify_token: str = ""
+    subscription_id: Optional[int] = None
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path != WEBHOOK_PATH:
+            self.send_error(404, "Not Found")
+            return
+        query = urllib.parse.parse_qs(parsed.query)
+        mode = query.get("hub.mode", [""])[0]
+        token = query.get("hub.verify_token", [""])[0]
+        challenge = query.get("hub.challenge", [""])[0]
+        if (
+            mode != "subscribe"
+            or not challenge
+            or not self.__class__.verify_token
+            or not secrets.compare_digest(token, self.__class__.verify_token)
+        ):
+            self.send_error(403, "Forbidden")
+            return
+        self._send_json(200, {"hub.challenge": challenge})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if urllib.parse.urlparse(self.path).path != WEBHOOK_PATH:
+            self.send_error(404, "Not Found")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            event = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, json.JSONDecodeError):
+            self.send_error(400, "Bad Request")
+            return
+        if not _valid_event(event):
+            self.send_error(400, "Bad Request")
+            return
+        expected = self.__class__.subscription_id
+        if expected is not None and event.get("subscription_id") != expected:
+            self.send_error(403, "Forbidden")
+            return
+        # Strava expects a response within two seconds; the event is only
+        # queued here and fetched by the next `run_pipeline.py --from-events`.
+        event["received_utc"] = utc_now().isoformat()
+        enqueue_event(event)
+        self._send_json(200, {})
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A003
+        return
+
+
+def webhook_config(config: Dict) -> Dict:
+    webhook_cfg = config.get("webhook", {}) or {}
+    subscription_id = webhook_cfg.get("subscription_id")
+    return {
+        "host": str(webhook_cfg.get("host", "127.0.0.1")),
+        "port": int(webhook_cfg.get("port", 8766)),
+        "verify_token": str(webhook_cfg.get("verify_token") or ""),
+        "subscription_id": int(subscription_id) if subscription_id not in (None, "") else None,
+    }
+
+
+def serve(host: str, port: int, verify_token: str, subscription_id: Optional[int]) -> None:
+    if not verify_token:
+        raise ValueError("Set webhook.verify_token in config.local.yaml before serving")
+    WebhookHandler.verify_token = verify_token
+    WebhookHandler.subscription_id = subscription_id
+    with ReusableTCPServer((host, port), WebhookHandler) as server:
+        print(f"Listening for Strava events on http://{host}:{port}{WEBHOOK_PATH}")
+        server.serve_forever()
+
+
+def fake_send(url: str, verify_token: str, events: List[Dict]) -> None:
+    """Act as Strava against a local receiver: handshake, then post events."""
+    challenge = secrets.token_urlsafe(12)
+    query = urllib.parse.urlencode(
+        {"hub.mode": "subscribe", "hub.verify_token": verify_token, "hub.challenge": challenge}
+    )
+    with urllib.request.urlopen(f"{url}?{query}", timeout=5) as resp:
+        echoed = json.loads(resp.read().decode("utf-8")).get("hub.challenge")
+    if echoed != challenge:
+        raise RuntimeError("Receiver did not echo the subscription challenge")
+    print("Handshake OK")
+
+    for event in events:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as resp:
+                status = resp.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        print(f"{event['aspect_type']} {event['object_type']} {event['object_id']}: HTTP {status}")
+
+
+def subscribe(config: Dict, callback_url: str) -> Dict:
+    """Register the callback with Strava (runs the handshake against it)."""
+    import requests
+
+    strava = config.get("strava", {}) or {}
+    resp = requests.post(
+        SUBSCRIPTIONS_ENDPOINT,
+        data={
+            "client_id": strava.get("client_id"),
+            "client_secret": strava.get("client_secret"),
+            "callback_url": callback_url,
+            "verify_token": webhook_config(config)["verify_token"],
+        },
+        timeout=30,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Receive Strava push-subscription events")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Run the event receiver.")
+    subscribe_parser = subparsers.add_parser("subscribe", help="Create the Strava push subscription.")
+    subscribe_parser.add_argument("--callback-url", required=True, help="Public URL that reaches the receiver.")
+    fake_parser = subparsers.add_parser("fake-send", help="Send Strava-style events to a local receiver.")
+    fake_parser.add_argument("--url", default=None, help="Receiver URL (default: from webhook config).")
+    fake_parser.add_argument("--aspect", choices=ASPECTS, default="create")
+    fake_parser.add_argument("--activity-id", type=int, nargs="+", required=True)
+    fake_parser.add_argument("--owner-id", type=int, default=1)
+    fake_parser.add_argument("--subscription-id", type=int, default=None)
+    args = parser.parse_args()
+
+    config = load_config()
+    cfg = webhook_config(config)
+    if args.command == "serve":
+        serve(cfg["host"], cfg["port"], cfg["verify_token"], cfg["subscription_id"])
+    elif args.command == "subscribe":
+        print(json.dumps(subscribe(config, args.callback_url), indent=2))
+    else:
+        url = args.url or f"http://{cfg['host']}:{cfg['port']}{WEBHOOK_PATH}"
+        subscription_id = args.subscription_id if args.subscription_id is not None else cfg["subscription_id"]
+        now = int(utc_now().timestamp())
+        events = [
+            {
+                "object_type": "activity",
+                "object_id": activity_id,
+                "aspect_type": args.aspect,
+                "owner_id": args.owner_id,
+                "subscription_id": subscription_id or 0,
+                "event_time": now,
+                "updates": {},
+            }
+            for activity_id in args.activity_id
+        ]
+        fake_send(url, cfg["verify_token"], events)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -286,6 +286,20 @@ function attachTooltip(cell, text) {
   });
 }
 
+function hydratePrerenderedView() {
+  const section = heatmaps?.querySelector("[data-prerendered]");
+  if (!section) return null;
+  section.querySelectorAll("[data-date]").forEach((cell) => {
+    const title = cell.querySelector("title");
+    if (!title) return;
+    const text = title.textContent;
+    title.remove();
+    cell.classList.add("cell");
+    attachTooltip(cell, text);
+  });
+  return section;
+}
+
 function getColors(type) {
   const accent = TYPE_META[type]?.accent || fallbackColor(type);
   return [DEFAULT_COLORS[0], DEFAULT_COLORS[1], DEFAULT_COLORS[2], DEFAULT_COLORS[3], accent];
@@ -296,18 +310,9 @@ function displayType(type) {
 }
 
 function summaryTypeTitle(type) {
-  const label = displayType(type);
-  const normalized = label.trim().toLowerCase();
-  if (normalized === "ride") {
-    return "Rides";
-  }
-  if (normalized === "run") {
-    return "Runs";
-  }
-  if (normalized === "weight training") {
-    return "Weight Trainings";
-  }
-  return label;
+  // Plurals come from type_meta (SUMMARY_TITLES in scripts/activity_types.py),
+  // the same source the prerendered summary uses.
+  return TYPE_META[type]?.summary_title || displayType(type);
 }
 
 function formatActivitiesTitle(types) {
@@ -379,28 +384,33 @@ function buildSummary(payload, types, years, showTypeBreakdown, showActiveDays,
     elevation: 0,
   };
   const typeTotals = {};
-  const activeDays = new Set();
+  let activeDays = 0;
 
-  Object.entries(payload.aggregates || {}).forEach(([year, yearData]) => {
-    if (!years.includes(Number(year))) return;
-    Object.entries(yearData || {}).forEach(([type, entries]) => {
-      if (!types.includes(type)) return;
+  years.forEach((year) => {
+    const yearTotals = payload.summaries?.[String(year)] || {};
+    types.forEach((type) => {
+      const entry = yearTotals[type];
+      if (!entry) return;
       if (!typeTotals[type]) {
         typeTotals[type] = { count: 0 };
       }
-      Object.entries(entries || {}).forEach(([dateStr, entry]) => {
-        if ((entry.count || 0) > 0) {
-          activeDays.add(dateStr);
-        }
-        totals.count += entry.count || 0;
-        totals.distance += entry.distance || 0;
-        totals.moving_time += entry.moving_time || 0;
-        totals.elevation += entry.elevation_gain || 0;
-        typeTotals[type].count += entry.count || 0;
-      });
+      totals.count += entry.count || 0;
+      totals.distance += entry.distance || 0;
+      totals.moving_time += entry.moving_time || 0;
+      totals.elevation += entry.elevation_gain || 0;
+      typeTotals[type].count += entry.count || 0;
     });
   });
 
+  if (showActiveDays) {
+    years.forEach((year) => {
+      const bits = combinedActiveBits(payload, types, year);
+      if (bits) {
+        activeDays += popcount(bits);
+      }
+    });
+  }
+
   const cards = [
     { title: "Total Activities", value: totals.count.toLocaleString() },
   ];
@@ -416,7 +426,7 @@ function buildSummary(payload, types, years, showTypeBreakdown, showActiveDays,
   }
   cards.push({ title: "Total Time", value: formatDuration(totals.moving_time) });
   if (showActiveDays) {
-    cards.push({ title: "Active Days", value: activeDays.size.toLocaleString() });
+    cards.push({ title: "Active Days", value: activeDays.toLocaleString() });
   }
 
   cards.forEach((card) => {
@@ -695,6 +705,17 @@ function buildLabeledCardRow(label, card, kind) {
   return row;
 }
 
+function buildRouteCard(type, src) {
+  const card = document.createElement("div");
+  card.className = "card route-card";
+  const image = document.createElement("img");
+  image.src = src;
+  image.alt = `${displayType(type)} route density`;
+  image.loading = "lazy";
+  card.appendChild(image);
+  return card;
+}
+
 function combineYearAggregates(yearData, types) {
   const combined = {};
   types.forEach((type) => {
@@ -757,25 +778,33 @@ function combineAggregatesByDate(payload, types, years) {
   return combined;
 }
 
-function getFilteredActivities(payload, types, years) {
-  const activities = payload.activities || [];
-  if (!activities.length) return [];
-  const yearSet = new Set(years.map(Number));
-  const typeSet = new Set(types);
-  return activities.filter((activity) => (
-    typeSet.has(activity.type) && yearSet.has(Number(activity.year))
-  ));
+function fillHourMatrix(payload, types, years, hourMatrix, hourBreakdowns) {
+  // Sums the weekday x hour cubes (index weekday * 24 + hour) into per-year hour rows.
+  let total = 0;
+  years.forEach((year, row) => {
+    types.forEach((type) => {
+      const hours = payload.summaries?.[String(year)]?.[type]?.hours;
+      if (!hours) return;
+      hours.forEach((count, index) => {
+        if (count <= 0) return;
+        const hour = index % 24;
+        hourMatrix[row][hour] += count;
+        const bucket = hourBreakdowns[row][hour];
+        bucket[type] = (bucket[type] || 0) + count;
+        total += count;
+      });
+    });
+  });
+  return total;
 }
 
 function shouldHideDistanceElevation(payload, types, years) {
   for (const year of years) {
-    const yearData = payload.aggregates?.[String(year)] || {};
+    const yearTotals = payload.summaries?.[String(year)] || {};
     for (const type of types) {
-      const entries = yearData?.[type] || {};
-      for (const entry of Object.values(entries)) {
-        if ((entry.distance || 0) > 0 || (entry.elevation_gain || 0) > 0) {
-          return false;
-        }
+      const entry = yearTotals[type];
+      if (entry && ((entry.distance || 0) > 0 || (entry.elevation_gain || 0) > 0)) {
+        return false;
       }
     }
   }
@@ -785,12 +814,7 @@ function shouldHideDistanceElevation(payload, types, years) {
 function getTypeYearTotals(payload, type, years) {
   const totals = new Map();
   years.forEach((year) => {
-    const entries = payload.aggregates?.[String(year)]?.[type] || {};
-    let total = 0;
-    Object.values(entries).forEach((entry) => {
-      total += entry.count || 0;
-    });
-    totals.set(year, total);
+    totals.set(year, payload.summaries?.[String(year)]?.[type]?.count || 0);
   });
   return totals;
 }
@@ -801,12 +825,10 @@ function getTypesYearTotals(payload, types, years) {
   }
   const totals = new Map();
   years.forEach((year) => {
-    const yearData = payload.aggregates?.[String(year)] || {};
+    const yearTotals = payload.summaries?.[String(year)] || {};
     let total = 0;
     types.forEach((type) => {
-      Object.values(yearData?.[type] || {}).forEach((entry) => {
-        total += entry.count || 0;
-      });
+      total += yearTotals[type]?.count || 0;
     });
     totals.set(year, total);
   });
@@ -853,6 +875,27 @@ function getFrequencyColor(types, allYearsSelected) {
   return types.length ? getColors(types[0])[4] : MULTI_TYPE_COLOR;
 }
 
+function fillCalendarMatrices(payload, types, years, dayMatrix, dayBreakdowns, monthMatrix, monthBreakdowns) {
+  years.forEach((year, row) => {
+    types.forEach((type) => {
+      const summary = payload.summaries?.[String(year)]?.[type];
+      if (!summary) return;
+      (summary.weekdays || []).forEach((count, dayIndex) => {
+        if (count <= 0) return;
+        dayMatrix[row][dayIndex] += count;
+        const bucket = dayBreakdowns[row][dayIndex];
+        bucket[type] = (bucket[type] || 0) + count;
+      });
+      (summary.months || []).forEach((count, monthIndex) => {
+        if (count <= 0) return;
+        monthMatrix[row][monthIndex] += count;
+        const bucket = monthBreakdowns[row][monthIndex];
+        bucket[type] = (bucket[type] || 0) + count;
+      });
+    });
+  });
+}
+
 function buildStatRow() {
   const row = document.createElement("div");
   row.className = "card stats-row";
@@ -904,24 +947,7 @@ function buildStatsOverview(payload, types, years, color) {
     Array.from({ length: 12 }, () => ({}))
   ));
 
-  yearsDesc.forEach((year, row) => {
-    types.forEach((type) => {
-      const entries = payload.aggregates?.[String(year)]?.[type] || {};
-      Object.entries(entries).forEach(([dateStr, entry]) => {
-        const count = entry.count || 0;
-        if (count <= 0) return;
-        const date = new Date(`${dateStr}T00:00:00`);
-        const dayIndex = date.getDay();
-        const monthIndex = date.getMonth();
-        dayMatrix[row][dayIndex] += count;
-        monthMatrix[row][monthIndex] += count;
-        const dayBucket = dayBreakdowns[row][dayIndex];
-        const monthBucket = monthBreakdowns[row][monthIndex];
-        dayBucket[type] = (dayBucket[type] || 0) + count;
-        monthBucket[type] = (monthBucket[type] || 0) + count;
-      });
-    });
-  });
+  fillCalendarMatrices(payload, types, yearsDesc, dayMatrix, dayBreakdowns, monthMatrix, monthBreakdowns);
 
   const formatBreakdown = (total, breakdown) => {
     const lines = [`Total: ${total} ${total === 1 ? "activity" : "activities"}`];
@@ -983,21 +1009,7 @@ function buildStatsOverview(payload, types, years, color) {
   const hourBreakdowns = yearsDesc.map(() => (
     Array.from({ length: 24 }, () => ({}))
   ));
-  const activities = getFilteredActivities(payload, types, yearsDesc);
-  const yearIndex = new Map();
-  yearsDesc.forEach((year, index) => {
-    yearIndex.set(Number(year), index);
-  });
-  activities.forEach((activity) => {
-    const row = yearIndex.get(Number(activity.year));
-    if (row === undefined) return;
-    const hour = Number(activity.hour);
-    if (!Number.isFinite(hour) || hour < 0 || hour > 23) return;
-    hourMatrix[row][hour] += 1;
-    const bucket = hourBreakdowns[row][hour];
-    const type = activity.type;
-    bucket[type] = (bucket[type] || 0) + 1;
-  });
+  const timedActivities = fillHourMatrix(payload, types, yearsDesc, hourMatrix, hourBreakdowns);
 
   const hourTotals = hourMatrix.reduce(
     (acc, row) => row.map((value, index) => acc[index] + value),
@@ -1007,7 +1019,7 @@ function buildStatsOverview(payload, types, years, color) {
   const hourTooltipLabels = hourTotals.map((_, hour) => `${formatHourLabel(hour)} (${hour}:00)`);
 
   const hourPanel = buildStatPanel("");
-  if (activities.length) {
+  if (timedActivities) {
     hourPanel.body.appendChild(
       buildYearMatrix(
         yearsDesc,
@@ -1052,7 +1064,7 @@ function buildStatsOverview(payload, types, years, color) {
   const bestHourIndex = hourTotals.reduce((best, value, index) => (
     value > hourTotals[best] ? index : best
   ), 0);
-  const bestHourLabel = activities.length
+  const bestHourLabel = timedActivities
     ? `${formatHourLabel(bestHourIndex)} (${hourTotals[bestHourIndex]} ${hourTotals[bestHourIndex] === 1 ? "activity" : "activities"})`
     : "Not enough time data yet";
 
@@ -1185,26 +1197,107 @@ function buildYearMatrix(years, colLabels, matrixValues, color, options = {}) {
   return container;
 }
 
-function calculateStreaks(activeDates) {
-  if (!activeDates.length) {
-    return { longest: 0, latest: 0 };
+function daysInYear(year) {
+  return Math.round((new Date(year + 1, 0, 1) - new Date(year, 0, 1)) / (1000 * 60 * 60 * 24));
+}
+
+function decodeBitset(encoded) {
+  const binary = atob(encoded || "");
+  const bits = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i += 1) {
+    bits[i] = binary.charCodeAt(i);
   }
-  const sorted = activeDates.slice().sort();
-  let longest = 1;
-  let current = 1;
-  for (let i = 1; i < sorted.length; i += 1) {
-    const prev = new Date(`${sorted[i - 1]}T00:00:00`);
-    const curr = new Date(`${sorted[i]}T00:00:00`);
-    const diffDays = (curr - prev) / (1000 * 60 * 60 * 24);
-    if (diffDays === 1) {
+  return bits;
+}
+
+function popcount(bits) {
+  let total = 0;
+  bits.forEach((byte) => {
+    let value = byte;
+    while (value) {
+      value &= value - 1;
+      total += 1;
+    }
+  });
+  return total;
+}
+
+function combinedActiveBits(payload, types, year) {
+  const yearSummaries = payload.summaries?.[String(year)] || {};
+  let combined = null;
+  types.forEach((type) => {
+    const bits = yearSummaries[type]?.activeBits;
+    if (!bits) return;
+    if (!combined) {
+      combined = new Uint8Array(bits.length);
+    }
+    bits.forEach((byte, index) => {
+      combined[index] |= byte;
+    });
+  });
+  return combined;
+}
+
+function bitsetRuns(bits, dayCount) {
+  let longest = 0;
+  let current = 0;
+  let last = 0;
+  let lastStart = -1;
+  let runStart = 0;
+  let leading = 0;
+  let leadingOpen = true;
+  for (let day = 0; day < dayCount; day += 1) {
+    const active = Boolean(bits && (bits[day >> 3] & (1 << (day & 7))));
+    if (active) {
+      if (current === 0) runStart = day;
       current += 1;
-    } else {
       longest = Math.max(longest, current);
-      current = 1;
+      last = current;
+      lastStart = runStart;
+      if (leadingOpen) leading += 1;
+    } else {
+      current = 0;
+      leadingOpen = false;
     }
   }
-  longest = Math.max(longest, current);
-  return { longest, latest: current };
+  return {
+    longest,
+    leading,
+    trailing: current,
+    last,
+    last_from_start: last && lastStart === 0 ? 1 : 0,
+  };
+}
+
+function calculateStreaks(payload, types, years) {
+  // Chains per-year streak boundary info, so only the single summary per
+  // (type, year), or one OR of their bitsets, is touched.
+  const yearsAsc = years.map(Number).sort((a, b) => a - b);
+  let longest = 0;
+  let latest = 0;
+  let carry = 0;
+  let previousYear = null;
+  yearsAsc.forEach((year) => {
+    const dayCount = daysInYear(year);
+    const runs = types.length === 1
+      ? (payload.summaries?.[String(year)]?.[types[0]]?.streak || bitsetRuns(null, dayCount))
+      : bitsetRuns(combinedActiveBits(payload, types, year), dayCount);
+    if (previousYear !== year - 1) {
+      carry = 0;
+    }
+    if (runs.last > 0) {
+      latest = runs.last_from_start ? carry + runs.last : runs.last;
+    }
+    if (runs.leading === dayCount) {
+      carry += dayCount;
+      longest = Math.max(longest, carry);
+    } else {
+      longest = Math.max(longest, runs.longest, carry + runs.leading);
+      carry = runs.trailing;
+    }
+    previousYear = year;
+  });
+  return { longest, latest };
 }
 
 function renderStats(payload, types, years, color) {
@@ -1212,10 +1305,6 @@ function renderStats(payload, types, years, color) {
   stats.innerHTML = "";
 
   const yearsDesc = years.slice().sort((a, b) => b - a);
-  const yearIndex = new Map();
-  yearsDesc.forEach((year, index) => {
-    yearIndex.set(Number(year), index);
-  });
 
   const dayMatrix = yearsDesc.map(() => new Array(7).fill(0));
   const dayBreakdowns = yearsDesc.map(() => (
@@ -1226,24 +1315,7 @@ function renderStats(payload, types, years, color) {
     Array.from({ length: 12 }, () => ({}))
   ));
 
-  yearsDesc.forEach((year, row) => {
-    types.forEach((type) => {
-      const entries = payload.aggregates?.[String(year)]?.[type] || {};
-      Object.entries(entries).forEach(([dateStr, entry]) => {
-        const count = entry.count || 0;
-        if (count <= 0) return;
-        const date = new Date(`${dateStr}T00:00:00`);
-        const dayIndex = date.getDay();
-        const monthIndex = date.getMonth();
-        dayMatrix[row][dayIndex] += count;
-        monthMatrix[row][monthIndex] += count;
-        const dayBucket = dayBreakdowns[row][dayIndex];
-        const monthBucket = monthBreakdowns[row][monthIndex];
-        dayBucket[type] = (dayBucket[type] || 0) + count;
-        monthBucket[type] = (monthBucket[type] || 0) + count;
-      });
-    });
-  });
+  fillCalendarMatrices(payload, types, yearsDesc, dayMatrix, dayBreakdowns, monthMatrix, monthBreakdowns);
   const dayTotals = dayMatrix.reduce(
     (acc, row) => row.map((value, index) => acc[index] + value),
     new Array(7).fill(0),
@@ -1320,18 +1392,7 @@ function renderStats(payload, types, years, color) {
   const hourBreakdowns = yearsDesc.map(() => (
     Array.from({ length: 24 }, () => ({}))
   ));
-  const activities = getFilteredActivities(payload, types, yearsDesc);
-  activities.forEach((activity) => {
-    const row = yearIndex.get(Number(activity.year));
-    if (row === undefined) return;
-    const hour = Number(activity.hour);
-    if (Number.isFinite(hour) && hour >= 0 && hour <= 23) {
-      hourMatrix[row][hour] += 1;
-      const bucket = hourBreakdowns[row][hour];
-      const type = activity.type;
-      bucket[type] = (bucket[type] || 0) + 1;
-    }
-  });
+  const timedActivities = fillHourMatrix(payload, types, yearsDesc, hourMatrix, hourBreakdowns);
 
   const hourTotals = hourMatrix.reduce(
     (acc, row) => row.map((value, index) => acc[index] + value),
@@ -1342,13 +1403,13 @@ function renderStats(payload, types, years, color) {
   ), 0);
   const hourLabels = hourTotals.map((_, hour) => (hour % 3 === 0 ? formatHourLabel(hour) : ""));
   const hourTooltipLabels = hourTotals.map((_, hour) => `${formatHourLabel(hour)} (${hour}:00)`);
-  const hourSubtitle = activities.length
+  const hourSubtitle = timedActivities
     ? `Peak hour: ${formatHourLabel(bestHourIndex)} (${hourTotals[bestHourIndex]} ${hourTotals[bestHourIndex] === 1 ? "activity" : "activities"})`
     : "Peak hour: not enough time data yet";
 
   const row3 = buildStatRow();
   const hourPanel = buildStatPanel("Activity Frequency by Time of Day");
-  if (activities.length) {
+  if (timedActivities) {
     hourPanel.body.appendChild(
       buildYearMatrix(
         yearsDesc,
@@ -1375,10 +1436,151 @@ function renderStats(payload, types, years, color) {
   stats.appendChild(row3);
 }
 
+function buildYearTypeSummaries(aggregates) {
+  const summaries = {};
+  Object.entries(aggregates || {}).forEach(([year, yearData]) => {
+    const epoch = new Date(Number(year), 0, 1);
+    const dayCount = daysInYear(Number(year));
+    Object.entries(yearData || {}).forEach(([type, entries]) => {
+      const summary = {
+        count: 0,
+        distance: 0,
+        moving_time: 0,
+        elevation_gain: 0,
+        weekdays: new Array(7).fill(0),
+        months: new Array(12).fill(0),
+        activeBits: new Uint8Array(Math.ceil(dayCount / 8)),
+      };
+      Object.entries(entries || {}).forEach(([dateStr, entry]) => {
+        const count = entry.count || 0;
+        summary.count += count;
+        summary.distance += entry.distance || 0;
+        summary.moving_time += entry.moving_time || 0;
+        summary.elevation_gain += entry.elevation_gain || 0;
+        if (count <= 0) return;
+        const date = new Date(`${dateStr}T00:00:00`);
+        const day = Math.round((date - epoch) / (1000 * 60 * 60 * 24));
+        summary.activeBits[day >> 3] |= 1 << (day & 7);
+        summary.weekdays[date.getDay()] += count;
+        summary.months[date.getMonth()] += count;
+      });
+      if (summary.count > 0) {
+        summary.active_days = popcount(summary.activeBits);
+        summary.streak = bitsetRuns(summary.activeBits, dayCount);
+        if (!summaries[year]) summaries[year] = {};
+        summaries[year][type] = summary;
+      }
+    });
+  });
+  return summaries;
+}
+
+function addActivityHours(summaries, activities) {
+  activities.forEach((activity) => {
+    const summary = summaries[String(activity.year)]?.[activity.type];
+    const hour = Number(activity.hour);
+    if (!summary || !Number.isFinite(hour) || hour < 0 || hour > 23) return;
+    if (!summary.hours) {
+      summary.hours = new Array(7 * 24).fill(0);
+    }
+    const weekday = new Date(`${activity.date}T00:00:00`).getDay();
+    summary.hours[weekday * 24 + hour] += 1;
+  });
+}
+
+function preparePayload(payload) {
+  if (payload.shards) {
+    // Manifest: per-year aggregates arrive from shards on demand.
+    payload.aggregates = {};
+    payload.loadedYears = new Set();
+    Object.values(payload.summaries || {}).forEach((yearSummaries) => {
+      Object.values(yearSummaries || {}).forEach((summary) => {
+        summary.activeBits = decodeBitset(summary.active);
+      });
+    });
+    return payload;
+  }
+  // Single-file payload: everything is already loaded.
+  payload.aggregates = payload.aggregates || {};
+  payload.summaries = buildYearTypeSummaries(payload.aggregates);
+  addActivityHours(payload.summaries, payload.activities || []);
+  delete payload.activities;
+  payload.loadedYears = new Set(Object.keys(payload.aggregates));
+  return payload;
+}
+
+function decodeShard(shard) {
+  if (shard.format !== "columnar") {
+    return shard.aggregates || {};
+  }
+  // Columnar shard: day offsets from `epoch`, indices into `types`, parallel value arrays.
+  const types = shard.types || [];
+  const [epochYear, epochMonth, epochDay] = String(shard.epoch).split("-").map(Number);
+  const dateKeys = [];
+  const dateKey = (day) => {
+    if (dateKeys[day] === undefined) {
+      dateKeys[day] = formatLocalDateKey(new Date(epochYear, epochMonth - 1, epochDay + day));
+    }
+    return dateKeys[day];
+  };
+
+  const aggregates = {};
+  const days = shard.days || {};
+  (days.day || []).forEach((day, index) => {
+    const type = types[days.type[index]];
+    if (!aggregates[type]) {
+      aggregates[type] = {};
+    }
+    aggregates[type][dateKey(day)] = {
+      count: days.count[index],
+      distance: days.distance[index],
+      moving_time: days.moving_time[index],
+      elevation_gain: days.elevation_gain[index],
+    };
+  });
+  return aggregates;
+}
+
+const shardRequests = new Map();
+
+function missingShardYears(payload, years) {
+  if (!payload.shards) return [];
+  return years.filter((year) => {
+    const key = String(year);
+    return Boolean(payload.shards[key]) && !payload.loadedYears.has(key);
+  });
+}
+
+function loadShards(payload, years) {
+  return Promise.all(years.map((year) => {
+    const key = String(year);
+    if (!shardRequests.has(key)) {
+      const request = fetch(payload.shards[key])
+        .then((resp) => {
+          if (!resp.ok) {
+            throw new Error(`Failed to load ${payload.shards[key]} (${resp.status})`);
+          }
+          return resp.json();
+        })
+        .then((shard) => {
+          payload.aggregates[key] = decodeShard(shard);
+          payload.loadedYears.add(key);
+        })
+        .catch((error) => {
+          shardRequests.delete(key);
+          throw error;
+        });
+      shardRequests.set(key, request);
+    }
+    return shardRequests.get(key);
+  }));
+}
+
 async function init() {
   syncRepoLink();
+  let prerenderedView = hydratePrerenderedView();
   const resp = await fetch("data.json");
-  const payload = await resp.json();
+  const payload = preparePayload(await resp.json());
   TYPE_META = payload.type_meta || {};
   (payload.types || []).forEach((type) => {
     if (!TYPE_META[type]) {
@@ -1386,8 +1588,8 @@ async function init() {
     }
   });
 
-  if (payload.generated_at) {
-    const updatedAt = new Date(payload.generated_at);
+  if (payload.updated_at) {
+    const updatedAt = new Date(payload.updated_at);
     if (!Number.isNaN(updatedAt.getTime())) {
       updated.textContent = `Last updated: ${updatedAt.toLocaleString([], {
         year: "numeric",
@@ -1647,6 +1849,12 @@ async function init() {
     years.sort((a, b) => b - a);
     const frequencyColor = getFrequencyColor(types, allYearsSelected);
     const showCombinedTypes = types.length > 1;
+    const pendingYears = missingShardYears(payload, years);
+    if (pendingYears.length) {
+      loadShards(payload, pendingYears)
+        .then(() => update())
+        .catch((error) => console.error(error));
+    }
     const allAvailableTypesSelected = types.length === payload.types.length;
 
     updateButtonState(typeButtons, selectedTypes, allTypesSelected);
@@ -1660,7 +1868,23 @@ async function init() {
       setMenuOpen(yearMenu, yearMenuButton, true);
     }
 
-    if (heatmaps) {
+    // The server-rendered default view stays up until its shards arrive.
+    const keepPrerendered = Boolean(prerenderedView)
+      && pendingYears.length > 0
+      && allTypesSelected
+      && allYearsSelected;
+    if (!keepPrerendered) {
+      prerenderedView = null;
+    }
+    if (heatmaps && pendingYears.length) {
+      if (!keepPrerendered) {
+        heatmaps.innerHTML = "";
+        const loading = document.createElement("div");
+        loading.className = "stat-subtitle";
+        loading.textContent = "Loading activity data\u2026";
+        heatmaps.appendChild(loading);
+      }
+    } else if (heatmaps) {
       heatmaps.innerHTML = "";
       const showMoreStats = allYearsSelected;
       if (showCombinedTypes) {
@@ -1735,6 +1959,9 @@ async function init() {
                 "frequency",
               ),
             );
+            if (payload.routes?.[type]) {
+              list.appendChild(buildLabeledCardRow("Routes", buildRouteCard(type, payload.routes[type]), "routes"));
+            }
           }
           cardYears.forEach((year) => {
             const aggregates = payload.aggregates?.[String(year)]?.[type] || {};
@@ -1753,7 +1980,9 @@ async function init() {
       }
     }
 
-    renderStats(payload, types, years, frequencyColor);
+    if (!pendingYears.length) {
+      renderStats(payload, types, years, frequencyColor);
+    }
 
     const showTypeBreakdown = types.length > 1;
     const showActiveDays = types.length > 1 && Boolean(heatmaps);